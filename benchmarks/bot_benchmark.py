@@ -0,0 +1,204 @@
+"""
+Benchmark of the bot's hot paths on the recorded game states corpus.
+
+For every state of the corpus times GameState.update, ActionsGenerator
+call for every vehicle type, ActionEstimator scoring of all the
+current player's actions and full StepScoreBot.get_actions call.
+
+Run with: python -m benchmarks.bot_benchmark [--corpus path]
+    [--check] [--save-thresholds FACTOR]
+"""
+import argparse
+import json
+import sys
+from collections import defaultdict
+from functools import partial
+from pathlib import Path
+from statistics import median
+from time import perf_counter_ns
+from typing import Callable, Optional
+
+from benchmarks.corpus import DEFAULT_CORPUS_PATH, CorpusTyping, load_corpus
+from bot.action_estimator import ActionEstimator
+from bot.actions_generator import ActionsGenerator
+from bot.bot_game_state import BotGameState
+from bot.step_score_bot import OPTIMAL_WEIGHTS, StepScoreBot
+from utility.custom_typings import GameStateDictTyping, MapDictTyping
+
+DEFAULT_THRESHOLDS_PATH = Path(__file__).parent / "thresholds.json"
+REPEATS = 7
+NS_IN_MS = 1_000_000
+
+# {case: {state name: median time in ms}}
+ResultsTyping = dict[str, dict[str, float]]
+
+
+def measure(
+    function: Callable[..., object],
+    setup: Optional[Callable[[], object]] = None,
+    repeats: int = REPEATS,
+) -> float:
+    """
+    Returns median duration of the function call in milliseconds.
+
+    :param function: function to measure, called with the result of
+        setup if it is given
+    :param setup: function called before every measured call, e.g.
+        to create objects without caches, it isn't measured
+    :param repeats: amount of measured calls
+    """
+    durations = []
+    for _ in range(repeats):
+        args = () if setup is None else (setup(),)
+        start = perf_counter_ns()
+        function(*args)
+        durations.append(perf_counter_ns() - start)
+    return median(durations) / NS_IN_MS
+
+
+def generate_actions(actions_generator: ActionsGenerator, vehicle_id: int) -> None:
+    """
+    Generates actions of the vehicle in the game state of the generator.
+
+    """
+    actions_generator(actions_generator.game_state.vehicles_by_id[vehicle_id])
+
+
+def benchmark_state(
+    game_map: MapDictTyping, data: GameStateDictTyping, repeats: int = REPEATS
+) -> dict[str, float]:
+    """
+    Times every case on the game state.
+
+    :return: {case: median time in ms}
+    """
+    results = {}
+
+    def new_game_state() -> BotGameState:
+        game_state = BotGameState(game_map)
+        game_state.update(data)
+        return game_state
+
+    game_state = new_game_state()
+    results["game_state.update"] = measure(
+        partial(game_state.update, data), repeats=repeats
+    )
+
+    actions_generator = ActionsGenerator(game_state)
+    actions = []
+    for vehicle in game_state.current_player.vehicles:
+        if vehicle.hp <= 0:
+            continue
+        # Generator of a new game state has no cached reachable hexes,
+        # so generation is measured from scratch
+        results[f"actions_generator.{vehicle.__class__.__name__}"] = measure(
+            partial(generate_actions, vehicle_id=vehicle.vehicle_id),
+            setup=lambda: ActionsGenerator(new_game_state()),
+            repeats=repeats,
+        )
+        actions.extend(actions_generator(vehicle))
+
+    estimator = ActionEstimator(game_state, OPTIMAL_WEIGHTS)
+    results["action_estimator.score_batch"] = measure(
+        partial(estimator.score_batch, actions), repeats=repeats
+    )
+
+    bot = StepScoreBot(game_map)
+    results["step_score_bot.get_actions"] = measure(
+        partial(bot.get_actions, data), repeats=repeats
+    )
+    return results
+
+
+def run_benchmarks(corpus: CorpusTyping, repeats: int = REPEATS) -> ResultsTyping:
+    """
+    Times every case on every state of the corpus.
+
+    """
+    results: ResultsTyping = defaultdict(dict)
+    for state in corpus["states"]:
+        for case, duration in benchmark_state(
+            corpus["maps"][state["map"]], state["game_state"], repeats
+        ).items():
+            results[case][state["name"]] = duration
+    return dict(results)
+
+
+def check_thresholds(results: ResultsTyping, thresholds: ResultsTyping) -> list[str]:
+    """
+    Returns descriptions of results above their thresholds.
+
+    """
+    return [
+        f"{case} on {name}: {duration:.3f} ms > {thresholds[case][name]:.3f} ms"
+        for case, durations in results.items()
+        for name, duration in durations.items()
+        if name in thresholds.get(case, {}) and duration > thresholds[case][name]
+    ]
+
+
+def print_results(results: ResultsTyping) -> None:
+    """
+    Prints table with states as columns and cases as rows.
+
+    """
+    names = list(dict.fromkeys(name for case in results.values() for name in case))
+    print(f"{'case, ms':<36}" + "".join(f"{name:>14}" for name in names))
+    for case, durations in results.items():
+        print(
+            f"{case:<36}"
+            + "".join(
+                f"{durations[name]:>14.3f}" if name in durations else f"{'-':>14}"
+                for name in names
+            )
+        )
+
+
+def main() -> None:
+    """
+    Runs benchmarks, prints results and checks or saves thresholds.
+
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS_PATH)
+    parser.add_argument("--thresholds", type=Path, default=DEFAULT_THRESHOLDS_PATH)
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument(
+        "--check", action="store_true", help="fail if results exceed thresholds"
+    )
+    parser.add_argument(
+        "--save-thresholds",
+        type=float,
+        metavar="FACTOR",
+        help="save results multiplied by FACTOR as thresholds",
+    )
+    args = parser.parse_args()
+
+    results = run_benchmarks(load_corpus(args.corpus), args.repeats)
+    print_results(results)
+
+    if args.save_thresholds is not None:
+        with open(args.thresholds, "w", encoding="utf8") as file:
+            json.dump(
+                {
+                    case: {
+                        name: round(duration * args.save_thresholds, 3)
+                        for name, duration in durations.items()
+                    }
+                    for case, durations in results.items()
+                },
+                file,
+                indent=2,
+            )
+
+    if args.check:
+        with open(args.thresholds, encoding="utf8") as file:
+            regressions = check_thresholds(results, json.load(file))
+        for regression in regressions:
+            print(f"Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Benchmark comparing decoding of GAME_STATE with available JSON codecs.
+
+Run with: python -m benchmarks.codec_benchmark
+"""
+import timeit
+
+from benchmarks.session_benchmark import CASES, synthetic_game_state
+from game_client.json_codec import CODECS, JsonCodec, MsgspecCodec
+from utility.custom_typings import GameStateDictTyping
+
+REPEATS = 5
+NUMBER = 20
+
+
+def get_codecs() -> dict[str, JsonCodec]:
+    """
+    Returns instances of available codecs by their names.
+
+    """
+    codecs = {name: codec() for name, codec in CODECS.items()}
+    if MsgspecCodec.name in codecs:
+        codecs["msgspec typed"] = MsgspecCodec(typed=True)
+    return codecs
+
+
+def run_case(codec: JsonCodec, payload: bytes) -> float:
+    """
+    Returns the best time of a single decoding in milliseconds.
+
+    """
+    timer = timeit.Timer(lambda: codec.decode(payload, GameStateDictTyping))
+    return min(timer.repeat(repeat=REPEATS, number=NUMBER)) / NUMBER * 1e3
+
+
+def main() -> None:
+    """
+    Prints decoding time of every codec in milliseconds for every case.
+
+    """
+    codecs = get_codecs()
+    print(f"{'case':<14}{'size, KB':>10}" + "".join(f"{name:>15}" for name in codecs))
+    for name, num_vehicles in CASES.items():
+        payload = JsonCodec().encode(synthetic_game_state(num_vehicles))
+        timings = "".join(
+            f"{run_case(codec, payload):>15.3f}" for codec in codecs.values()
+        )
+        print(f"{name:<14}{len(payload) / 1024:>10.0f}{timings}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Micro-benchmark comparing Coords with its previous implementation.
+
+Run with: python -m benchmarks.coords_benchmark
+"""
+from __future__ import annotations
+
+import timeit
+
+from utility.coordinates import Coords
+
+REPEATS = 5
+NUMBER = 100_000
+
+
+# pylint: disable=invalid-name
+# x, y, z are valid names
+class LegacyCoords:
+    """
+    Coords implementation with __dict__ and intermediate objects.
+
+    """
+
+    def __init__(self, coordinates):
+        if isinstance(coordinates, dict):
+            coordinates = (coordinates["x"], coordinates["y"], coordinates["z"])
+
+        self.x, self.y, self.z = coordinates
+        self.max_dimension: int = max([abs(self.x), abs(self.y), abs(self.z)])
+
+    def __eq__(self, other):
+        return self.x == other.x and self.y == other.y and self.z == other.z
+
+    def __hash__(self):
+        return hash((self.x, self.y, self.z))
+
+    def __iter__(self):
+        yield from (self.x, self.y, self.z)
+
+    def __abs__(self):
+        return LegacyCoords((abs(self.x), abs(self.y), abs(self.z)))
+
+    def __add__(self, other: LegacyCoords) -> LegacyCoords:
+        return LegacyCoords((self.x + other.x, self.y + other.y, self.z + other.z))
+
+    def __sub__(self, other: LegacyCoords) -> LegacyCoords:
+        return LegacyCoords((self.x - other.x, self.y - other.y, self.z - other.z))
+
+    def delta(self, other: LegacyCoords) -> LegacyCoords:
+        """
+        Calculates delta vector between self and other coordinates.
+
+        """
+        return abs(self - other)
+
+    def straight_dist_to(self, other: LegacyCoords) -> int:
+        """
+        Calculates distance from self to other coordinates.
+
+        """
+        return int(sum(self.delta(other)) / 2)
+
+    def unit_vector(self, other: LegacyCoords) -> LegacyCoords:
+        """
+        Calculates the unit vector directed to given coordinates.
+
+        """
+        tuple_generator = map(
+            lambda x: 0 if x[0] - x[1] == 0 else int((x[0] - x[1]) / abs(x[0] - x[1])),
+            zip(other, self),
+        )
+        return LegacyCoords(
+            (next(tuple_generator), next(tuple_generator), next(tuple_generator))
+        )
+
+
+CASES = {
+    "create from tuple": "klass((1, -2, 1))",
+    "create from dict": "klass({'x': 1, 'y': -2, 'z': 1})",
+    "add": "first + second",
+    "hash lookup": "first in lookup",
+    "straight_dist_to": "first.straight_dist_to(second)",
+    "unit_vector": "first.unit_vector(second)",
+}
+
+
+def run_case(klass, statement: str) -> float:
+    """
+    Returns the best time of a single statement execution in nanoseconds.
+
+    """
+    namespace = {
+        "klass": klass,
+        "first": klass((1, -2, 1)),
+        "second": klass((-3, 0, 3)),
+        "lookup": {klass((x, -x, 0)): x for x in range(10)},
+    }
+    timer = timeit.Timer(statement, globals=namespace)
+    return min(timer.repeat(repeat=REPEATS, number=NUMBER)) / NUMBER * 1e9
+
+
+def main() -> None:
+    """
+    Prints timings of both implementations for every case.
+
+    """
+    Coords.intern_radius(11)
+    print(f"{'case':<20}{'legacy, ns':>12}{'current, ns':>13}{'speedup':>9}")
+    for name, statement in CASES.items():
+        legacy = run_case(LegacyCoords, statement)
+        current = run_case(Coords, statement)
+        print(f"{name:<20}{legacy:>12.1f}{current:>13.1f}{legacy / current:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Records corpus of game states for benchmarks.
+
+States are recorded from offline games of StepScoreBot instances
+on generated maps at the early, middle and late stage of the game.
+
+Run with: python -m benchmarks.corpus [--sizes 20 35 50] [--players 6]
+    [--output path]
+"""
+import argparse
+import json
+from pathlib import Path
+from typing import Iterable
+
+from bot.mcst.mcst_bot_game_state import MCSTBotGameState, initial_game_state
+from bot.step_score_bot import StepScoreBot
+from game_client.map_generator import generate_map
+from utility.custom_typings import GameStateDictTyping, MapDictTyping
+
+DEFAULT_CORPUS_PATH = Path(__file__).parent / "corpus.json"
+DEFAULT_SIZES = (7, 11, 15)
+DEFAULT_PLAYERS = 3
+NUM_TURNS = 45
+
+# Share of the played game when the state is recorded
+PHASES = {"early": 0.1, "mid": 0.5, "late": 0.9}
+
+CorpusTyping = dict
+
+
+def get_num_turns(size: int, num_players: int) -> int:
+    """
+    Returns amount of turns long enough for vehicles to meet on the base.
+
+    """
+    return max(NUM_TURNS, size * num_players)
+
+
+def record_game(
+    game_map: MapDictTyping, num_players: int, num_turns: int
+) -> dict[str, GameStateDictTyping]:
+    """
+    Plays the game and returns its states at every phase from PHASES.
+
+    """
+    players = [
+        {"idx": idx, "name": f"bot_{idx}", "is_observer": False}
+        for idx in range(1, num_players + 1)
+    ]
+    game_state = MCSTBotGameState(game_map)
+    game_state.update(initial_game_state(game_map, players, num_turns))
+    bots = [StepScoreBot(game_map) for _ in players]
+
+    states: list[GameStateDictTyping] = []
+    while not game_state.finished:
+        states.append(game_state.to_dict())
+        bot = bots[game_state.current_player.idx - 1]
+        for action in bot.get_actions(states[-1]):
+            valid_action = game_state.get_action(
+                action.action_code, action.actor.vehicle_id, action.target
+            )
+            if valid_action is not None:
+                game_state.update_from_action(valid_action)
+        game_state.end_turn()
+
+    return {
+        phase: states[min(int(share * len(states)), len(states) - 1)]
+        for phase, share in PHASES.items()
+    }
+
+
+def generate_corpus(
+    sizes: Iterable[int] = DEFAULT_SIZES,
+    num_players: int = DEFAULT_PLAYERS,
+    seed: int = 0,
+) -> CorpusTyping:
+    """
+    Generates corpus with states of every phase for every map size.
+
+    :return: {"maps": {map name: map}, "states": [{"name": ...,
+        "map": map name, "phase": ..., "game_state": ...}]}
+    """
+    corpus: CorpusTyping = {"maps": {}, "states": []}
+    for size in sizes:
+        map_name = f"r{size}_p{num_players}"
+        game_map = generate_map(size, num_players, seed=seed, name=map_name)
+        corpus["maps"][map_name] = game_map
+        for phase, game_state in record_game(
+            game_map, num_players, get_num_turns(size, num_players)
+        ).items():
+            corpus["states"].append(
+                {
+                    "name": f"{map_name}_{phase}",
+                    "map": map_name,
+                    "phase": phase,
+                    "game_state": game_state,
+                }
+            )
+    return corpus
+
+
+def load_corpus(path: Path = DEFAULT_CORPUS_PATH) -> CorpusTyping:
+    """
+    Loads corpus saved by this module.
+
+    """
+    with open(path, encoding="utf8") as file:
+        return json.load(file)
+
+
+def main() -> None:
+    """
+    Generates corpus with parameters from command line and saves it.
+
+    """
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--players", type=int, default=DEFAULT_PLAYERS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=DEFAULT_CORPUS_PATH)
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.sizes, args.players, args.seed)
+    with open(args.output, "w", encoding="utf8") as file:
+        json.dump(corpus, file, separators=(",", ":"))
+
+
+if __name__ == "__main__":
+    main()
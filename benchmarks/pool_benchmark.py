@@ -0,0 +1,86 @@
+"""
+Benchmark comparing short games with new connections and with SessionPool.
+
+Players only end their turns, so the time is spent on connecting,
+LOGIN, MAP and game requests to the local server.
+
+Run with: python -m benchmarks.pool_benchmark
+"""
+import threading
+import time
+from typing import Callable
+
+from game_client.local_server import LocalServer
+from game_client.map_generator import generate_map
+from game_client.server_interaction import GameSession, SessionPool
+
+GAMES = 30
+NUM_PLAYERS = 3
+NUM_TURNS = 3
+
+
+def play(game: GameSession) -> None:
+    """
+    Ends turns until the game is finished.
+
+    """
+    while not game.game_state()["finished"]:
+        game.turn()
+
+
+def run_games(
+    name: str, start_game: Callable[[dict], GameSession], finish_game
+) -> float:
+    """
+    Plays GAMES games and returns mean time of a game in milliseconds.
+
+    :param name: prefix of games names
+    :param start_game: creates game session from login info
+    :param finish_game: called with every game session after the game
+    """
+    start = time.perf_counter()
+    for game_index in range(GAMES):
+        games = [
+            start_game(
+                {
+                    "name": f"p{player}",
+                    "game": f"{name}_{game_index}",
+                    "num_players": NUM_PLAYERS,
+                    "num_turns": NUM_TURNS,
+                }
+            )
+            for player in range(NUM_PLAYERS)
+        ]
+        threads = [threading.Thread(target=play, args=(game,)) for game in games]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for game in games:
+            finish_game(game)
+    return (time.perf_counter() - start) / GAMES * 1e3
+
+
+def main() -> None:
+    """
+    Prints mean time of a game with and without the pool.
+
+    """
+    with LocalServer(generate_map(size=7, num_players=NUM_PLAYERS, seed=0)) as server:
+        host, port = server.start()
+        new_connections = run_games(
+            "new_connections",
+            lambda login_info: GameSession(host, port, **login_info),
+            lambda game: game.server.close(),
+        )
+        with SessionPool(host, port) as pool:
+            pooled = run_games(
+                "pool", lambda login_info: pool.acquire(**login_info), pool.release
+            )
+
+    print(f"{'new connections, ms':>20}{'pool, ms':>10}{'speedup':>9}")
+    print(f"{new_connections:>20.2f}{pooled:>10.2f}{new_connections / pooled:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Benchmark comparing Session framing with its previous implementation.
+
+Session requests GAME_STATE from a local socket server answering with
+synthetic game states of growing size. Both sessions decode responses
+with the standard json codec, so only receiving of messages is compared.
+
+Run with: python -m benchmarks.session_benchmark
+"""
+import json
+import socket
+import struct
+import threading
+import timeit
+from typing import Optional, Union
+
+from bot.mcst.mcst_bot_game_state import initial_game_state
+from game_client.json_codec import JsonCodec
+from game_client.server_interaction import (HEADER, ActionCode, ResponseCode,
+                                            Session, encode_message)
+
+REPEATS = 5
+NUMBER = 20
+
+# Amounts of vehicles in synthetic game states
+CASES = {
+    "small state": 15,
+    "1k vehicles": 1000,
+    "10k vehicles": 10_000,
+    "50k vehicles": 50_000,
+}
+
+
+# pylint: disable=too-few-public-methods
+# Only get method is benchmarked
+class LegacySession(Session):
+    """
+    Session receiving messages by concatenating bytes objects.
+
+    Payload length of requests is taken from str(data), so it is wrong
+    for non-ASCII payloads. Responses are decoded with the session codec.
+    """
+
+    def get(self, action: Union[ActionCode, int], data: Optional[dict] = None) -> dict:
+        message = self.__generate_message(action, data)
+        self.client_socket.sendall(message)
+
+        response_code, received_data_len = struct.unpack("<ii", self.__recvall(8))
+        assert response_code == ResponseCode.OK
+        return (
+            {}
+            if received_data_len == 0
+            else self.codec.decode(self.__recvall(received_data_len))
+        )
+
+    def __recvall(self, length):
+        result = b""
+        while len(result) != length:
+            result += self.client_socket.recv(length - len(result))
+
+        return result
+
+    @staticmethod
+    def __generate_message(code: int, data: Optional[dict] = None) -> bytes:
+        if data is None:
+            return struct.pack("<ii", code, 0)
+
+        data_length = len(str(data))
+        return struct.pack(
+            f"<ii{data_length}s", code, data_length, json.dumps(data).encode("utf-8")
+        )
+
+
+def synthetic_game_state(num_vehicles: int) -> dict:
+    """
+    Returns game state dict with the given amount of vehicles.
+
+    """
+    players = [
+        {"idx": idx, "name": f"player {idx}", "is_observer": False} for idx in range(3)
+    ]
+    spawn_points = [
+        {
+            "medium_tank": [
+                {"x": vehicle_id % 11, "y": -5, "z": 5}
+                for vehicle_id in range(player["idx"], num_vehicles, len(players))
+            ]
+        }
+        for player in players
+    ]
+    return initial_game_state({"spawn_points": spawn_points}, players, 45)
+
+
+def serve(server_socket: socket.socket, response: bytes) -> None:
+    """
+    Answers every request of one connection with the same response.
+
+    """
+    connection, _ = server_socket.accept()
+    connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    with connection:
+        with connection.makefile("rb") as requests:
+            while header := requests.read(HEADER.size):
+                _, length = HEADER.unpack(header)
+                requests.read(length)
+                connection.sendall(response)
+
+
+def run_case(session_class, response: bytes) -> float:
+    """
+    Returns the best time of a single GAME_STATE request in milliseconds.
+
+    :param session_class: Session or LegacySession, sessions of both
+        classes use the same codec
+    :param response: encoded response to every request
+    """
+    with socket.create_server(("127.0.0.1", 0)) as server_socket:
+        thread = threading.Thread(target=serve, args=(server_socket, response))
+        thread.start()
+        session = session_class(*server_socket.getsockname(), JsonCodec())
+        timer = timeit.Timer(lambda: session.get(ActionCode.GAME_STATE))
+        timings = timer.repeat(repeat=REPEATS, number=NUMBER)
+        session.client_socket.close()
+        thread.join()
+    return min(timings) / NUMBER * 1e3
+
+
+def main() -> None:
+    """
+    Prints timings of both implementations for every case.
+
+    """
+    print(f"{'case':<14}{'size, KB':>10}{'legacy, ms':>12}{'current, ms':>13}{'speedup':>9}")
+    for name, num_vehicles in CASES.items():
+        response = encode_message(ResponseCode.OK, synthetic_game_state(num_vehicles))
+        legacy = run_case(LegacySession, response)
+        current = run_case(Session, response)
+        print(
+            f"{name:<14}{len(response) / 1024:>10.0f}{legacy:>12.2f}"
+            f"{current:>13.2f}{legacy / current:>8.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,18 +2,39 @@
 Contains class with methods to estimate actions.
 
 """
+import numpy as np
+
 from bot.bot_game_state import BotGameState
 from game_client.actions import Action
+from game_client.map import UNREACHABLE
 from game_client.map_hexes import Base, Catapult, HardRepair, LightRepair
 from game_client.server_interaction import ActionCode
 from game_client.vehicles import Vehicle
 from utility.coordinates import Coords
+from utility.profiler import profiler
+
+FEATURES_NAMES = (
+    "enemy_atk_to_hp_ratio",
+    "distance_to_base",
+    "gained_capture_points",
+    "estimate_targets",
+    "score_for_special_hexes",
+)
+FEATURES_COUNT = len(FEATURES_NAMES)
 
 
 class ActionEstimator:
     """
     Provides methods for action's 'usefulness' estimation.
 
+    Score of an action is a dot product of its features vector and
+    weights vector. Feature methods return raw (not weighted) values,
+    weights are applied only when features are scored. Features of
+    multiple actions can be calculated at once as a matrix with a row
+    for every action, so actions can be scored (or rescored with other
+    weights) with a single matrix-vector product. Matrix is filled
+    column by column, so time spent on every feature is measured by
+    the profiler.
     """
 
     def __init__(
@@ -21,37 +42,86 @@ class ActionEstimator:
     ):
         """
         :param game_state: game state from the bot
-        :param weights: float outcome modifiers for methods
+        :param weights: float outcome modifiers for features
             in the corresponding order:
                 0 - enemy_atk_to_hp_ratio
-                1 - straight_distance_to_base
+                1 - distance_to_base
                 2 - gained_capture_points
                 3 - estimate_targets
                 4 - score_for_special_hexes
         """
         self.game_state = game_state
         self.weights = weights
+        self.__weights_vector: np.ndarray = np.array(weights, dtype=float)
+        self.__features_functions = (
+            lambda action, position: self.enemy_atk_to_hp_ratio(
+                action.actor, position
+            ),
+            lambda action, position: self.distance_to_base(position),
+            lambda action, position: self.gained_capture_points(
+                action.actor, position
+            ),
+            lambda action, position: self.estimate_targets(
+                action.actor.damage, action.affected_vehicles
+            )
+            if action.action_code == ActionCode.SHOOT
+            else 0,
+            lambda action, position: self.score_for_special_hexes(
+                action.actor, position
+            ),
+        )
 
     def __call__(self, action: Action) -> float:
-        result = 0.0
-        position = (
-            action.target
-            if action.action_code == ActionCode.MOVE
-            else action.actor.position
-        )
+        return float(self.features(action) @ self.__weights_vector)
 
-        result += self.enemy_atk_to_hp_ratio(action.actor, position)
-        result += self.straight_distance_to_base(position)
-        result += self.score_for_special_hexes(action.actor, position)
-        result += self.gained_capture_points(action.actor, position)
+    def score_batch(self, actions: list[Action]) -> np.ndarray:
+        """
+        Scores every given action.
 
-        if action.action_code == ActionCode.SHOOT:
-            result += self.estimate_targets(
-                action.actor.damage, action.affected_vehicles
-            )
+        :param actions: actions to estimate
+        :return: array with score of every action
+        """
+        return self.score_features(self.features_batch(actions), self.__weights_vector)
 
+    @staticmethod
+    def score_features(features: np.ndarray, weights) -> np.ndarray:
+        """
+        Scores actions by their features matrix.
+
+        :param features: matrix from features_batch method
+        :param weights: weights in the same order as in constructor
+        :return: array with score of every action
+        """
+        return features @ np.asarray(weights, dtype=float)
+
+    def features_batch(self, actions: list[Action]) -> np.ndarray:
+        """
+        Calculates features of every given action.
+
+        :param actions: actions to estimate
+        :return: (len(actions), FEATURES_COUNT) matrix, columns are
+            in the same order as weights
+        """
+        result = np.zeros((len(actions), FEATURES_COUNT))
+        positions = [self.__get_position(action) for action in actions]
+        for column, (name, function) in enumerate(
+            zip(FEATURES_NAMES, self.__features_functions)
+        ):
+            with profiler.measure(f"estimator.{name}"):
+                result[:, column] = [
+                    function(action, position)
+                    for action, position in zip(actions, positions)
+                ]
         return result
 
+    def features(self, action: Action) -> list[float]:
+        """
+        Calculates features of the action in the same order as weights.
+
+        """
+        position = self.__get_position(action)
+        return [function(action, position) for function in self.__features_functions]
+
     def enemy_atk_to_hp_ratio(self, actor: Vehicle, position: Coords) -> float:
         """
         Metric for a rough estimation of chance to be killed on the given pos.
@@ -61,20 +131,22 @@ class ActionEstimator:
         More enemies - higher the metric
         More actor.hp - lower the metric
         """
-        close_enemies = self.__get_potential_shooters(position)
-        return self.weights[0] * sum(enemy.damage for enemy in close_enemies) / actor.hp
+        threat = self.game_state.threat_map.threat(
+            actor.player_id, self.game_state.game_map.grid.index(position)
+        )
+        return threat / actor.hp
 
-    def straight_distance_to_base(self, position: Coords) -> float:
+    def distance_to_base(self, position: Coords) -> float:
         """
-        Calculates straight distance to base if there were no obstacles on the map.
+        Returns length of the shortest path from the position to the base.
 
-        Not very representative metric as real distance to base
-        is not the same thing but calculating real distance every time
-        is very time-consuming, possible improvement: calculate distance
-        to base on map creation process by using BFS from base hexes.
-        Furthermore, base will not always be at the center of the map.
+        Distances are calculated with BFS from base hexes on map
+        creation, so it is a simple lookup. Hexes from which the base
+        can't be reached are farther than any reachable hex.
         """
-        return self.weights[1] * position.straight_dist_to(Coords((0, 0, 0)))
+        game_map = self.game_state.game_map
+        distance = game_map.distance_to_base(position)
+        return len(game_map.grid) if distance == UNREACHABLE else distance
 
     def gained_capture_points(self, actor: Vehicle, new_pos: Coords) -> float:
         """
@@ -82,14 +154,14 @@ class ActionEstimator:
 
         """
         result = 0
-        prev_pos_hex = self.game_state.get_hex(actor.position).map_hex
-        new_pos_hex = self.game_state.get_hex(new_pos).map_hex
+        prev_pos_hex = self.game_state.game_map[actor.position]
+        new_pos_hex = self.game_state.game_map[new_pos]
         if isinstance(prev_pos_hex, Base) and not isinstance(new_pos_hex, Base):
             result += -actor.capture_points
         if isinstance(prev_pos_hex, Base) and isinstance(new_pos_hex, Base):
             if self.__get_amount_of_players_on_base() <= 2:
                 result += 1
-        return self.weights[2] * result
+        return result
 
     def estimate_targets(self, damage: int, affected_vehicles: list[Vehicle]) -> float:
         """
@@ -103,7 +175,7 @@ class ActionEstimator:
                 result += vehicle.max_hp
             # result += vehicle.capture_points * hp_after_shot_modifier
 
-        return self.weights[3] * result
+        return result
 
     def score_for_special_hexes(self, actor: Vehicle, position: Coords) -> float:
         """
@@ -112,30 +184,33 @@ class ActionEstimator:
         Returns something not equal to zero if actor can benefit somehow
         from a at the given position.
         """
-        pos_hex = self.game_state.get_hex(position).map_hex
+        pos_hex = self.game_state.game_map[position]
         if isinstance(pos_hex, Catapult):
-            return self.weights[4] * 1
+            return 1
         if isinstance(pos_hex, HardRepair) and type(actor) in pos_hex.served_classes:
             if actor.hp != actor.max_hp:
-                return self.weights[4] * 1
+                return 1
         if isinstance(pos_hex, LightRepair) and type(actor) in pos_hex.served_classes:
             if actor.hp != actor.max_hp:
-                return self.weights[4] * 1
+                return 1
         return 0
 
-    def __get_potential_shooters(self, position: Coords) -> list[Vehicle]:
-        result = []
-        actor_gshex = self.game_state.get_hex(position)
-        for vehicle in self.game_state.vehicles.values():
-            if self.game_state.can_shoot(vehicle, actor_gshex):
-                result.append(vehicle)
+    @staticmethod
+    def __get_position(action: Action) -> Coords:
+        """
+        Returns position of the actor after the action.
 
-        return result
+        """
+        return (
+            action.target
+            if action.action_code == ActionCode.MOVE
+            else action.actor.position
+        )
 
     def __get_amount_of_players_on_base(self):
         result = set()
         for vehicle in self.game_state.vehicles.values():
-            vehicle_hex = self.game_state.get_hex(vehicle.position).map_hex
+            vehicle_hex = self.game_state.game_map[vehicle.position]
             if isinstance(vehicle_hex, Base):
                 result.add(vehicle.player_id)
 
@@ -7,9 +7,11 @@ from typing import Optional
 
 from bot.bot_game_state import BotGameState
 from game_client.actions import Action
+from game_client.hex_grid import RING_DIRECTIONS_ORDER, RayTyping
 from game_client.server_interaction import ActionCode
-from game_client.state_hex import GSHex
 from game_client.vehicles import AtSpg, Vehicle
+from utility.coordinates import Coords
+from utility.profiler import profiler
 
 
 # pylint: disable=too-few-public-methods
@@ -30,67 +32,74 @@ class ActionsGenerator:
         :param actor: Vehicle instance
         :return: list of all possible actions.
         """
-        if isinstance(actor, AtSpg):
-            return self.__get_possible_atspg_actions(actor)
-        return self.__get_possible_non_atspg_actions(actor)
+        with profiler.measure(f"actions_generator.{actor.__class__.__name__}"):
+            if isinstance(actor, AtSpg):
+                return self.__get_possible_atspg_actions(actor)
+            return self.__get_possible_non_atspg_actions(actor)
 
     def __get_possible_non_atspg_actions(self, actor: Vehicle) -> list[Action]:
         possible_actions: list[Action] = []
+        reachable_hexes = self.game_state.reachable_hexes(actor)
         for distance in actor.distances_to_check:
-            for gshex in self.game_state.get_hexes_on_dist(actor.position, distance):
-                possible_action = self._get_possible_action(actor, gshex)
+            for coords in self.game_state.get_coords_on_dist(actor.position, distance):
+                possible_action = self._get_possible_action(
+                    actor, coords, reachable_hexes
+                )
                 if possible_action is not None:
                     possible_actions.append(possible_action)
 
         return possible_actions
 
-    def _get_possible_action(self, actor: Vehicle, target: GSHex) -> Optional[Action]:
+    def _get_possible_action(
+        self, actor: Vehicle, target: Coords, reachable_hexes: dict[int, int]
+    ) -> Optional[Action]:
         if self.game_state.can_shoot(actor, target):
 
             return Action(
                 ActionCode.SHOOT,
                 actor,
-                target.coords,
+                target,
                 [
-                    target.vehicle,
+                    self.game_state.vehicle_at(target),
                 ],
             )
 
-        if self.game_state.can_move(actor, target):
-            return Action(ActionCode.MOVE, actor, target.coords)
+        if self.game_state.game_map.grid.index(target) in reachable_hexes:
+            return Action(ActionCode.MOVE, actor, target)
 
         return None
 
     def __get_possible_atspg_actions(self, actor: AtSpg) -> list[Action]:
         possible_actions: list[Action] = []
-        for direction in self.game_state.get_hexes_on_dist(actor.position, 1):
-            if self.game_state.can_move(actor, direction):
-                possible_actions.append(
-                    Action(ActionCode.MOVE, actor, direction.coords)
-                )
+        grid = self.game_state.game_map.grid
+        reachable_hexes = self.game_state.reachable_hexes(actor)
+        rays = grid.rays(grid.index(actor.position))
+        for direction_number in RING_DIRECTIONS_ORDER:
+            ray = rays[direction_number]
+            if not ray:
+                continue
+            direction = grid.coords[ray[0]]
+            if ray[0] in reachable_hexes:
+                possible_actions.append(Action(ActionCode.MOVE, actor, direction))
 
-            affected_vehicles = self.__get_atpsg_shoot_afected_vehicles(
-                actor, direction
-            )
+            affected_vehicles = self.__get_atpsg_shoot_afected_vehicles(actor, ray)
             if affected_vehicles:
                 possible_actions.append(
-                    Action(ActionCode.SHOOT, actor, direction.coords, affected_vehicles)
+                    Action(ActionCode.SHOOT, actor, direction, affected_vehicles)
                 )
 
         return possible_actions
 
-    def __get_atpsg_shoot_afected_vehicles(self, actor: AtSpg, direction):
+    def __get_atpsg_shoot_afected_vehicles(self, actor: AtSpg, ray: RayTyping):
         affected_vehicles: list[Vehicle] = []
-        offset = actor.position.unit_vector(direction.coords)
         for distance in actor.distances_to_check:
-            potential_target_coords = actor.position + (offset * distance)
-            if self.game_state.game_map.are_valid_coords(potential_target_coords):
-                potential_target = self.game_state.get_hex(potential_target_coords)
-            else:
+            if distance > len(ray):
                 continue
-            if not potential_target.can_shoot_through:
+            potential_target = ray[distance - 1]
+            if not self.game_state.can_shoot_through(potential_target):
                 break
-            if self.game_state.can_shoot(actor, potential_target):
-                affected_vehicles.append(potential_target.vehicle)
+            target_coords = self.game_state.game_map.grid.coords[potential_target]
+            if self.game_state.can_shoot(actor, target_coords):
+                affected_vehicles.append(self.game_state.vehicle_at(potential_target))
 
         return affected_vehicles
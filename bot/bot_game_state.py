@@ -2,23 +2,32 @@
 Contains class to describe game state in needed for bot way.
 
 """
+from dataclasses import dataclass
 from typing import Iterator
 
+from bot.threat_map import ThreatMap
 from game_client.actions import Action
-from game_client.game_state import GameState
+from game_client.game_state import GameState, StateChanges
+from game_client.map import CAN_GO_THROUGH, CAN_SHOOT_THROUGH
 from game_client.server_interaction import ActionCode
 from game_client.state_hex import GSHex
 from game_client.vehicles import AtSpg, Vehicle
 from utility.coordinates import Coords
+from utility.custom_typings import GameStateDictTyping, MapDictTyping
 
-DIRECTIONS = (
-    Coords((1, -1, 0)),
-    Coords((1, 0, -1)),
-    Coords((0, 1, -1)),
-    Coords((-1, 1, 0)),
-    Coords((-1, 0, 1)),
-    Coords((0, -1, 1)),
-)
+
+@dataclass(frozen=True)
+class UndoRecord:
+    """
+    Values changed by the action, stored to revert it.
+
+    """
+
+    action: Action
+    actor_position: Coords
+    actor_shoot_range_bonus: int
+    affected_vehicles_hp: tuple[int, ...]
+    kill_points: int
 
 
 class BotGameState(GameState):
@@ -27,8 +36,56 @@ class BotGameState(GameState):
 
     Adds ways of getting multiple hexes, methods to check if vehicles can move
     or shoot exact hexes, and a method to update game state from action.
+
+    Hexes reachable by a vehicle are calculated once and cached
+    until any vehicle changes its position. Threat map is built
+    on first request and then updated incrementally by update_from_action
+    and by update for vehicles changed since the previous update, it is
+    rebuilt after changes of the attack matrix.
+
+    Actions applied with push_action can be reverted in reversed order
+    with pop_action, which restores only the values changed by the action.
     """
 
+    def __init__(self, game_map: MapDictTyping):
+        super().__init__(game_map)
+        self.__reachable_hexes: dict[int, dict[int, int]] = {}
+        self.__threat_map: ThreatMap = ThreatMap(self)
+        self.__threat_map_is_built: bool = False
+        self.__undo_log: list[UndoRecord] = []
+
+    def update(self, data: GameStateDictTyping) -> StateChanges:
+        changes = super().update(data)
+        self.__undo_log.clear()
+        if changes.created or changes.moved:
+            self.__reachable_hexes.clear()
+        if changes.created or changes.attack_matrix_changed:
+            self.__threat_map_is_built = False
+        elif self.__threat_map_is_built:
+            for vehicle_id in changes.changed:
+                self.__threat_map.update_vehicle(self.vehicles_by_id[vehicle_id])
+        return changes
+
+    def _invalidate_caches(self) -> None:
+        """
+        Drops cached data and undo log after changes not made by actions.
+
+        """
+        self.__reachable_hexes.clear()
+        self.__threat_map_is_built = False
+        self.__undo_log.clear()
+
+    @property
+    def threat_map(self) -> ThreatMap:
+        """
+        Map with damage that can be dealt to every hex for every player.
+
+        """
+        if not self.__threat_map_is_built:
+            self.__threat_map.rebuild()
+            self.__threat_map_is_built = True
+        return self.__threat_map
+
     def update_from_action(self, action: Action) -> None:
         """
         Updates game state from the action.
@@ -40,76 +97,167 @@ class BotGameState(GameState):
         if action.action_code == ActionCode.SHOOT:
             self.__apply_shoot_action(action)
 
+        if self.__threat_map_is_built:
+            self.__threat_map.update_vehicle(action.actor)
+            for vehicle in action.affected_vehicles:
+                self.__threat_map.update_vehicle(vehicle)
+
+    def push_action(self, action: Action) -> None:
+        """
+        Updates game state from the action so that it can be reverted.
+
+        """
+        self.__undo_log.append(
+            UndoRecord(
+                action,
+                action.actor.position,
+                action.actor.shoot_range_bonus,
+                tuple(vehicle.hp for vehicle in action.affected_vehicles),
+                self.players[action.actor.player_id].win_points["kill"],
+            )
+        )
+        self.update_from_action(action)
+
+    def pop_action(self) -> Action:
+        """
+        Reverts the last action applied with push_action.
+
+        :return: reverted action
+        """
+        record = self.__undo_log.pop()
+        actor = record.action.actor
+        if actor.position != record.actor_position:
+            self._move_vehicle(actor, record.actor_position)
+        actor.shoot_range_bonus = record.actor_shoot_range_bonus
+        for vehicle, hp in zip(
+            record.action.affected_vehicles, record.affected_vehicles_hp
+        ):
+            vehicle.hp = hp
+        self.players[actor.player_id].win_points["kill"] = record.kill_points
+
+        if self.__threat_map_is_built:
+            self.__threat_map.update_vehicle(actor)
+            for vehicle in record.action.affected_vehicles:
+                self.__threat_map.update_vehicle(vehicle)
+
+        return record.action
+
+    @property
+    def undo_depth(self) -> int:
+        """
+        Amount of actions that can be reverted with pop_action.
+
+        """
+        return len(self.__undo_log)
+
     def get_hexes_on_dist(self, position: Coords, dist: int) -> Iterator[GSHex]:
         """
         Creates iterator with hexes at given distance from the position.
 
         """
-        if dist == 0:
-            yield self.get_hex(position)
+        for coords in self.get_coords_on_dist(position, dist):
+            yield self.get_hex(coords)
+
+    def get_coords_on_dist(self, position: Coords, dist: int) -> Iterator[Coords]:
+        """
+        Creates iterator with valid coordinates at given distance from the position.
 
-        else:
-            # Starting from bottom-left diagonal hex
-            hex_on_dist = position + DIRECTIONS[4] * dist
-            for i in range(6):  # going anticlockwise
-                for _ in range(dist):
-                    if self.game_map.are_valid_coords(hex_on_dist):
-                        yield self.get_hex(hex_on_dist)
-                    hex_on_dist = hex_on_dist + DIRECTIONS[i]
+        """
+        grid = self.game_map.grid
+        for index in grid.ring(grid.index(position), dist):
+            yield grid.coords[index]
 
-    def is_hex_reachable(self, actor: Vehicle, target: GSHex) -> bool:
+    def is_hex_reachable(self, actor: Vehicle, target: Coords) -> bool:
 
         """
         Tells if there is any path from position to target with given max_len.
 
         """
-        if actor.position.straight_dist_to(target.coords) > actor.speed_points:
+        if actor.position.straight_dist_to(target) > actor.speed_points:
             return False
 
-        visited: set[Coords] = set()
-        visited.add(actor.position)
-        fringes: list[list[Coords]] = [[actor.position]]
+        grid = self.game_map.grid
+        terrain = self.game_map.terrain
+        target_index = grid.index(target)
+        start_index = grid.index(actor.position)
+        visited: set[int] = {start_index}
+        fringe: list[int] = [start_index]
 
-        for k in range(1, actor.speed_points + 1):
-            fringes.append([])
-            for visited_hex in fringes[k - 1]:
-                for neighbour in self.get_hexes_on_dist(visited_hex, 1):
-                    if neighbour == target:
+        for _ in range(actor.speed_points):
+            next_fringe: list[int] = []
+            for visited_hex in fringe:
+                for neighbour in grid.neighbours[visited_hex]:
+                    if neighbour == target_index:
                         return True
-                    if neighbour.coords not in visited and neighbour.can_go_through:
-                        visited.add(neighbour.coords)
-                        fringes[k].append(neighbour.coords)
+                    if neighbour not in visited and terrain[neighbour] & CAN_GO_THROUGH:
+                        visited.add(neighbour)
+                        next_fringe.append(neighbour)
+            fringe = next_fringe
 
         return False
 
-    def can_move(self, actor: Vehicle, target: GSHex) -> bool:
+    def reachable_hexes(self, actor: Vehicle) -> dict[int, int]:
         """
-        Tells if actor can move to a given position.
+        Returns hexes actor can move to with lengths of the shortest paths.
 
+        Runs single BFS bounded by actor's speed points, result is cached
+        until any vehicle changes its position.
+
+        :param actor: vehicle presented in the game
+        :return: dictionary with grid indexes of hexes actor can stay on
+            as keys and path lengths as values
         """
-        if not target.can_stay(actor):
-            return False
+        if actor.vehicle_id in self.__reachable_hexes:
+            return self.__reachable_hexes[actor.vehicle_id]
+
+        grid = self.game_map.grid
+        terrain = self.game_map.terrain
+        start_index = grid.index(actor.position)
+        visited: set[int] = {start_index}
+        fringe: list[int] = [start_index]
+        result: dict[int, int] = {}
+
+        for distance in range(1, actor.speed_points + 1):
+            next_fringe: list[int] = []
+            for visited_hex in fringe:
+                for neighbour in grid.neighbours[visited_hex]:
+                    if neighbour in visited or not terrain[neighbour] & CAN_GO_THROUGH:
+                        continue
+                    visited.add(neighbour)
+                    next_fringe.append(neighbour)
+                    if self.can_stay(actor, neighbour):
+                        result[neighbour] = distance
+            fringe = next_fringe
+
+        self.__reachable_hexes[actor.vehicle_id] = result
+        return result
+
+    def can_move(self, actor: Vehicle, target: Coords) -> bool:
+        """
+        Tells if actor can move to a given position.
 
-        return self.is_hex_reachable(actor, target)
+        """
+        return self.game_map.grid.index(target) in self.reachable_hexes(actor)
 
-    def can_shoot(self, actor: Vehicle, target: GSHex) -> bool:
+    def can_shoot(self, actor: Vehicle, target: Coords) -> bool:
         """
         Tells if the actor can (and have reason to) shoot given target.
 
         :param actor: vehicle that is presented in the game
-        :param target: hex to shoot
+        :param target: coordinates of the hex to shoot
         """
-        if not actor.target_in_shoot_range(target.coords):
+        if not actor.target_in_shoot_range(target):
             return False
-        if target.vehicle is None:
+        target_vehicle = self.vehicle_at(target)
+        if target_vehicle is None:
             return False
         actor_player = self.players[actor.player_id]
-        if target.vehicle.player_id not in actor_player.can_attack_ids:
+        if target_vehicle.player_id not in actor_player.can_attack_ids:
             return False
-        if target.vehicle.hp <= 0:
+        if target_vehicle.hp <= 0:
             return False
         if isinstance(actor, AtSpg) and self.__shooting_path_has_obstacles(
-            actor.position, target.coords
+            actor.position, target
         ):
             return False
 
@@ -122,9 +270,14 @@ class BotGameState(GameState):
         Has reason to be used only if the shot line is a straight line
         (dx, dy, or dz between position and target equals 0).
         """
-        normal = position.unit_vector(target)
-        for i in range(1, position.straight_dist_to(target) + 1):
-            if not self.get_hex(position + normal * i).can_shoot_through:
+        grid = self.game_map.grid
+        direction = grid.direction(position, target)
+        if direction is None:
+            return False
+        ray = grid.rays(grid.index(position))[direction]
+        terrain = self.game_map.terrain
+        for index in ray[: position.straight_dist_to(target)]:
+            if not terrain[index] & CAN_SHOOT_THROUGH:
                 return True
         return False
 
@@ -136,10 +289,9 @@ class BotGameState(GameState):
                 action.actor.damage
             )
 
-    def __apply_move_action(self, action: Action) -> None:
-        self.__update_vehicle_pos(action.actor, action.target)
+    def _move_vehicle(self, vehicle: Vehicle, new_position: Coords) -> None:
+        super()._move_vehicle(vehicle, new_position)
+        self.__reachable_hexes.clear()
 
-    def __update_vehicle_pos(self, vehicle: Vehicle, new_position: Coords) -> None:
-        self.vehicles[new_position] = vehicle
-        self.vehicles.pop(vehicle.position)
-        vehicle.update_position(new_position)
+    def __apply_move_action(self, action: Action) -> None:
+        self._move_vehicle(action.actor, action.target)
@@ -1,133 +1,514 @@
-# pylint: skip-file
-# Still work in progress
+"""
+Contains array-based Monte-Carlo search tree over vehicles' actions.
+
+"""
 import math
-from struct import pack, unpack
+import random
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Iterable, Optional
+
+import numpy as np
 
+from bot.action_estimator import ActionEstimator
 from bot.actions_generator import ActionsGenerator
-from bot.bot import Bot
 from bot.mcst.mcst_bot_game_state import MCSTBotGameState
-from game_client.actions import Action, ActionCode
+from bot.step_score_bot import OPTIMAL_WEIGHTS
+from game_client.action_codec import decode_action, encode_action
+from game_client.actions import Action
+from game_client.server_interaction import ActionCode
+from game_client.vehicles import Vehicle
 from utility.coordinates import Coords
+from utility.custom_typings import GameStateDictTyping, MapDictTyping
 
+ROOT = 0
+NO_NODE = -1
+INITIAL_CAPACITY = 4096
 
-def action_to_bytestring(action: Action, game_state: MCSTBotGameState):
-    return pack(
-        "cccccccccc",
-        action.action_code.value,
-        action.actor.vehicle_id,
-        action.target,
-        0,
-        # TODO: get vehicle count
-        game_state.current_player.idx,
-        action.affected_vehicles,
-    )
+# Only this amount of the best actions by estimator is searched
+MAX_CHILDREN = 8
+EXPLORATION = math.sqrt(2)
+# Chance of a random action in playouts
+PLAYOUT_EPSILON = 0.2
+# Capture point outweighs kill points when the winner is chosen
+CAPTURE_POINT_WEIGHT = 100
 
+NODE_DTYPE = np.dtype(
+    [
+        ("parent", np.int32),
+        ("first_child", np.int32),
+        ("children_count", np.int16),
+        ("player", np.int8),
+        ("visits", np.int32),
+        ("value", np.float32),
+        # Encoded with game_client.action_codec
+        ("action", np.int64),
+    ]
+)
 
-def bytestr_to_action(bytestr: bytes, game_state: MCSTBotGameState):
-    unpacked = unpack("cccccccccc", bytestr)
-    affected_vehicles = []
-    for i in range(7, len(unpacked)):
-        affected_vehicles.append(find_vehicle(game_state.vehicles, unpacked[i]))
-    return Action(
-        ActionCode(unpacked[0]),
-        find_vehicle(game_state.vehicles, unpacked[1]),
-        Coords((unpacked[2], unpacked[3], unpacked[4])),
-        affected_vehicles,
-    )
+
+@dataclass(frozen=True)
+class SearchStatistics:
+    """
+    Visits and values of the nodes near the root, compact enough to be
+    passed between processes.
+
+    :param paths: row for every node with encoded actions from the root
+        to the node, padded with zeros
+    :param visits: visits of every node
+    :param values: value of every node
+    """
+
+    paths: np.ndarray
+    visits: np.ndarray
+    values: np.ndarray
 
 
-def get_current_player(bytestr: bytes):
-    return bytestr[6]
+def is_idle(action: Action) -> bool:
+    """
+    Checks if the action is move to the actor's own position.
 
+    """
+    return action.action_code == ActionCode.MOVE and action.target == action.actor.position
 
-def get_next_vehicle(bytestr: bytes):
-    return (bytestr[5] + 1) % 5
 
+def merge_statistics(statistics: Iterable[SearchStatistics]) -> SearchStatistics:
+    """
+    Sums statistics of trees searched from the same root.
 
-def find_vehicle(vehicles, id):
-    return next(
-        filter(lambda vehicle: vehicle.vehicle_id == id, vehicles.values()), None
+    Nodes are kept in order of their first appearance.
+    """
+    statistics = list(statistics)
+    paths, first, inverse = np.unique(
+        np.concatenate([tree_statistics.paths for tree_statistics in statistics]),
+        axis=0,
+        return_index=True,
+        return_inverse=True,
+    )
+    inverse = inverse.reshape(-1)
+    order = np.argsort(first, kind="stable")
+    visits = np.bincount(
+        inverse,
+        np.concatenate([tree_statistics.visits for tree_statistics in statistics]),
+        len(paths),
+    )
+    values = np.bincount(
+        inverse,
+        np.concatenate([tree_statistics.values for tree_statistics in statistics]),
+        len(paths),
+    )
+    return SearchStatistics(
+        paths[order], visits[order].astype(np.int64), values[order]
     )
 
 
-class MCSTNode:
-    def __init__(self, parent, action: bytes, child=None, sibling=None):
-        self.parent: MCSTNode = parent
-        self.child: MCSTNode = child
-        self.sibling: MCSTNode = sibling
-        self.am_visited = 0
-        self.am_wins = 0
-        self.action: bytes = action
+def choose_path(statistics: SearchStatistics) -> list[int]:
+    """
+    Returns path of the most visited children starting from the root.
 
-    def children(self):
-        node = self.child
-        while node is not None:
-            yield node
-            node = node.sibling
+    Ties are resolved in favor of the node that goes first.
+    """
+    paths = statistics.paths
+    depths = np.count_nonzero(paths, axis=1)
+    on_path = np.ones(len(paths), dtype=bool)
+    path: list[int] = []
+    for column in range(paths.shape[1]):
+        children = np.flatnonzero(on_path & (depths == column + 1))
+        if not children.size:
+            break
+        best = children[np.argmax(statistics.visits[children])]
+        path.append(int(paths[best, column]))
+        on_path &= paths[:, column] == paths[best, column]
+    return path
 
-    def have_all_children(self):
-        return all((child.am_visited > 0 for child in self.children()))
 
-    def get_new_child(self):
-        # returns random children
-        return next(filter(lambda child: child.am_visited == 0, self.children()))
+class MonteCarloSearchTree:
+    """
+    Monte-Carlo search tree over actions of single vehicles.
 
-    def get_most_valuable_child(self):
-        return max(self.children(), key=lambda node: node.get_uct())
+    Every node is an action of the current player's next vehicle in
+    the step order, the turn ends after the action of the player's last
+    alive vehicle, so the tree goes through turns of all players. Value
+    of the node is the sum of playout rewards of the player who acted.
 
-    def get_uct(self):
-        result = self.am_wins / self.am_visited
-        result += math.sqrt(2 * math.log(self.parent.am_visited) / self.am_visited)
-        return result
+    Nodes are stored in preallocated numpy structured array (see
+    NODE_DTYPE), node is the index in it. Children of a node are created
+    at once and take consecutive indexes, so UCT for all of them is a
+    single vectorized expression. Only MAX_CHILDREN best actions by
+    ActionEstimator become children, they are ordered from the best,
+    and unvisited children are tried in this order.
 
+    Playouts continue the game with epsilon-greedy estimator policy for
+    playout_turns turns. Finished game gives reward 1 to the winner and
+    0.5 to everyone on draw, otherwise rewards are win points scaled
+    to [0, 1] between the worst and the best player.
+    """
 
-class MonteCarloSearchTree:
-    def __init__(self, game_state: MCSTBotGameState, bot: Bot):
-        self.root: MCSTNode = MCSTNode(None, bytes())
-        self.bot: Bot = bot
-        self.game_state: MCSTBotGameState = game_state
-        self.action_generator = ActionsGenerator(game_state)
-
-    def selection(self) -> (MCSTNode, MCSTBotGameState):
-        node = self.root
-        game_state = self.game_state  # TODO: copy game_state
-        while not game_state.finished and node.have_all_children():
-            node = node.get_most_valuable_child()
-
-            action = bytestr_to_action(node.action, game_state)
-            game_state.update_from_action(action)  # TODO: update from action
-        return node, game_state
-
-    def expansion(self, node: MCSTNode, game_state: MCSTBotGameState):
-        new_node = node.get_new_child()
-
-        action = bytestr_to_action(node.action, game_state)
-        game_state.update_from_action(action)  # TODO: update_from_action
-
-        self.action_generator.game_state = game_state
-        vehicles = game_state.current_player.ordered_vehicle_iter
-        vehicle = next(vehicles)
-        for i in range(get_next_vehicle(node.action)):
-            vehicle = next(vehicles)
-
-        possible_steps = self.action_generator(vehicle)  # TODO: get possible steps
-        child = None
-        for action in possible_steps:
-            bytestr = action_to_bytestring(action)
-            child = MCSTNode(new_node, bytestr, sibling=child)
-        new_node.child = child
-        return new_node, game_state
-
-    def playout(self, game_state: MCSTBotGameState):
-        while not game_state.finished:
-            for action in self.bot.get_actions(game_state):  # TODO: change interface
-                game_state.update_from_action(action)  # TODO: update from action
-        return game_state.winner  # TODO: get winner
-
-    def backpropagation(self, node: MCSTNode, winner):
-        while node.parent is not None:
-            node.am_visited += 1
-            if (
-                get_current_player(node.action) == winner
-            ):  # TODO: determine which player made a move
-                node.am_wins += 1
+    # pylint: disable=too-many-instance-attributes
+    # Eleven is reasonable in this case.
+    def __init__(
+        self,
+        game_map: MapDictTyping,
+        seed: Optional[int] = None,
+        playout_turns: Optional[int] = None,
+        exploration: float = EXPLORATION,
+    ):
+        """
+        :param game_map: MAP response from the server
+        :param seed: seed of playouts random generator
+        :param playout_turns: turns played in playouts, if None,
+            one turn for every player
+        :param exploration: UCT exploration constant
+        """
+        self.nodes: np.ndarray = np.zeros(INITIAL_CAPACITY, dtype=NODE_DTYPE)
+        self.size: int = 0
+        self.playout_turns = playout_turns
+        self.exploration = exploration
+        self.__random = random.Random(seed)
+        self.__root_data: Optional[GameStateDictTyping] = None
+        self.__simulation = MCSTBotGameState(game_map)
+        self.__actions_generator = ActionsGenerator(self.__simulation)
+        self.__estimator = ActionEstimator(self.__simulation, OPTIMAL_WEIGHTS)
+        self.__players_ids: np.ndarray = np.zeros(0, dtype=int)
+        self.__rewards: np.ndarray = np.zeros(0)
+
+    def reset(self, data: GameStateDictTyping) -> None:
+        """
+        Drops the tree and makes the game state its root.
+
+        """
+        self.__root_data = data
+        self.__simulation.update(data)
+        self.__players_ids = np.array(
+            [
+                player.idx
+                for player in self.__simulation.players.values()
+                if not player.is_observer
+            ]
+        )
+        self.__rewards = np.zeros(self.__players_ids.max() + 1)
+        self.nodes[ROOT] = (NO_NODE, NO_NODE, 0, 0, 0, 0.0, 0)
+        self.size = 1
+
+    def advance_tree(self, data: GameStateDictTyping) -> bool:
+        """
+        Moves the root to the node of the game state keeping its subtree.
+
+        Actions leading from the root to the game state are found by
+        positions and health of vehicles in it. If they aren't in the
+        tree or their result differs from the game state, tree is reset.
+
+        :param data: game state at the start of a turn
+        :return: True if the subtree is reused
+        """
+        node = self.__find_node(data)
+        if node is None:
+            self.reset(data)
+            return False
+        self.__reroot(node)
+        self.__root_data = data
+        return True
+
+    def search(
+        self, iterations: Optional[int] = None, time_limit: Optional[float] = None
+    ) -> int:
+        """
+        Runs search iterations until any of the limits is reached.
+
+        :param iterations: amount of iterations
+        :param time_limit: seconds for the search
+        :return: amount of done iterations
+        """
+        if self.__root_data is None:
+            raise ValueError("Tree has no root, call reset or advance_tree first")
+        if iterations is None and time_limit is None:
+            raise ValueError("Search must be limited")
+
+        deadline = math.inf if time_limit is None else perf_counter() + time_limit
+        done = 0
+        while (iterations is None or done < iterations) and perf_counter() < deadline:
+            self.__iteration()
+            done += 1
+        return done
+
+    def statistics(self, depth: int) -> SearchStatistics:
+        """
+        Returns visits and value of nodes up to depth levels below the root.
+
+        Nodes go level by level, children of a node go in order of creation.
+        """
+        nodes = self.nodes
+        level = np.array([ROOT])
+        level_paths = np.zeros((1, depth), dtype=np.int64)
+        paths, visits, values = [], [], []
+        for column in range(depth):
+            counts = nodes["children_count"][level].astype(np.int64)
+            parents = np.repeat(np.arange(len(level)), counts)
+            offsets = np.arange(counts.sum()) - np.repeat(
+                np.cumsum(counts) - counts, counts
+            )
+            level = nodes["first_child"][level][parents] + offsets
+            if not level.size:
+                break
+            level_paths = level_paths[parents]
+            level_paths[:, column] = nodes["action"][level]
+            paths.append(level_paths)
+            visits.append(nodes["visits"][level])
+            values.append(nodes["value"][level])
+
+        if not paths:
+            return SearchStatistics(
+                np.zeros((0, depth), dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+            )
+        return SearchStatistics(
+            np.concatenate(paths),
+            np.concatenate(visits).astype(np.int64),
+            np.concatenate(values).astype(float),
+        )
+
+    def __iteration(self) -> None:
+        """
+        Selects path to a new node, plays the game out and updates the path.
+
+        """
+        simulation = self.__simulation
+        simulation.update(self.__root_data)
+        queue = self.__turn_vehicles()
+        node = ROOT
+        path = [ROOT]
+        while not simulation.finished:
+            if not queue:
+                simulation.end_turn()
+                queue = self.__turn_vehicles()
+                continue
+
+            vehicle = queue.pop(0)
+            if self.nodes["first_child"][node] == NO_NODE:
+                self.__expand(node, vehicle)
+            node = self.__select_child(node)
+            self.__apply(int(self.nodes["action"][node]))
+            path.append(node)
+            if self.nodes["visits"][node] == 0:
+                break
+
+        self.__backpropagate(np.array(path), self.__playout(queue))
+
+    def __turn_vehicles(self) -> list[Vehicle]:
+        return [
+            vehicle
+            for vehicle in self.__simulation.current_player.ordered_vehicle_iter
+            if vehicle.hp > 0
+        ]
+
+    def __children(self, node: int) -> range:
+        first = int(self.nodes["first_child"][node])
+        if first == NO_NODE:
+            return range(0)
+        return range(first, first + int(self.nodes["children_count"][node]))
+
+    def __best_actions(self, vehicle: Vehicle) -> list[Action]:
+        """
+        Returns vehicle's actions including idle one sorted from the best.
+
+        """
+        actions = self.__actions_generator(vehicle)
+        actions.append(Action(ActionCode.MOVE, vehicle, vehicle.position))
+        scores = self.__estimator.score_batch(actions)
+        # Sort by action score first, than SHOOT actions have higher priority
+        order = np.lexsort(
+            (np.array([-action.action_code for action in actions]), scores)
+        )
+        return [actions[i] for i in order]
+
+    def __expand(self, node: int, vehicle: Vehicle) -> None:
+        actions = self.__best_actions(vehicle)[:MAX_CHILDREN]
+        first = self.__allocate(len(actions))
+        children = self.nodes[slice(first, first + len(actions))]
+        children["parent"] = node
+        children["first_child"] = NO_NODE
+        children["children_count"] = 0
+        children["player"] = vehicle.player_id
+        children["visits"] = 0
+        children["value"] = 0.0
+        children["action"] = [
+            encode_action(action, self.__simulation.game_map.grid)
+            for action in actions
+        ]
+        self.nodes["first_child"][node] = first
+        self.nodes["children_count"][node] = len(actions)
+
+    def __select_child(self, node: int) -> int:
+        children = self.__children(node)
+        block = slice(children.start, children.stop)
+        visits = self.nodes["visits"][block]
+        unvisited = np.flatnonzero(visits == 0)
+        if unvisited.size:
+            return children.start + int(unvisited[0])
+
+        uct = self.nodes["value"][block] / visits + self.exploration * np.sqrt(
+            math.log(self.nodes["visits"][node]) / visits
+        )
+        return children.start + int(np.argmax(uct))
+
+    def __apply(self, code: int) -> None:
+        action = decode_action(code, self.__simulation)
+        if not is_idle(action):
+            self.__simulation.update_from_action(action)
+
+    def __playout(self, queue: list[Vehicle]) -> np.ndarray:
+        """
+        Continues the game from the current simulation state.
+
+        :param queue: vehicles of the current player that haven't acted
+        :return: reward of every player indexed by player id
+        """
+        simulation = self.__simulation
+        turns_left = self.playout_turns or len(self.__players_ids)
+        while not simulation.finished:
+            if not queue:
+                turns_left -= 1
+                simulation.end_turn()
+                if turns_left <= 0:
+                    break
+                queue = self.__turn_vehicles()
+                continue
+
+            vehicle = queue.pop(0)
+            if self.__random.random() < PLAYOUT_EPSILON:
+                actions = self.__actions_generator(vehicle)
+                action = self.__random.choice(actions) if actions else None
+            else:
+                action = self.__best_actions(vehicle)[0]
+            if action is not None and not is_idle(action):
+                simulation.update_from_action(action)
+
+        return self.__get_rewards()
+
+    def __get_rewards(self) -> np.ndarray:
+        simulation = self.__simulation
+        rewards = self.__rewards
+        rewards.fill(0.0)
+        if simulation.finished:
+            if simulation.winner is None:
+                rewards[self.__players_ids] = 0.5
+            else:
+                rewards[simulation.winner.idx] = 1.0
+            return rewards
+
+        points = np.array(
+            [
+                simulation.players[idx].win_points["capture"] * CAPTURE_POINT_WEIGHT
+                + simulation.players[idx].win_points["kill"]
+                for idx in self.__players_ids
+            ],
+            dtype=float,
+        )
+        spread = points.max() - points.min()
+        rewards[self.__players_ids] = (
+            (points - points.min()) / spread if spread else 0.5
+        )
+        return rewards
+
+    def __backpropagate(self, path: np.ndarray, rewards: np.ndarray) -> None:
+        self.nodes["visits"][path] += 1
+        # Root has no action, its value isn't used
+        self.nodes["value"][path[1:]] += rewards[self.nodes["player"][path[1:]]]
+
+    def __allocate(self, count: int) -> int:
+        first = self.size
+        if first + count > len(self.nodes):
+            nodes = np.zeros(max(2 * len(self.nodes), first + count), dtype=NODE_DTYPE)
+            nodes[:first] = self.nodes[:first]
+            self.nodes = nodes
+        self.size += count
+        return first
+
+    def __find_node(self, data: GameStateDictTyping) -> Optional[int]:
+        """
+        Returns node with the game state or None if there is no such node.
+
+        """
+        if self.__root_data is None:
+            return None
+
+        observed = {
+            int(vehicle_id): vehicle for vehicle_id, vehicle in data["vehicles"].items()
+        }
+        simulation = self.__simulation
+        simulation.update(self.__root_data)
+        queue = self.__turn_vehicles()
+        node = ROOT
+        while simulation.current_turn < data["current_turn"]:
+            if simulation.finished:
+                return None
+            if not queue:
+                simulation.end_turn()
+                queue = self.__turn_vehicles()
+                continue
+
+            node = self.__find_child(node, queue.pop(0), observed)
+            if node is None:
+                return None
+            self.__apply(int(self.nodes["action"][node]))
+
+        if simulation.current_player.idx != data["current_player_idx"] or any(
+            vehicle.position != Coords(observed[vehicle.vehicle_id]["position"])
+            or vehicle.hp != observed[vehicle.vehicle_id]["health"]
+            or vehicle.capture_points != observed[vehicle.vehicle_id]["capture_points"]
+            for vehicle in simulation.vehicles_by_id.values()
+        ):
+            return None
+        return node
+
+    def __find_child(
+        self, node: int, vehicle: Vehicle, observed: dict[int, dict]
+    ) -> Optional[int]:
+        """
+        Returns child with action of the vehicle consistent with observed
+        vehicles: move to its observed position, shoot at vehicles with
+        changed health or staying idle.
+
+        """
+        position = Coords(observed[vehicle.vehicle_id]["position"])
+        idle_child = None
+        shoot_child = None
+        for child in self.__children(node):
+            action = decode_action(int(self.nodes["action"][child]), self.__simulation)
+            if is_idle(action):
+                idle_child = child
+            elif action.action_code == ActionCode.MOVE:
+                if action.target == position:
+                    return child
+            elif shoot_child is None and all(
+                affected.hp != observed[affected.vehicle_id]["health"]
+                for affected in action.affected_vehicles
+            ):
+                shoot_child = child
+
+        if position != vehicle.position:
+            return None
+        return idle_child if shoot_child is None else shoot_child
+
+    def __reroot(self, node: int) -> None:
+        """
+        Moves subtree of the node to the start of the array, node becomes root.
+
+        """
+        old_nodes = [node]
+        first_children = []
+        for old_node in old_nodes:
+            children = self.__children(old_node)
+            first_children.append(len(old_nodes) if children else NO_NODE)
+            old_nodes.extend(children)
+
+        size = len(old_nodes)
+        nodes = np.zeros(max(INITIAL_CAPACITY, 2 * size), dtype=NODE_DTYPE)
+        nodes[:size] = self.nodes[old_nodes]
+        nodes["first_child"][:size] = first_children
+        nodes["parent"][ROOT] = NO_NODE
+        for new_node, first in enumerate(first_children):
+            if first != NO_NODE:
+                count = nodes["children_count"][new_node]
+                nodes["parent"][slice(first, first + count)] = new_node
+        self.nodes = nodes
+        self.size = size
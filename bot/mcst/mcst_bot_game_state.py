@@ -1,77 +1,319 @@
 """
 Contains game state class for MCST bot
 """
+from typing import Optional
+
+from bot.actions_generator import ActionsGenerator
 from bot.bot_game_state import BotGameState
-# pylint: skip-file
-# Still work in progress
 from game_client.actions import Action
+from game_client.game_state import StateChanges
 from game_client.map_hexes import Base, Catapult, HardRepair, LightRepair
+from game_client.player import Player
 from game_client.server_interaction import ActionCode
-from utility.custom_typings import MapDictTyping
+from game_client.vehicles import VEHICLE_CLASSES, Vehicle
+from utility.coordinates import Coords
+from utility.custom_typings import (GameStateDictTyping, MapDictTyping,
+                                    PlayerDictTyping, VehicleDictTyping)
+
+CAPTURE_POINTS_TO_WIN = 5
+# Base can't be captured if there are vehicles of more players on it
+MAX_PLAYERS_ON_BASE = 2
+
+VEHICLE_TYPES = {klass: name for name, klass in VEHICLE_CLASSES.items()}
+
+
+def initial_game_state(
+    game_map: MapDictTyping, players: list[PlayerDictTyping], num_turns: int
+) -> GameStateDictTyping:
+    """
+    Creates GAME_STATE of a new game with vehicles on their spawn points.
+
+    :param game_map: MAP response from the server
+    :param players: players in turns order, map must have spawn points
+        for every player
+    :param num_turns: number of game turns to be played
+    :return: game state in server format
+    """
+    vehicles: dict[str, VehicleDictTyping] = {}
+    for player, spawn_points in zip(players, game_map["spawn_points"]):
+        for vehicle_type, positions in spawn_points.items():
+            for position in positions:
+                vehicle: VehicleDictTyping = {
+                    "player_id": player["idx"],
+                    "vehicle_type": vehicle_type,
+                    "health": 0,
+                    "spawn_position": position,
+                    "position": position,
+                    "capture_points": 0,
+                    "shoot_range_bonus": 0,
+                }
+                vehicle["health"] = VEHICLE_CLASSES[vehicle_type](0, vehicle).max_hp
+                vehicles[str(len(vehicles) + 1)] = vehicle
+
+    return {
+        "num_players": len(players),
+        "num_turns": num_turns,
+        "current_turn": 0,
+        "players": players,
+        "observers": [],
+        "current_player_idx": players[0]["idx"],
+        "finished": False,
+        "vehicles": vehicles,
+        "attack_matrix": {str(player["idx"]): [] for player in players},
+        "winner": None,
+        "win_points": {
+            str(player["idx"]): {"capture": 0, "kill": 0} for player in players
+        },
+        "catapult_usage": [],
+    }
 
 
 class MCSTBotGameState(BotGameState):
     """
     Game state that can fully simulate the game.
 
+    Applies vehicles' actions and resolves the end of the turn (TURN
+    action or end_turn method) the same way the server does:
+    respawns destroyed vehicles of the next player, repairs vehicles,
+    gives catapult bonuses, counts capture points, updates attack
+    matrix and finishes the game. Can be converted back to the server
+    format with to_dict.
     """
 
+    # pylint: disable=too-many-instance-attributes
+    # Nine is reasonable in this case.
     def __init__(self, game_map: MapDictTyping):
         super().__init__(game_map)
+        self.attack_matrix: dict[int, set[int]] = {}
+        self.catapult_usages: list[Coords] = []
+        self.__acted_vehicles: set[int] = set()
+        self.__simulation_undo_log: list[tuple[set[int], list[int], set[int]]] = []
+        self.__actions_generator = ActionsGenerator(self)
+
+    def update(self, data: GameStateDictTyping) -> StateChanges:
+        self.attack_matrix = {
+            int(player_id): set(attacked)
+            for player_id, attacked in data["attack_matrix"].items()
+        }
+        self.catapult_usages = [Coords(usage) for usage in data["catapult_usage"]]
+        self.__acted_vehicles.clear()
+        self.__simulation_undo_log.clear()
+        return super().update(data)
 
     def update_from_action(self, action: Action) -> None:
-        if action.action_code == ActionCode.MOVE:
-            self.__apply_move_action(action)
+        if action.action_code == ActionCode.TURN:
+            self.end_turn()
+            return
 
+        super().update_from_action(action)
+        self.__acted_vehicles.add(action.actor.vehicle_id)
         if action.action_code == ActionCode.SHOOT:
-            self.__apply_shoot_action(action)
+            for vehicle in action.affected_vehicles:
+                self.attack_matrix[action.actor.player_id].add(vehicle.player_id)
+                vehicle.capture_points = 0
 
+    def push_action(self, action: Action) -> None:
         if action.action_code == ActionCode.TURN:
-            self.__apply_turn_action()
+            raise ValueError("TURN action can't be reverted")
+
+        self.__simulation_undo_log.append(
+            (
+                set(self.attack_matrix[action.actor.player_id]),
+                [vehicle.capture_points for vehicle in action.affected_vehicles],
+                set(self.__acted_vehicles),
+            )
+        )
+        super().push_action(action)
+
+    def pop_action(self) -> Action:
+        action = super().pop_action()
+        attacked, capture_points, acted_vehicles = self.__simulation_undo_log.pop()
+        self.attack_matrix[action.actor.player_id] = attacked
+        for vehicle, points in zip(action.affected_vehicles, capture_points):
+            vehicle.capture_points = points
+        self.__acted_vehicles = acted_vehicles
+        return action
+
+    def get_action(
+        self, action_code: ActionCode, vehicle_id: int, target: Coords
+    ) -> Optional[Action]:
+        """
+        Creates action from the request if it is valid for the current player.
+
+        :param action_code: MOVE or SHOOT
+        :param vehicle_id: id of the acting vehicle
+        :param target: target hex
+        :return: action with affected vehicles or None if action is not valid
+        """
+        actor = self.vehicles_by_id.get(vehicle_id)
+        if actor is None or self.finished:
+            return None
+        if (
+            actor.player_id != self.current_player.idx
+            or actor.vehicle_id in self.__acted_vehicles
+            or actor.hp <= 0
+            or not self.game_map.are_valid_coords(target)
+        ):
+            return None
+
+        if action_code == ActionCode.MOVE:
+            if self.can_move(actor, target):
+                return Action(ActionCode.MOVE, actor, target)
+            return None
 
-    def __apply_turn_action(self) -> None:
-        self.__turn_update_vehicles()
-        kill_points_sum = {}
-        capture_points_sum = {}
-        for player in self.players.values():
+        if action_code == ActionCode.SHOOT:
+            for action in self.__actions_generator(actor):
+                if action.action_code == ActionCode.SHOOT and action.target == target:
+                    return action
+
+        return None
+
+    def end_turn(self) -> None:
+        """
+        Resolves the end of the current player's turn and passes the turn.
+
+        """
+        if self.finished:
+            return
+
+        self.__turn_update_vehicles(self.current_player)
+        for player in self.__active_players:
             player.win_points["capture"] = sum(
-                v.capture_points for v in player.vehicles
+                vehicle.capture_points for vehicle in player.vehicles
             )
-            capture_points_sum[player.idx] = player.win_points["capture"]
-            kill_points_sum[player.idx] = player.win_points["kill"]
 
-        players_with_max_capture_points = [
-            player for player in capture_points_sum if capture_points_sum[player] >= 5
+        winners = [
+            player
+            for player in self.__active_players
+            if player.win_points["capture"] >= CAPTURE_POINTS_TO_WIN
+        ]
+        self.current_turn += 1
+        if winners:
+            self.__finish(winners)
+        elif self.current_turn >= self.num_turns:
+            self.__finish(self.__active_players)
+
+        players = self.__active_players
+        self.current_player = players[
+            (players.index(self.current_player) + 1) % len(players)
+        ]
+        # Attacks made by the player during his previous turn expire
+        self.attack_matrix[self.current_player.idx] = set()
+        self._update_attack_matrix(self.__attack_matrix_server_format)
+
+        if not self.finished:
+            self.__respawn_vehicles(self.current_player)
+        self.__acted_vehicles.clear()
+        self._invalidate_caches()
+        self.__simulation_undo_log.clear()
+
+    def to_dict(self) -> GameStateDictTyping:
+        """
+        Converts game state to the server GAME_STATE format.
+
+        """
+        players = self.__active_players
+        return {
+            "num_players": len(players),
+            "num_turns": self.num_turns,
+            "current_turn": self.current_turn,
+            "players": [
+                {"idx": player.idx, "name": player.name, "is_observer": False}
+                for player in players
+            ],
+            "observers": [],
+            "current_player_idx": self.current_player.idx,
+            "finished": self.finished,
+            "vehicles": {
+                str(vehicle.vehicle_id): self.__vehicle_server_format(vehicle)
+                for vehicle in self.vehicles_by_id.values()
+            },
+            "attack_matrix": self.__attack_matrix_server_format,
+            "winner": None if self.winner is None else self.winner.idx,
+            "win_points": {
+                str(player.idx): dict(player.win_points) for player in players
+            },
+            "catapult_usage": [usage.server_format for usage in self.catapult_usages],
+        }
+
+    @property
+    def __active_players(self) -> list[Player]:
+        return [player for player in self.players.values() if not player.is_observer]
+
+    @property
+    def __attack_matrix_server_format(self) -> dict[str, list[int]]:
+        return {
+            str(player_id): sorted(attacked)
+            for player_id, attacked in self.attack_matrix.items()
+        }
+
+    @staticmethod
+    def __vehicle_server_format(vehicle: Vehicle) -> VehicleDictTyping:
+        return {
+            "player_id": vehicle.player_id,
+            "vehicle_type": VEHICLE_TYPES[type(vehicle)],
+            "health": vehicle.hp,
+            "spawn_position": vehicle.spawn_position.server_format,
+            "position": vehicle.position.server_format,
+            "capture_points": vehicle.capture_points,
+            "shoot_range_bonus": vehicle.shoot_range_bonus,
+        }
+
+    def __finish(self, candidates: list[Player]) -> None:
+        """
+        Finishes the game, the winner is the candidate with the most
+        capture points and then kill points, draw if there is no such one.
+
+        """
+        self.finished = True
+        best = max(
+            (player.win_points["capture"], player.win_points["kill"])
+            for player in candidates
+        )
+        leaders = [
+            player
+            for player in candidates
+            if (player.win_points["capture"], player.win_points["kill"]) == best
         ]
-        if len(players_with_max_capture_points) > 1:
-            self.winner = self.players[
-                max(kill_points_sum, key=lambda i: kill_points_sum[i])
-            ]
-
-    def __turn_update_vehicles(self) -> None:
-        for vehicle in self.vehicles.values():
-            gshex = self.get_hex(vehicle.position)
-            player = self.players[vehicle.player_id]
-            map_hex_type = type(gshex.map_hex)
-
-            # Send back to spawn
+        self.winner = leaders[0] if len(leaders) == 1 else None
+
+    def __turn_update_vehicles(self, player: Player) -> None:
+        players_on_base = {
+            vehicle.player_id
+            for vehicle in self.vehicles_by_id.values()
+            if vehicle.hp > 0 and isinstance(self.game_map[vehicle.position], Base)
+        }
+
+        for vehicle in player.vehicles:
+            map_hex = self.game_map[vehicle.position]
             if vehicle.hp <= 0:
-                self.__update_vehicle_pos(vehicle, vehicle.spawn_position)
-                vehicle.hp = vehicle.max_hp
+                continue
 
             # Repair vehicle
-            elif map_hex_type in (LightRepair, HardRepair):
-                if vehicle.__class__ in gshex.map_hex.served_classes:
+            if isinstance(map_hex, (LightRepair, HardRepair)):
+                if isinstance(vehicle, map_hex.served_classes):
                     vehicle.hp = vehicle.max_hp
 
             # Apply shooting range bonus
-            elif map_hex_type is Catapult:
-                vehicle.shoot_range_bonus = gshex.map_hex.use()
+            elif isinstance(map_hex, Catapult) and vehicle.shoot_range_bonus == 0:
+                vehicle.shoot_range_bonus = self.game_map.use_bonus(vehicle.position)
+                if vehicle.shoot_range_bonus:
+                    self.catapult_usages.append(vehicle.position)
 
             # Add/remove capture points
-            if map_hex_type is Base:
+            if (
+                isinstance(map_hex, Base)
+                and len(players_on_base) <= MAX_PLAYERS_ON_BASE
+            ):
                 vehicle.capture_points += 1
-                player.win_points["capture"] += 1
-            else:
+            elif not isinstance(map_hex, Base):
                 vehicle.capture_points = 0
-                player.win_points["capture"] -= vehicle.capture_points
+
+    def __respawn_vehicles(self, player: Player) -> None:
+        for vehicle in player.vehicles:
+            if vehicle.hp > 0:
+                continue
+            self._move_vehicle(vehicle, vehicle.spawn_position)
+            vehicle.hp = vehicle.max_hp
+            vehicle.capture_points = 0
+            vehicle.shoot_range_bonus = 0
@@ -1,95 +1,172 @@
-import time
-from multiprocessing import Pool
-from os import cpu_count
-from queue import Queue
+"""
+Contains bot choosing actions with Monte-Carlo tree search.
 
+"""
+import multiprocessing
+from multiprocessing.connection import Connection
+from typing import Optional
+
+import numpy as np
+
+from bot.action_estimator import ActionEstimator
+from bot.actions_generator import ActionsGenerator
 from bot.bot import Bot
-from bot.mcst.mcst import (MCSTNode, MonteCarloSearchTree,
-                           action_to_bytestring, bytestr_to_action)
+from bot.mcst.mcst import (MonteCarloSearchTree, SearchStatistics, choose_path,
+                           is_idle, merge_statistics)
 from bot.mcst.mcst_bot_game_state import MCSTBotGameState
-# pylint: skip-file
-# Still work in progress
+from bot.step_score_bot import OPTIMAL_WEIGHTS
+from game_client.action_codec import decode_action
 from game_client.actions import Action
+from game_client.server_interaction import ActionCode
+from utility.custom_typings import GameStateDictTyping, MapDictTyping
+
+# (game state, depth of statistics, iterations, time limit)
+SearchRequestTyping = tuple[GameStateDictTyping, int, Optional[int], Optional[float]]
+
+
+def _search(
+    tree: MonteCarloSearchTree, request: SearchRequestTyping
+) -> SearchStatistics:
+    data, depth, iterations, time_limit = request
+    tree.advance_tree(data)
+    tree.search(iterations, time_limit)
+    return tree.statistics(depth)
+
+
+def _worker_main(
+    connection: Connection, game_map: MapDictTyping, seed: Optional[int], options
+) -> None:
+    """
+    Keeps the tree between requests and answers them with statistics.
+
+    Stops when None is received.
+    """
+    tree = MonteCarloSearchTree(game_map, seed=seed, **options)
+    while True:
+        request = connection.recv()
+        if request is None:
+            break
+        connection.send(_search(tree, request))
+    connection.close()
 
 
-# TODO: async
 class MCTSBot(Bot):
-    def __init__(self, game_map, simulation_bot: Bot, time_limit):
-        super().__init__(game_map)
-        self.simulation_bot = simulation_bot
+    """
+    Bot choosing actions with Monte-Carlo tree search.
+
+    Every turn the tree is searched for time_limit seconds or for the
+    given amount of iterations, then the most visited action is taken
+    for every vehicle of the current player. Vehicles the search hasn't
+    reached take the best action by ActionEstimator.
+
+    With workers > 1 search is root-parallel: every worker process keeps
+    its own tree with its own seed, statistics of the current player's
+    turn are merged before choosing actions. Trees are kept between turns
+    and advance_tree reuses the subtree of the new game state.
+
+    Use close method or with statement to stop worker processes.
+    """
+
+    # pylint: disable=too-many-arguments
+    # Search options are keyword-only
+    def __init__(
+        self,
+        game_map: MapDictTyping,
+        *,
+        time_limit: Optional[float] = 1.0,
+        iterations: Optional[int] = None,
+        workers: int = 1,
+        seed: Optional[int] = None,
+        **tree_options,
+    ):
+        """
+        :param time_limit: seconds for the search every turn
+        :param iterations: amount of search iterations every turn
+        :param workers: amount of processes searching in parallel,
+            search runs in the current process if 1
+        :param seed: seed of the first tree, next trees get next seeds
+        :param tree_options: MonteCarloSearchTree parameters
+        """
+        super().__init__(game_map, MCSTBotGameState)
         self.time_limit = time_limit
-        self.tree: MonteCarloSearchTree = MonteCarloSearchTree(None, simulation_bot)
-        self.queue = Queue(maxsize=cpu_count())
-        self.pool = Pool(initializer=self.__worker)
-        self.produce = False
-
-    def __worker(self):
-        while True:
-            task = self.queue.get()
-            task()
-
-    def __producer(self):
-        while self.produce:
-            self.queue.put(item=self.__research_node)
-
-    def start_researching(self):
-        self.produce = True
-        self.queue.put(self.__producer())
-
-    def stop_researching(self):
-        self.produce = False
-
-    def get_actions(self, game_state: MCSTBotGameState, previous_actions=None):
-        if previous_actions is not None:
-            self.advance_tree(previous_actions)
-
-        if self.tree.root is None:
-            self.tree.game_state = game_state
-            self.tree.root = MCSTNode(None, bytes())
-        if self.tree.game_state != game_state:
-            pass
-            # TODO: exception
-
-        single_vehicle_time_limit = self.time_limit / len(
-            list(game_state.current_player.ordered_vehicle_iter)
-        )
-
+        self.iterations = iterations
+        self.actions_generator = ActionsGenerator(self.game_state)
+        self.action_estimator = ActionEstimator(self.game_state, OPTIMAL_WEIGHTS)
+        self.tree: Optional[MonteCarloSearchTree] = None
+        self.__workers: list[tuple[multiprocessing.Process, Connection]] = []
+
+        if workers == 1:
+            self.tree = MonteCarloSearchTree(game_map, seed=seed, **tree_options)
+            return
+        for worker in range(workers):
+            connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_worker_main,
+                args=(
+                    worker_connection,
+                    game_map,
+                    None if seed is None else seed + worker,
+                    tree_options,
+                ),
+                daemon=True,
+            )
+            process.start()
+            worker_connection.close()
+            self.__workers.append((process, connection))
+
+    def get_actions(self, game_state: GameStateDictTyping) -> list[Action]:
+        self.game_state.update(game_state)
+        vehicles = [
+            vehicle
+            for vehicle in self.game_state.current_player.ordered_vehicle_iter
+            if vehicle.hp > 0
+        ]
+        request = (game_state, len(vehicles), self.iterations, self.time_limit)
+        if self.tree is not None:
+            statistics = _search(self.tree, request)
+        else:
+            for _, connection in self.__workers:
+                connection.send(request)
+            statistics = merge_statistics(
+                connection.recv() for _, connection in self.__workers
+            )
+
+        path = choose_path(statistics)
         actions: list[Action] = []
-        for vehicle in self.tree.game_state.current_player.ordered_vehicle_iter:
-            action = self.__get_action(vehicle, single_vehicle_time_limit)
-            self.__advance_tree(action)
-            actions.append(bytestr_to_action(action, game_state))
+        for index, vehicle in enumerate(vehicles):
+            if index < len(path):
+                action = decode_action(path[index], self.game_state)
+            else:
+                action = self.__get_best_action(vehicle)
+            # No need to apply and send idle action
+            if not is_idle(action):
+                self.game_state.update_from_action(action)
+                actions.append(action)
         return actions
 
-    def __get_action(self, actor, time_limit):
-        end_time = time.time_ns() + time_limit
-        while time.time_ns() < end_time:
-            self.queue.put(item=self.__research_node)
-
-        recommended_action_node = max(
-            self.tree.root.children(), key=lambda node: node.am_visited
+    def close(self) -> None:
+        """
+        Stops worker processes.
+
+        """
+        for process, connection in self.__workers:
+            connection.send(None)
+            connection.close()
+            process.join()
+        self.__workers.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __get_best_action(self, vehicle) -> Action:
+        actions = self.actions_generator(vehicle)
+        actions.append(Action(ActionCode.MOVE, vehicle, vehicle.position))
+        scores = self.action_estimator.score_batch(actions)
+        # The best score first, than SHOOT actions have higher priority
+        order = np.lexsort(
+            (np.array([-action.action_code for action in actions]), scores)
         )
-        return recommended_action_node.action
-
-    def __research_node(self):
-        node, game_state = self.tree.selection()
-        if not game_state.finished:
-            node, game_state = self.tree.expansion(game_state, node)
-        winner_id = self.tree.playout(game_state)
-        self.tree.backpropagation(node, winner_id)
-
-    def advance_tree(self, actions: list[Action], game_state: MCSTBotGameState):
-        for action in actions:
-            game_state.update_from_action(action)
-            bytestr_action = action_to_bytestring(action, game_state)
-            self.__advance_tree(bytestr_action)
-            if self.tree.root is None:
-                break
-
-    def __advance_tree(self, action: bytearray):
-        new_root = None
-        for node in self.tree.root.children():
-            if node.action == action:
-                new_root = node
-                break
-        self.tree.root = new_root
+        return actions[int(order[0])]
@@ -3,8 +3,12 @@ Contains class for the bot that uses action estimation for picking action.
 
 """
 
+from math import inf
+from time import perf_counter
 from typing import Optional
 
+import numpy as np
+
 from bot.action_estimator import ActionEstimator
 from bot.actions_generator import ActionsGenerator
 from bot.bot import Bot
@@ -13,6 +17,7 @@ from game_client.actions import Action
 from game_client.server_interaction import ActionCode
 from game_client.vehicles import Vehicle
 from utility.custom_typings import GameStateDictTyping, MapDictTyping
+from utility.profiler import profiler
 
 OPTIMAL_WEIGHTS = [
     -12.072961908374216,
@@ -23,58 +28,238 @@ OPTIMAL_WEIGHTS = [
 ]
 
 
+# Amount of the best alternative actions tried for every vehicle
+# during refinement in anytime mode
+REFINEMENT_CANDIDATES = 3
+
+# Planned action of the vehicle (None for staying idle) with its score
+PlanTyping = list[tuple[Optional[Action], float]]
+
+
 # pylint: disable=too-few-public-methods
 # Only one method is needed here
 class StepScoreBot(Bot):
     """
     Bot that uses formula to choose actions.
 
+    Vehicles act in the step order, every vehicle picks the action with
+    the best score in the game state changed by the previous vehicles.
+
+    With beam_width greater than one, beam_width partial plans with the
+    best total score are kept after every vehicle instead of the single
+    greedy one, so vehicles can coordinate, e.g. focus fire or not block
+    each other. If time runs out during the search, the best partial plan
+    is completed greedily.
+
+    If time_budget is set, the bot works in anytime mode: the greedy plan
+    is refined until the plan stops improving or time runs out. For every
+    vehicle the best alternative actions are tried, each followed by
+    greedy actions of the next vehicles, and the alternative replaces
+    the planned action if the plan's total score gets better. The best
+    plan found by the deadline is returned, so the greedy plan is
+    returned even if there is no time for refinement.
+
     :param self.game_state: BotGameState object
     """
 
+    # pylint: disable=too-many-arguments
+    # Search options are keyword-only
     def __init__(
         self,
         game_map: MapDictTyping,
         estimator_weights=None,
         estimator_class=ActionEstimator,
         game_state_class=BotGameState,
+        *,
+        time_budget: Optional[float] = None,
+        beam_width: int = 1,
     ):
+        """
+        :param time_budget: seconds for get_actions call, if None,
+            greedy plan is returned without refinement
+        :param beam_width: amount of partial plans kept by beam search,
+            1 for the greedy plan
+        """
         super().__init__(game_map, game_state_class)
         if estimator_weights is None:
             estimator_weights = OPTIMAL_WEIGHTS
+        self.time_budget = time_budget
+        self.beam_width = beam_width
         self.actions_generator = ActionsGenerator(self.game_state)
         self.action_estimator: ActionEstimator = estimator_class(
             self.game_state, estimator_weights
         )
 
     def get_actions(self, game_state: GameStateDictTyping) -> list[Action]:
-        actions: list[Action] = []
-
+        deadline = inf
+        if self.time_budget is not None:
+            deadline = perf_counter() + self.time_budget
         self.game_state.update(game_state)
-        for vehicle in self.game_state.current_player.ordered_vehicle_iter:
-            action = self.__get_action(vehicle)
-            if action is not None:
-                self.game_state.update_from_action(action)
-                actions.append(action)
+        vehicles = list(self.game_state.current_player.ordered_vehicle_iter)
+        plan: PlanTyping = []
+        if self.beam_width > 1:
+            with profiler.measure("bot.beam_search"):
+                plan = self.__beam_search(vehicles, deadline)
+        self.__complete_plan(vehicles, plan)
+        if self.time_budget is not None:
+            with profiler.measure("bot.refinement"):
+                self.__refine_plan(vehicles, plan, deadline)
+
+        # Game state is left updated with the planned actions
+        return [action for action, _ in plan if action is not None]
+
+    def __complete_plan(
+        self, vehicles: list[Vehicle], plan: PlanTyping, deadline: float = inf
+    ) -> bool:
+        """
+        Extends the plan with greedy actions of the rest of the vehicles.
+
+        Game state must be updated with the plan's actions, actions
+        added to the plan are applied to it with push_action.
+
+        :return: False if the deadline was reached and the plan is partial
+        """
+        while len(plan) < len(vehicles):
+            if perf_counter() >= deadline:
+                return False
+            vehicle = vehicles[len(plan)]
+            with profiler.measure(f"bot.vehicle.{vehicle.__class__.__name__}"):
+                actions, scores = self.__get_possible_actions(vehicle)
+                self.__push(plan, actions[0], scores[0])
+        return True
 
-        return actions
+    def __beam_search(self, vehicles: list[Vehicle], deadline: float) -> PlanTyping:
+        """
+        Returns the best plan found by beam search, game state is updated with it.
+
+        Plan is partial if the deadline was reached.
+        """
+        beam: list[PlanTyping] = [[]]
+        for vehicle in vehicles:
+            if perf_counter() >= deadline:
+                break
+            # (total score, SHOOT priority, plan index, action, score)
+            candidates = []
+            for plan_index, plan in enumerate(beam):
+                replayed: PlanTyping = []
+                for action, score in plan:
+                    self.__push(replayed, action, score)
+                total = sum(score for _, score in plan)
+                actions, scores = self.__get_possible_actions(vehicle)
+                for action, score in zip(
+                    actions[: self.beam_width], scores[: self.beam_width]
+                ):
+                    candidates.append(
+                        (
+                            total + score,
+                            -action.action_code,
+                            plan_index,
+                            None if self.__is_idle(action) else action,
+                            float(score),
+                        )
+                    )
+                self.__rewind(replayed, 0)
+
+            candidates.sort(key=lambda candidate: candidate[:3])
+            beam = [
+                beam[plan_index] + [(action, score)]
+                for _, _, plan_index, action, score in candidates[: self.beam_width]
+            ]
+
+        plan: PlanTyping = []
+        for action, score in beam[0]:
+            self.__push(plan, action, score)
+        return plan
+
+    def __refine_plan(
+        self, vehicles: list[Vehicle], plan: PlanTyping, deadline: float
+    ) -> None:
+        """
+        Replaces actions of the plan with better alternatives until deadline.
+
+        Alternative whose greedy completion is interrupted by the deadline
+        is discarded, so the returned plan is always complete.
+        """
+        improved = True
+        while improved:
+            improved = False
+            # Greedy action of the last vehicle is the best already
+            for index in range(len(vehicles) - 1):
+                if perf_counter() >= deadline:
+                    return
+                self.__rewind(plan, index)
+                tail = plan[index:]
+                del plan[index:]
+                actions, scores = self.__get_possible_actions(vehicles[index])
+                for action, score in zip(
+                    actions[:REFINEMENT_CANDIDATES], scores[:REFINEMENT_CANDIDATES]
+                ):
+                    if perf_counter() >= deadline:
+                        break
+                    planned_action = tail[0][0]
+                    if action == planned_action or (
+                        planned_action is None and self.__is_idle(action)
+                    ):
+                        continue
+                    self.__push(plan, action, score)
+                    # Partial plan can't be compared with the planned one
+                    completed = self.__complete_plan(vehicles, plan, deadline)
+                    if completed and sum(score for _, score in plan[index:]) < sum(
+                        score for _, score in tail
+                    ):
+                        tail = plan[index:]
+                        improved = True
+                    self.__rewind(plan, index)
+                    del plan[index:]
+                    if not completed:
+                        break
+
+                for action, score in tail:
+                    self.__push(plan, action, score)
+
+    @staticmethod
+    def __is_idle(action: Action) -> bool:
+        return (
+            action.action_code == ActionCode.MOVE
+            and action.target == action.actor.position
+        )
+
+    def __push(self, plan: PlanTyping, action: Optional[Action], score: float) -> None:
+        """
+        Adds action to the plan and applies it to the game state.
+
+        """
+        # No need to apply and send action if it is idle
+        if action is None or self.__is_idle(action):
+            plan.append((None, float(score)))
+        else:
+            self.game_state.push_action(action)
+            plan.append((action, float(score)))
+
+    def __rewind(self, plan: PlanTyping, index: int) -> None:
+        """
+        Reverts actions of the plan starting with the given index.
+
+        """
+        for action, _ in reversed(plan[index:]):
+            if action is not None:
+                self.game_state.pop_action()
 
-    def __get_action(self, vehicle: Vehicle) -> Optional[Action]:
-        possible_actions = self.__get_possible_actions(vehicle)
-        idle_action = Action(ActionCode.MOVE, vehicle, vehicle.position)
-        # No need to send action if it is idle
-        if possible_actions[0] != idle_action:
-            return possible_actions[0]
-        return None
+    def __get_possible_actions(
+        self, actor: Vehicle
+    ) -> tuple[list[Action], np.ndarray]:
+        """
+        Returns actor's actions including idle one sorted from the best
+        and their scores.
 
-    def __get_possible_actions(self, actor: Vehicle) -> list[Action]:
+        """
         actions = self.actions_generator(actor)
         idle_action = Action(ActionCode.MOVE, actor, actor.position)
         actions.append(idle_action)
+        scores = self.action_estimator.score_batch(actions)
         # Sort by action score first, than SHOOT actions have higher priority
-        actions.sort(
-            key=lambda x: (self.action_estimator(x), -x.action_code),
-            reverse=False
+        order = np.lexsort(
+            (np.array([-action.action_code for action in actions]), scores)
         )
 
-        return actions
+        return [actions[i] for i in order], scores[order]
@@ -0,0 +1,105 @@
+"""
+Contains class to keep track of damage enemies can deal to every hex.
+
+"""
+from array import array
+
+from game_client.game_state import GameState
+from game_client.map import CAN_SHOOT_THROUGH
+from game_client.vehicles import AtSpg, Vehicle
+
+
+class ThreatMap:
+    """
+    Keeps total damage that can be dealt to every hex for every player.
+
+    Damage dealt to player's vehicle on the hex is the sum of damages
+    of alive vehicles that have the hex in their shoot range and whose
+    owners can attack the player. Obstacles are taken into account for
+    AtSpg, other vehicles never block shots.
+
+    Contributions of every vehicle are stored, so the map is updated
+    incrementally with update_vehicle when a vehicle moves, shoots
+    or receives damage.
+    """
+
+    def __init__(self, game_state: GameState):
+        self.game_state = game_state
+        self.__damage: dict[int, array] = {}
+        # vehicle id -> (hexes in shoot range, attacked players ids, damage)
+        self.__contributions: dict[int, tuple[tuple[int, ...], list[int], int]] = {}
+
+    def rebuild(self) -> None:
+        """
+        Recalculates the map from scratch.
+
+        """
+        grid_size = len(self.game_state.game_map.grid)
+        self.__damage = {
+            player_id: array("i", [0]) * grid_size
+            for player_id in self.game_state.players
+        }
+        self.__contributions.clear()
+        for vehicle in self.game_state.vehicles_by_id.values():
+            self.__add_vehicle(vehicle)
+
+    def threat(self, player_id: int, index: int) -> int:
+        """
+        Returns damage that can be dealt to player's vehicle on the hex.
+
+        :param player_id: id of the player owning the vehicle
+        :param index: grid index of the hex
+        """
+        return self.__damage[player_id][index]
+
+    def update_vehicle(self, vehicle: Vehicle) -> None:
+        """
+        Replaces vehicle's contribution with the one for its current state.
+
+        """
+        self.__remove_vehicle(vehicle)
+        self.__add_vehicle(vehicle)
+
+    def __add_vehicle(self, vehicle: Vehicle) -> None:
+        if vehicle.hp <= 0:
+            return
+
+        hexes = self.__get_hexes_in_shoot_range(vehicle)
+        victims = list(self.game_state.players[vehicle.player_id].can_attack_ids)
+        for player_id in victims:
+            damage = self.__damage[player_id]
+            for index in hexes:
+                damage[index] += vehicle.damage
+        self.__contributions[vehicle.vehicle_id] = (hexes, victims, vehicle.damage)
+
+    def __remove_vehicle(self, vehicle: Vehicle) -> None:
+        if vehicle.vehicle_id not in self.__contributions:
+            return
+
+        hexes, victims, vehicle_damage = self.__contributions.pop(vehicle.vehicle_id)
+        for player_id in victims:
+            damage = self.__damage[player_id]
+            for index in hexes:
+                damage[index] -= vehicle_damage
+
+    def __get_hexes_in_shoot_range(self, vehicle: Vehicle) -> tuple[int, ...]:
+        grid = self.game_state.game_map.grid
+        position = grid.index(vehicle.position)
+        max_range = vehicle.shoot_range[1] + vehicle.shoot_range_bonus
+
+        if isinstance(vehicle, AtSpg):
+            terrain = self.game_state.game_map.terrain
+            result: list[int] = []
+            for ray in grid.rays(position):
+                for distance, index in enumerate(ray[:max_range], start=1):
+                    if not terrain[index] & CAN_SHOOT_THROUGH:
+                        break
+                    if distance >= vehicle.shoot_range[0]:
+                        result.append(index)
+            return tuple(result)
+
+        return tuple(
+            index
+            for distance in range(vehicle.shoot_range[0], max_range + 1)
+            for index in grid.ring(position, distance)
+        )
@@ -2,26 +2,26 @@
 Optimizes weights for step score bot
 """
 
-from os import cpu_count
-from queue import Queue
-from random import randint, seed, uniform
-from threading import Lock, Thread
+from concurrent.futures import Future, as_completed
+from math import log, sqrt
+from random import getrandbits, randint, seed, uniform
+from typing import Optional
 
 from bot.step_score_bot import StepScoreBot
-from game_client.game_loop import game_loop
-from game_client.server_interaction import GameSession
+from tournament import BotSpec, GameRecord, GameSpec, Tournament
+from utility.evaluation_store import Evaluation, EvaluationStore
 
 MAX = 10
 MIN = -10
 
+STORE_PATH = "weights/evaluations.sqlite3"
+# Evaluations are stored separately for every opponents configuration
+OPPONENTS = f"2 StepScoreBot, random weights from {MIN} to {MAX}, default GameSpec"
+
 # pylint: disable=C0103
-# these are not constants
-queue = Queue(maxsize=cpu_count())
-game_count = 0
-loses = 0
-draws = 0
-game_results_lock = Lock()
-lock = Lock()
+# not constants, created in main
+tournament: Optional[Tournament] = None
+store: Optional[EvaluationStore] = None
 
 
 def generate_weights():
@@ -32,132 +32,139 @@ def generate_weights():
     return tuple(uniform(MIN, MAX) for _ in range(WEIGHTS_COUNT))
 
 
-# pylint: disable=W0603
-# global variables needed for thread communication
-def test_weights_once(weights):
+def weights_game(weights) -> GameSpec:
     """
-    Plays game with bot with given weighs and 2 bots with random weights
+    Creates game of bot with given weighs and 2 bots with random weights
     :param weights:
     :return:
     """
-    with lock:
-        global game_count
-        game_name = "optimize_" + str(game_count)
-        game_count += 1
-
-    game1 = GameSession(name="Bot_test_1", game=game_name, num_players=3)
-    game2 = GameSession(
-        name="Bot_test_2",
-        game=game_name,
-    )
-    game3 = GameSession(
-        name="Bot_test_3",
-        game=game_name,
-    )
-
+    bots = [
+        BotSpec(StepScoreBot, {"estimator_weights": generate_weights()})
+        for _ in range(2)
+    ]
     order = randint(0, 2)
-    optimizing_bot = StepScoreBot(game1.map, estimator_weights=weights)
-
-    games = [game1, game2, game3]
-    bots = []
-    for i in range(3):
-        if i == order:
-            bots.append(optimizing_bot)
-        else:
-            bots.append(StepScoreBot(game1.map, estimator_weights=generate_weights()))
-
-    tr1 = Thread(target=game_loop, args=(bots[0], game1))
-    tr2 = Thread(target=game_loop, args=(bots[1], game2))
-    tr3 = Thread(target=game_loop, args=(bots[2], game3))
-
-    tr1.start()
-    tr2.start()
-    tr3.start()
-
-    tr1.join()
-    tr2.join()
-    tr3.join()
-
-    game_state = games[order].game_state()
-    player_id = games[order].player_id
-    global loses
-    global draws
-
-    with game_results_lock:
-        if game_state["winner"] is None:
-            draws += 1
-        elif isinstance(game_state["winner"], int):
-            if player_id != game_state["winner"]:
-                loses += 1
-        else:
-            if player_id in game_state["winner"]:
-                draws += 1
-            else:
-                loses += 1
+    bots.insert(order, BotSpec(StepScoreBot, {"estimator_weights": weights}))
+    return GameSpec(tuple(bots), seed=getrandbits(63), tag=order)
 
 
 GAMES_TO_TEST_VALUE = 20
+# Testing of a point stops early if it's worse than the bound with this confidence
+CONFIDENCE = 0.95
+MIN_GAMES_TO_STOP = 4
 
 
-def test_weights(weights):
+def game_score(record: GameRecord) -> float:
     """
-    Test bot's weight in GAMES_TO_TEST_VALUE number of games
-    :param weights:
+    Score of the tested bot in the game: 1 for lose, 0.5 for draw, 0 for win
+    :param record:
     :return:
     """
-    for _ in range(GAMES_TO_TEST_VALUE):
-        queue.put(lambda: test_weights_once(weights))
+    if record.winner is None:
+        return 0.5
+    if record.winner != record.spec.tag:
+        return 1
+    return 0
 
-    queue.join()
 
-    with game_results_lock:
-        global loses
-        global draws
-        result = (loses + draws / 2) / GAMES_TO_TEST_VALUE
-        loses = 0
-        draws = 0
+def is_worse_than(scores: list[float], bound: float) -> bool:
+    """
+    Tells if mean score is above the bound with CONFIDENCE (Hoeffding's inequality)
+    :param scores:
+    :param bound:
+    :return:
+    """
+    if len(scores) < MIN_GAMES_TO_STOP:
+        return False
+    mean = sum(scores) / len(scores)
+    return mean - sqrt(log(1 / (1 - CONFIDENCE)) / (2 * len(scores))) > bound
 
-    return result
 
+def test_points(points, bound: Optional[float] = None) -> dict[tuple, float]:
+    """
+    Tests weights of all the points at once in GAMES_TO_TEST_VALUE games each.
+
+    Games of all the points are played in parallel. If bound is given,
+    remaining games of a point are cancelled as soon as it's clear
+    that its value is higher than the bound, value of such a point
+    is calculated from the games already played.
+    If store is set, games already stored are not played again and
+    results of new games are added to it.
+    :param points:
+    :param bound:
+    :return: dict with value of every point
+    """
+    scores: dict[tuple, list[float]] = {}
+    futures: dict[Future, tuple] = {}
+    for point in dict.fromkeys(points):
+        scores[point] = [] if store is None else stored_scores(point)
+        if bound is not None and is_worse_than(scores[point], bound):
+            continue
+        for _ in range(GAMES_TO_TEST_VALUE - len(scores[point])):
+            futures[tournament.submit(weights_game(point))] = point
+
+    stopped = set()
+    for future in as_completed(futures):
+        point = futures[future]
+        if future.cancelled() or point in stopped:
+            continue
+        score = game_score(future.result())
+        scores[point].append(score)
+        if store is not None:
+            store.add(
+                point,
+                OPPONENTS,
+                wins=int(score == 0),
+                draws=int(score == 0.5),
+                loses=int(score == 1),
+            )
+        if bound is not None and is_worse_than(scores[point], bound):
+            stopped.add(point)
+            for other_future, other_point in futures.items():
+                if other_point == point:
+                    other_future.cancel()
 
-THRESHOLD = 0.5
-REFLECTION = 1.0
-CONTRACTION = 0.5
-EXTENSION = 2.0
+    return {point: sum(values) / len(values) for point, values in scores.items()}
 
 
-def write_point(starting_point, point, value):
+def stored_scores(point) -> list[float]:
     """
-    Writes point and it's value to the file named as starting point
-    :param starting_point:
+    Returns scores of the games of the point saved in store
     :param point:
-    :param value:
     :return:
     """
-    file_name = ""
-    for coef in starting_point:
-        file_name += str(coef) + " "
+    evaluation: Evaluation = store.get(point, OPPONENTS)
+    return [0] * evaluation.wins + [0.5] * evaluation.draws + [1] * evaluation.loses
 
-    with open("weights/" + file_name + ".txt", "a", encoding="utf8") as file:
-        file_str = ""
-        for coef in point:
-            file_str += str(coef) + " "
-        file.write(file_str + "=== " + str(value) + "\n")
+
+def test_weights(weights):
+    """
+    Test bot's weight in GAMES_TO_TEST_VALUE number of games
+    :param weights:
+    :return:
+    """
+    return test_points([weights])[weights]
 
 
-def replace_point(points, values, current_point, new_point):
+THRESHOLD = 0.5
+REFLECTION = 1.0
+CONTRACTION = 0.5
+EXTENSION = 2.0
+
+
+def replace_point(points, values, current_point, new_point, new_value):
     """
     Replaces point in points list and values dict with new point
     :param points:
     :param values:
     :param current_point:
     :param new_point:
+    :param new_value:
     :return:
     """
     points.remove(current_point)
     points.append(new_point)
-    values[new_point] = new_point
     values.pop(current_point)
+    values[new_point] = new_value
 
 
 def homothety(points, values, lowest_point):
@@ -178,9 +185,7 @@ def homothety(points, values, lowest_point):
     ]
 
     lowest_value = values[lowest_point]
-    values = {}
-    for point in points:
-        values[point] = test_weights(point)
+    values = test_points(points)
     values[lowest_point] = lowest_value
 
     points.append(lowest_point)
@@ -207,20 +212,19 @@ def exit_condition(points):
     return all(dispersion <= THRESHOLD for dispersion in dispersions)
 
 
-def optimize_from_random(points: list[tuple]):
+def optimize_from_random(points: list[tuple]) -> tuple:
     """
     Optimizes weights using Nelder–Mead method
+
+    Values of all tested points are kept in the store.
     :param points:
-    :return:
+    :return: the best point
     """
-    starting_point = points[0]
     weights_count = len(points[0])
 
-    values = {}
-    for point in points:
-        values[point] = test_weights(point)
+    values = test_points(points)
 
-    while exit_condition(points):
+    while not exit_condition(points):
 
         points = sorted(points, reverse=True, key=lambda point: values[point])
 
@@ -228,10 +232,8 @@ def optimize_from_random(points: list[tuple]):
         average_point = points[1]
         lowest_point = points[len(points) - 1]
 
-        write_point(starting_point, lowest_point, values[lowest_point])
-
         center_point = tuple(
-            sum(point[coord] for point in points) / weights_count
+            sum(point[coord] for point in points[1:]) / weights_count
             for coord in range(weights_count)
         )
 
@@ -239,66 +241,73 @@ def optimize_from_random(points: list[tuple]):
             (1 + REFLECTION) * center_point[coord] - REFLECTION * highest_point[coord]
             for coord in range(weights_count)
         )
-        reflected_value = test_weights(reflected_point)
-
-        if reflected_value < values[lowest_point]:
-            extended_point = tuple(
-                (
-                    (1 - EXTENSION) * center_point[coord]
-                    + EXTENSION * reflected_point[coord]
-                )
+        extended_point = tuple(
+            (1 - EXTENSION) * center_point[coord] + EXTENSION * reflected_point[coord]
+            for coord in range(weights_count)
+        )
+        outer_contraction_point, inner_contraction_point = (
+            tuple(
+                (1 - CONTRACTION) * center_point[coord] + CONTRACTION * point[coord]
                 for coord in range(weights_count)
             )
-            extended_value = test_weights(extended_point)
+            for point in (reflected_point, highest_point)
+        )
 
-            points.remove(highest_point)
-            if extended_value < reflected_value:
-                points.append(extended_point)
-                values[extended_point] = extended_value
+        # Every point that may be needed is tested at once, points
+        # worse than the highest one are useless and tested partially
+        candidates = test_points(
+            [
+                reflected_point,
+                extended_point,
+                outer_contraction_point,
+                inner_contraction_point,
+            ],
+            bound=values[highest_point],
+        )
+        reflected_value = candidates[reflected_point]
+
+        if reflected_value < values[lowest_point]:
+            if candidates[extended_point] < reflected_value:
+                replace_point(
+                    points,
+                    values,
+                    highest_point,
+                    extended_point,
+                    candidates[extended_point],
+                )
             else:
-                points.append(reflected_point)
-                values[reflected_point] = reflected_value
-            values.pop(highest_point)
+                replace_point(
+                    points, values, highest_point, reflected_point, reflected_value
+                )
 
         elif values[lowest_point] <= reflected_value < values[average_point]:
-            replace_point(points, values, highest_point, reflected_point)
+            replace_point(
+                points, values, highest_point, reflected_point, reflected_value
+            )
 
         else:
+            contraction_point = inner_contraction_point
             if values[average_point] <= reflected_value < values[highest_point]:
-                replace_point(points, values, highest_point, reflected_point)
+                replace_point(
+                    points, values, highest_point, reflected_point, reflected_value
+                )
 
-                highest_point, reflected_point = reflected_point, highest_point
+                highest_point = reflected_point
+                contraction_point = outer_contraction_point
 
-            contraction_point = tuple(
-                (
-                    (1 - CONTRACTION) * center_point[coord]
-                    + CONTRACTION * highest_point[coord]
+            if candidates[contraction_point] < values[highest_point]:
+                replace_point(
+                    points,
+                    values,
+                    highest_point,
+                    contraction_point,
+                    candidates[contraction_point],
                 )
-                for coord in range(weights_count)
-            )
-            contraction_value = test_weights(contraction_point)
-
-            if contraction_value < values[highest_point]:
-                replace_point(points, values, highest_point, contraction_point)
 
             else:
                 points, values = homothety(points, values, lowest_point)
 
-    points = sorted(points, reverse=True, key=lambda point: values[point])
-    write_point(
-        starting_point, points[len(points) - 1], values[points[len(points) - 1]]
-    )
-
-
-def worker():
-    """
-    Function for worker threads
-    :return:
-    """
-    while True:
-        task = queue.get()
-        task()
-        queue.task_done()
+    return min(points, key=lambda point: values[point])
 
 
 WEIGHTS_COUNT = 5
@@ -306,19 +315,27 @@ WEIGHTS_COUNT = 5
 
 def main():
     """
-    Creates worker threads and call optimizing function
+    Creates worker processes and call optimizing function.
+
+    Optimization is resumed from the best stored points if there are
+    enough of them.
     :return:
     """
-    max_threads = 20
+    # pylint: disable=W0603
+    # tournament and store are shared by all the evaluations
+    global tournament, store
 
     seed()
-    threads = []
-    for _ in range(max_threads):
-        thread = Thread(target=worker)
-        thread.start()
-        threads.append(thread)
-
-    optimize_from_random([generate_weights() for i in range(WEIGHTS_COUNT + 1)])
+    with Tournament() as tournament, EvaluationStore(STORE_PATH) as store:
+        points = [
+            evaluation.weights
+            for evaluation in store.top(
+                WEIGHTS_COUNT + 1, OPPONENTS, min_games=GAMES_TO_TEST_VALUE
+            )
+        ]
+        if len(points) < WEIGHTS_COUNT + 1:
+            points = [generate_weights() for i in range(WEIGHTS_COUNT + 1)]
+        print("Best weights:", optimize_from_random(points))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,88 @@
+"""
+Contains fixed-width binary codec for actions.
+
+Action is encoded into signed 64-bit integer:
+    bits 56-62 - action code
+    bits 48-55 - actor id
+    bits 32-47 - target hex index in the map grid
+    bits 0-31 - affected vehicles, bit i is set for vehicle with id i + 1
+End of the turn is encoded as TURN_CODE. Sequences of encoded actions
+are stored as arrays of native 64-bit integers.
+"""
+from array import array
+from typing import Iterable
+
+from game_client.actions import Action
+from game_client.game_state import GameState
+from game_client.hex_grid import HexGrid
+from game_client.server_interaction import ActionCode
+
+ACTION_CODE_SHIFT = 56
+VEHICLE_ID_SHIFT = 48
+HEX_INDEX_SHIFT = 32
+
+MAX_VEHICLE_ID = 32
+VEHICLE_ID_MASK = 0xFF
+HEX_INDEX_MASK = 0xFFFF
+AFFECTED_MASK = (1 << MAX_VEHICLE_ID) - 1
+
+TURN_CODE = ActionCode.TURN << ACTION_CODE_SHIFT
+
+
+def encode_action(action: Action, grid: HexGrid) -> int:
+    """
+    Encodes MOVE or SHOOT action.
+
+    :param action: action to encode
+    :param grid: grid of the game map
+    """
+    affected_mask = 0
+    for vehicle in action.affected_vehicles:
+        affected_mask |= 1 << (vehicle.vehicle_id - 1)
+    if affected_mask > AFFECTED_MASK or action.actor.vehicle_id > MAX_VEHICLE_ID:
+        raise ValueError(f"Vehicle ids over {MAX_VEHICLE_ID} can't be encoded")
+    return (
+        action.action_code << ACTION_CODE_SHIFT
+        | action.actor.vehicle_id << VEHICLE_ID_SHIFT
+        | grid.index(action.target) << HEX_INDEX_SHIFT
+        | affected_mask
+    )
+
+
+def decode_action(code: int, game_state: GameState) -> Action:
+    """
+    Decodes MOVE or SHOOT action for vehicles of the game state.
+
+    :param code: action encoded with encode_action
+    :param game_state: game state with the same map and vehicles
+    """
+    vehicles = game_state.vehicles_by_id
+    affected_mask = code & AFFECTED_MASK
+    return Action(
+        ActionCode(code >> ACTION_CODE_SHIFT),
+        vehicles[code >> VEHICLE_ID_SHIFT & VEHICLE_ID_MASK],
+        game_state.game_map.grid.coords[code >> HEX_INDEX_SHIFT & HEX_INDEX_MASK],
+        [
+            vehicles[bit + 1]
+            for bit in range(affected_mask.bit_length())
+            if affected_mask >> bit & 1
+        ],
+    )
+
+
+def codes_to_bytes(codes: Iterable[int]) -> bytes:
+    """
+    Packs encoded actions into bytes.
+
+    """
+    return array("q", codes).tobytes()
+
+
+def codes_from_bytes(data: bytes) -> array:
+    """
+    Unpacks encoded actions packed with codes_to_bytes.
+
+    """
+    codes = array("q")
+    codes.frombytes(data)
+    return codes
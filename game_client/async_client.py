@@ -0,0 +1,324 @@
+"""
+Contains asyncio client of the game server.
+
+Requests are written to the socket without waiting for the previous
+responses, the server answers requests of one connection in order, so
+responses are matched with requests by their order. Many sessions can
+share one event loop, e.g. to run dozens of bots in a single process.
+"""
+import asyncio
+import logging
+import socket
+from collections import deque
+from time import perf_counter_ns
+from typing import Iterable, Optional, Union
+
+from game_client.actions import Action
+from game_client.json_codec import JsonCodec
+from game_client.server_interaction import (DEFAULT_CODEC, HEADER, HOST, PORT,
+                                            RESPONSE_TYPES, ActionCode,
+                                            ResponseCode, ResponseError,
+                                            action_name, encode_message,
+                                            validate_login_info)
+from utility.custom_typings import (GameStateDictTyping, MapDictTyping,
+                                    PlayerDictTyping)
+from utility.profiler import profiler
+
+logger = logging.getLogger(__name__)
+
+# As one game round is 10s + 1s for latencies
+TIMEOUT = 11
+
+
+class AsyncSession:
+    """
+    Provides server interface over asyncio streams.
+
+    Message format is the same as in server_interaction.Session.
+    Response of every request is read by the background task and
+    passed to the future created for the request. Connection is closed
+    if a response can't be decoded or has no request, as the next
+    responses can't be matched with requests.
+    """
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        codec: JsonCodec = DEFAULT_CODEC,
+    ):
+        """
+        :param codec: JSON codec for requests and responses
+        """
+        self.reader = reader
+        self.writer = writer
+        self.codec = codec
+        # Sent requests waiting for response in order of sending:
+        # future, action, data and time of sending
+        self.__pending: deque[
+            tuple[asyncio.Future, Union[ActionCode, int], Optional[dict], int]
+        ] = deque()
+        self.__reader_task = asyncio.create_task(self.__read_responses())
+
+    @classmethod
+    async def connect(
+        cls, host: str = HOST, port: int = PORT, codec: JsonCodec = DEFAULT_CODEC
+    ) -> "AsyncSession":
+        """
+        Opens connection to the server.
+
+        """
+        reader, writer = await asyncio.open_connection(host, port)
+        # Pipelined small messages mustn't wait for acknowledgement
+        # of the previous ones
+        writer.get_extra_info("socket").setsockopt(
+            socket.IPPROTO_TCP, socket.TCP_NODELAY, 1
+        )
+        return cls(reader, writer, codec)
+
+    def request(
+        self, action: Union[ActionCode, int], data: Optional[dict] = None
+    ) -> asyncio.Future:
+        """
+        Sends request without waiting for the response.
+
+        :param action: action code
+        :param data: data to send with the request
+        :return: future with 'data' part of the response, it raises
+            ResponseError if response code isn't OK
+        :raises ConnectionError: if the connection is closed
+        """
+        if self.__reader_task.done():
+            raise ConnectionError("Connection is closed")
+        # Server answers unknown codes too, so every request is pending
+        future = asyncio.get_running_loop().create_future()
+        self.__pending.append((future, action, data, perf_counter_ns()))
+        self.writer.write(encode_message(action, data, self.codec))
+        return future
+
+    async def get(
+        self, action: Union[ActionCode, int], data: Optional[dict] = None
+    ) -> dict:
+        """
+        Sends request and returns 'data' part of the response.
+
+        """
+        future = self.request(action, data)
+        await self.writer.drain()
+        return await asyncio.wait_for(future, TIMEOUT)
+
+    async def close(self) -> None:
+        """
+        Closes the connection, pending requests are cancelled.
+
+        """
+        self.__reader_task.cancel()
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+        self.__cancel_pending()
+
+    async def __read_responses(self) -> None:
+        try:
+            while True:
+                response_code, length = HEADER.unpack(
+                    await self.reader.readexactly(HEADER.size)
+                )
+                payload = await self.reader.readexactly(length) if length else b""
+                # Request stays pending until its response is decoded,
+                # IndexError means response without request
+                future, action, data, start = self.__pending[0]
+                if profiler.enabled:
+                    profiler.record(
+                        f"session.{action_name(action)}", perf_counter_ns() - start
+                    )
+                if future.cancelled():
+                    self.__pending.popleft()
+                    continue
+
+                response = (
+                    self.codec.decode(
+                        payload,
+                        RESPONSE_TYPES.get(action)
+                        if response_code == ResponseCode.OK
+                        else None,
+                    )
+                    if payload
+                    else {}
+                )
+                self.__pending.popleft()
+                if response_code != ResponseCode.OK:
+                    future.set_exception(
+                        ResponseError(
+                            f"Response code: {response_code}\n"
+                            f'Error message: {response.get("error_message")}\n'
+                            f"Data that caused error: {action} {data}"
+                        )
+                    )
+                else:
+                    future.set_result(response)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            self.__cancel_pending()
+        except (ValueError, IndexError) as error:
+            logger.error("Invalid response, closing connection: %r", error)
+            self.writer.close()
+            self.__cancel_pending(error)
+
+    def __cancel_pending(self, cause: Optional[Exception] = None) -> None:
+        """
+        Fails pending requests with ConnectionError.
+
+        :param cause: error that caused closing of the connection
+        """
+        while self.__pending:
+            future = self.__pending.popleft()[0]
+            if not future.done():
+                error = ConnectionError("Connection is closed")
+                error.__cause__ = cause
+                future.set_exception(error)
+
+
+class AsyncGameSession:
+    """
+    Handles interaction with server throughout one game session.
+
+    Create it with connect coroutine.
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        player: PlayerDictTyping,
+        game_map: MapDictTyping,
+    ):
+        self.server: AsyncSession = session
+        self.player_id: int = player["idx"]
+        self.player_name: str = player["name"]
+        self.map: MapDictTyping = game_map
+
+    @classmethod
+    async def connect(
+        cls,
+        host: str = HOST,
+        port: int = PORT,
+        codec: JsonCodec = DEFAULT_CODEC,
+        **login_info,
+    ) -> "AsyncGameSession":
+        """
+        Connects to the server, logs in and requests the map.
+
+        Login info is the same as in GameSession.
+        """
+        validate_login_info(login_info)
+        session = await AsyncSession.connect(host, port, codec)
+        login = session.request(ActionCode.LOGIN, login_info)
+        game_map = session.request(ActionCode.MAP)
+        await session.writer.drain()
+        return cls(session, await login, await game_map)
+
+    async def game_state(self) -> GameStateDictTyping:
+        """
+        GAME_STATE server request.
+
+        """
+        return await self.server.get(ActionCode.GAME_STATE)
+
+    async def game_actions(self) -> dict:
+        """
+        GAME_ACTIONS server request.
+
+        """
+        return await self.server.get(ActionCode.GAME_ACTIONS)
+
+    async def turn(self) -> dict:
+        """
+        TURN server request.
+
+        """
+        return await self.server.get(ActionCode.TURN)
+
+    async def chat(self, message: str) -> dict:
+        """
+        CHAT server request.
+
+        """
+        return await self.server.get(ActionCode.CHAT, {"message": message})
+
+    async def logout(self) -> dict:
+        """
+        LOGOUT server request.
+
+        """
+        return await self.server.get(ActionCode.LOGOUT)
+
+    async def close(self) -> None:
+        """
+        Closes the connection.
+
+        """
+        await self.server.close()
+
+    async def end_turn(
+        self, actions: Iterable[Action] = ()
+    ) -> tuple[GameStateDictTyping, list[Optional[ResponseError]]]:
+        """
+        Sends actions, TURN and GAME_STATE requests at once.
+
+        :param actions: actions of the turn
+        :return: game state after the turn and errors of rejected
+            actions (None for accepted ones)
+        """
+        futures = [
+            self.server.request(
+                action_code, {"vehicle_id": vehicle_id, "target": target}
+            )
+            for action_code, vehicle_id, target in (
+                action.server_format for action in actions
+            )
+        ]
+        turn = self.server.request(ActionCode.TURN)
+        game_state = self.server.request(ActionCode.GAME_STATE)
+        await self.server.writer.drain()
+
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        errors: list[Optional[ResponseError]] = []
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(
+                result, ResponseError
+            ):
+                raise result
+            errors.append(result if isinstance(result, ResponseError) else None)
+        await turn
+        return await game_state, errors
+
+
+async def async_game_loop(bot, game: AsyncGameSession) -> GameStateDictTyping:
+    """
+    Plays the game, every turn takes one round trip to the server.
+
+    Bot's get_actions is called in the event loop thread, other
+    sessions of the loop wait for it.
+
+    :param bot: bot that will play the game
+    :param game: AsyncGameSession instance
+    :return: the final game state
+    """
+    game_state = await game.game_state()
+    while not game_state["finished"]:
+        actions = []
+        if game_state["current_player_idx"] == game.player_id:
+            profiler.start_turn(
+                turn=game_state["current_turn"], player_id=game.player_id
+            )
+            actions = bot.get_actions(game_state)
+            profiler.finish_turn()
+
+        game_state, errors = await game.end_turn(actions)
+        for action, error in zip(actions, errors):
+            if error is not None:
+                logger.warning("Action %s was rejected: %s", action, error)
+
+    logger.info("Winner: %s. Your id: %s", game_state["winner"], game.player_id)
+    return game_state
@@ -6,6 +6,7 @@ import logging
 
 from game_client.server_interaction import ActionCode
 from gui.game_state_property import game_state_property
+from utility.profiler import profiler
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -47,6 +48,9 @@ def game_loop(bot, game):
             logger.info(
                 "Round: %s. Player: %s", game_state["current_turn"], game.player_name
             )
+            profiler.start_turn(
+                turn=game_state["current_turn"], player_id=game.player_id
+            )
             for action in bot.get_actions(game_state):
                 game.action(*action.server_format)
                 action_type = (
@@ -58,5 +62,6 @@ def game_loop(bot, game):
                     action.actor,
                     action.target,
                 )
+            profiler.finish_turn()
 
         game.turn()
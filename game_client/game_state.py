@@ -2,16 +2,24 @@
 Contains class to store game state.
 
 """
-
+from array import array
+from dataclasses import dataclass
 from typing import Optional
 
-from game_client.map import GameMap
+from game_client.hex_grid import HexKeyTyping
+from game_client.map import (CAN_GO_THROUGH, CAN_SHOOT_THROUGH, CAN_STAY,
+                             GameMap)
 from game_client.player import Player
 from game_client.state_hex import GSHex
 from game_client.vehicles import VEHICLE_CLASSES, Vehicle
 from utility.coordinates import Coords
-from utility.custom_typings import (CoordsDictTyping, GameStateDictTyping,
-                                    MapDictTyping, VehicleDictTyping)
+from utility.custom_typings import (AttackMatrixDictTyping, CoordsDictTyping,
+                                    GameStateDictTyping, MapDictTyping,
+                                    VehicleDictTyping)
+from utility.profiler import profiler
+
+# Value of per-hex vehicle id arrays for hexes without vehicle
+NO_VEHICLE = -1
 
 
 class OutOfBoundsError(Exception):
@@ -20,14 +28,46 @@ class OutOfBoundsError(Exception):
     """
 
 
+@dataclass(frozen=True)
+class StateChanges:
+    """
+    Ids of vehicles changed by GameState.update.
+
+    Vehicles are compared with their state right before the update,
+    so changes made by the bot since the previous update are included.
+    Respawned vehicles got their hp back on the spawn position, they
+    are not in repaired, but are in moved if they changed position.
+    """
+
+    created: frozenset[int] = frozenset()
+    moved: frozenset[int] = frozenset()
+    damaged: frozenset[int] = frozenset()
+    repaired: frozenset[int] = frozenset()
+    respawned: frozenset[int] = frozenset()
+    # Vehicles with any field changed, including the ones above
+    changed: frozenset[int] = frozenset()
+    attack_matrix_changed: bool = False
+
+
 class GameState:
     """
     Stores parsed data about game's state.
 
+    Besides self.vehicles dictionary keeps per-hex arrays indexed by
+    self.game_map.grid indexes: self.occupancy with id of the vehicle
+    located on the hex and self.spawn_owners with id of the vehicle
+    spawning on the hex (or NO_VEHICLE for both).
+
+    Methods vehicle_at, can_stay, can_go_through and can_shoot_through
+    read these arrays directly and accept either coordinates or grid
+    index of the hex, get_hex builds GSHex object with the same info.
+
+    Method update applies only the fields that differ from the stored
+    ones and returns StateChanges for invalidation of derived data.
     """
 
     # pylint: disable=too-many-instance-attributes
-    # Nine is reasonable in this case.
+    # Thirteen is reasonable in this case.
     def __init__(self, game_map: MapDictTyping):
         """
         :param game_map: MAP response from the server.
@@ -40,24 +80,38 @@ class GameState:
         self.current_player: Optional[Player] = None
         self.players: dict[int, Player] = {}
         self.vehicles: dict[Coords, Vehicle] = {}
-        self.spawn_points: list[Coords] = []
+        self.vehicles_by_id: dict[int, Vehicle] = {}
+        self.occupancy: array = array("i", [NO_VEHICLE]) * len(self.game_map.grid)
+        self.spawn_owners: array = array("i", [NO_VEHICLE]) * len(
+            self.game_map.grid
+        )
+        # Attack matrix of the last update
+        self.__attack_matrix: Optional[AttackMatrixDictTyping] = None
 
-    def update(self, data: GameStateDictTyping) -> None:
+    def update(self, data: GameStateDictTyping) -> StateChanges:
         """
         Updates data in instance from GAME_STATE response from the server.
 
         :param data: GAME_STATE response from the server
+        :return: changes made by the update
         """
-        # Order matters: players must be updated/created before vehicles
-        self.__update_or_create_players(data)
-        self.__update_or_create_vehicles(data["vehicles"])
+        with profiler.measure("game_state.update"):
+            # Order matters: players must be updated/created before vehicles
+            attack_matrix_changed = self.__update_or_create_players(data)
 
-        self.__update_catapults(data["catapult_usage"])
+            self.__update_catapults(data["catapult_usage"])
 
-        self.current_turn = data["current_turn"]
-        self.current_player = self.players[data["current_player_idx"]]
-        self.finished = data["finished"]
-        self.winner = None if data["winner"] is None else self.players[data["winner"]]
+            self.num_turns = data["num_turns"]
+            self.current_turn = data["current_turn"]
+            self.current_player = self.players[data["current_player_idx"]]
+            self.finished = data["finished"]
+            self.winner = (
+                None if data["winner"] is None else self.players[data["winner"]]
+            )
+
+            return self.__update_or_create_vehicles(
+                data["vehicles"], attack_matrix_changed
+            )
 
     def get_hex(self, coordinates: Coords) -> GSHex:
         """
@@ -67,11 +121,12 @@ class GameState:
         :return: GSHex object with info about hex
         """
         if self.game_map.are_valid_coords(coordinates):
+            index = self.game_map.grid.index(coordinates)
             return GSHex(
                 coordinates,
-                self.game_map[coordinates],
-                coordinates in self.spawn_points,
-                self.__get_vehicle_or_none(coordinates),
+                self.game_map.hexes[index],
+                self.spawn_owners[index] != NO_VEHICLE,
+                self.vehicle_at(index),
             )
 
         raise OutOfBoundsError(
@@ -79,69 +134,184 @@ class GameState:
             f"for the game map with radius {self.game_map.map_radius}."
         )
 
-    def __update_or_create_players(self, data: GameStateDictTyping) -> None:
+    def vehicle_at(self, item: HexKeyTyping) -> Optional[Vehicle]:
+        """
+        Returns vehicle located on the hex or None.
+
+        :param item: valid coordinates or grid index of the hex
+        """
+        vehicle_id = self.occupancy[self.game_map.grid.to_index(item)]
+        if vehicle_id == NO_VEHICLE:
+            return None
+        return self.vehicles_by_id[vehicle_id]
+
+    def can_stay(self, actor: Vehicle, item: HexKeyTyping) -> bool:
+        """
+        Tells if actor can stay on the hex.
+
+        :param actor: vehicle presented in the game
+        :param item: valid coordinates or grid index of the hex
+        """
+        index = self.game_map.grid.to_index(item)
+        if self.occupancy[index] != NO_VEHICLE:
+            return False
+        if self.spawn_owners[index] not in (NO_VEHICLE, actor.vehicle_id):
+            return False
+        return bool(self.game_map.terrain[index] & CAN_STAY)
+
+    def can_go_through(self, item: HexKeyTyping) -> bool:
+        """
+        Tells if vehicles can go through the hex.
+
+        :param item: valid coordinates or grid index of the hex
+        """
+        return bool(
+            self.game_map.terrain[self.game_map.grid.to_index(item)] & CAN_GO_THROUGH
+        )
+
+    def can_shoot_through(self, item: HexKeyTyping) -> bool:
+        """
+        Tells if vehicle (AtSpg to be exact) can shoot through the hex.
+
+        :param item: valid coordinates or grid index of the hex
+        """
+        return bool(
+            self.game_map.terrain[self.game_map.grid.to_index(item)]
+            & CAN_SHOOT_THROUGH
+        )
+
+    def _update_attack_matrix(self, attack_matrix: AttackMatrixDictTyping) -> None:
+        """
+        Recalculates targets of all players.
+
+        :param attack_matrix: attack matrix in GAME_STATE response format
+        """
+        self.__attack_matrix = {
+            player_id: list(attacked) for player_id, attacked in attack_matrix.items()
+        }
+        for player in self.players.values():
+            player.update(player.win_points, attack_matrix)
+
+    def __update_or_create_players(self, data: GameStateDictTyping) -> bool:
+        """
+        Updates players, targets are recalculated if attack matrix has changed.
+
+        :return: True if attack matrix has changed
+        """
         for player in data["players"]:
-            if player["idx"] in self.players:
-                player_obj = self.players[player["idx"]]
-                player_obj.update(
-                    data["win_points"][str(player["idx"])], data["attack_matrix"]
-                )
-            else:
+            if player["idx"] not in self.players:
                 self.players[int(player["idx"])] = Player(player)
+                # Targets of the new player must be calculated
+                self.__attack_matrix = None
+            self.players[player["idx"]].update(
+                data["win_points"][str(player["idx"])], None
+            )
+
+        attack_matrix_changed = data["attack_matrix"] != self.__attack_matrix
+        if attack_matrix_changed:
+            self._update_attack_matrix(data["attack_matrix"])
+        return attack_matrix_changed
 
+    # pylint: disable=too-many-locals
+    # Changes of every kind are collected in one pass
     def __update_or_create_vehicles(
-        self, vehicles_data: dict[str, VehicleDictTyping]
-    ) -> None:
-        vehicles_buffer: dict[int, Vehicle] = {}
+        self, vehicles_data: dict[str, VehicleDictTyping], attack_matrix_changed: bool
+    ) -> StateChanges:
+        grid = self.game_map.grid
+        created: set[int] = set()
+        moved: dict[int, Coords] = {}
+        damaged: set[int] = set()
+        repaired: set[int] = set()
+        respawned: set[int] = set()
+        changed: set[int] = set()
+
         for vid, vehicle in vehicles_data.items():
-            new_pos = Coords(vehicle["position"])
-
-            if int(vid) in vehicles_buffer:
-                vehicle_obj = vehicles_buffer[int(vid)]
-            else:
-                try:
-                    vehicle_obj = self.__get_vehicle_by_id(int(vid))
-                    self.vehicles.pop(vehicle_obj.position)
-                except KeyError:
-                    vehicle_obj = VEHICLE_CLASSES[vehicle["vehicle_type"]](
-                        int(vid), vehicle
-                    )
-                    self.vehicles[vehicle_obj.position] = vehicle_obj
-                    self.players[vehicle_obj.player_id].add_vehicle(vehicle_obj)
-                    self.spawn_points.append(vehicle_obj.spawn_position)
-                    continue
-
-            vehicle_obj.update(vehicle)
-            if new_pos in self.vehicles:
-                vehicle_to_buff = self.vehicles[new_pos]
-                vehicles_buffer[vehicle_to_buff.vehicle_id] = vehicle_to_buff
-            self.vehicles[new_pos] = vehicle_obj
-
-    def __get_vehicle_by_id(self, vehicle_id: int) -> Vehicle:
-        for vehicle in self.vehicles.values():
-            if vehicle.vehicle_id == vehicle_id:
-                return vehicle
-
-        raise KeyError(
-            f"There is no vehicle with id {vehicle_id}, " f"{type(vehicle_id)}"
+            vehicle_id = int(vid)
+            vehicle_obj = self.vehicles_by_id.get(vehicle_id)
+            if vehicle_obj is None:
+                self.__create_vehicle(vehicle_id, vehicle)
+                created.add(vehicle_id)
+                changed.add(vehicle_id)
+                continue
+
+            position = vehicle["position"]
+            old_position = vehicle_obj.position
+            if (
+                position["x"] != old_position.x
+                or position["y"] != old_position.y
+                or position["z"] != old_position.z
+            ):
+                moved[vehicle_id] = Coords(position)
+                # New hexes are taken after all vehicles have left theirs
+                if self.vehicles.get(old_position) is vehicle_obj:
+                    del self.vehicles[old_position]
+                    self.occupancy[grid.index(old_position)] = NO_VEHICLE
+
+            health = vehicle["health"]
+            if health < vehicle_obj.hp:
+                damaged.add(vehicle_id)
+            elif health > vehicle_obj.hp:
+                if (vehicle_obj.hp <= 0 or vehicle_id in moved) and moved.get(
+                    vehicle_id, old_position
+                ) == vehicle_obj.spawn_position:
+                    respawned.add(vehicle_id)
+                else:
+                    repaired.add(vehicle_id)
+
+            if (
+                vehicle_id in moved
+                or health != vehicle_obj.hp
+                or vehicle["capture_points"] != vehicle_obj.capture_points
+                or vehicle["shoot_range_bonus"] != vehicle_obj.shoot_range_bonus
+            ):
+                changed.add(vehicle_id)
+                vehicle_obj.hp = health
+                vehicle_obj.capture_points = vehicle["capture_points"]
+                vehicle_obj.shoot_range_bonus = vehicle["shoot_range_bonus"]
+
+        for vehicle_id, position in moved.items():
+            vehicle_obj = self.vehicles_by_id[vehicle_id]
+            vehicle_obj.update_position(position)
+            self.vehicles[position] = vehicle_obj
+            self.occupancy[grid.index(position)] = vehicle_id
+
+        return StateChanges(
+            created=frozenset(created),
+            moved=frozenset(moved),
+            damaged=frozenset(damaged),
+            repaired=frozenset(repaired),
+            respawned=frozenset(respawned),
+            changed=frozenset(changed),
+            attack_matrix_changed=attack_matrix_changed,
         )
 
-    def __update_catapults(self, catapult_usages: list[CoordsDictTyping]) -> None:
+    def __create_vehicle(self, vehicle_id: int, data: VehicleDictTyping) -> None:
+        grid = self.game_map.grid
+        vehicle = VEHICLE_CLASSES[data["vehicle_type"]](vehicle_id, data)
+        self.vehicles_by_id[vehicle_id] = vehicle
+        self.players[vehicle.player_id].add_vehicle(vehicle)
+        self.spawn_owners[grid.index(vehicle.spawn_position)] = vehicle_id
+        self.vehicles[vehicle.position] = vehicle
+        self.occupancy[grid.index(vehicle.position)] = vehicle_id
+
+    def _move_vehicle(self, vehicle: Vehicle, new_position: Coords) -> None:
         """
-        Updates amount of uses left for every used catapult.
+        Moves vehicle to the new position keeping position indexes consistent.
 
-        :param catapult_usages: part of GAME_STATE response
+        :param vehicle: vehicle presented in the game
+        :param new_position: valid coordinates of a hex without vehicle
         """
-        for usage in catapult_usages:
-            self.game_map[Coords(usage)].use()
+        self.vehicles.pop(vehicle.position)
+        self.occupancy[self.game_map.grid.index(vehicle.position)] = NO_VEHICLE
+        self.vehicles[new_position] = vehicle
+        self.occupancy[self.game_map.grid.index(new_position)] = vehicle.vehicle_id
+        vehicle.update_position(new_position)
 
-    def __get_vehicle_or_none(self, coords: Coords) -> Optional[Vehicle]:
+    def __update_catapults(self, catapult_usages: list[CoordsDictTyping]) -> None:
         """
-        Return actor at the given position if there is any or None.
+        Updates amount of uses left for every catapult.
 
-        :param coords: Coords object
-        :return: Vehicle object located at the given position or None
+        :param catapult_usages: part of GAME_STATE response, contains
+            one entry for every usage since the game start
         """
-        if coords in self.vehicles:
-            return self.vehicles[coords]
-        return None
+        self.game_map.set_bonus_usages([Coords(usage) for usage in catapult_usages])
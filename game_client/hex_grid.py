@@ -0,0 +1,186 @@
+"""
+Contains class mapping hex coordinates to dense integer indexes.
+
+"""
+from functools import lru_cache
+from typing import Optional, Union
+
+from utility.coordinates import Coords
+
+DIRECTIONS = (
+    Coords((1, -1, 0)),
+    Coords((1, 0, -1)),
+    Coords((0, 1, -1)),
+    Coords((-1, 1, 0)),
+    Coords((-1, 0, 1)),
+    Coords((0, -1, 1)),
+)
+
+# Rings are walked anticlockwise starting from the hex in DIRECTIONS[4]
+# direction, so the hexes of the first ring go in the following order
+RING_DIRECTIONS_ORDER = (4, 5, 0, 1, 2, 3)
+
+# Hex can be referred to either by its coordinates or by its grid index
+HexKeyTyping = Union[Coords, int]
+
+RayTyping = tuple[int, ...]
+
+
+class HexGrid:
+    """
+    Numbers every hex of a hexagonal map with an integer from 0 to len(grid).
+
+    Hexes are numbered row by row (ordered by x, then by y), so index
+    of any hex is calculated arithmetically without hashing. Indexes
+    are used to keep per-hex data in flat arrays.
+
+    Rings and straight rays are kept as tuples of indexes, they are
+    calculated on first request and stored for the whole grid. Use
+    get_hex_grid to share one grid between maps with the same radius.
+    """
+
+    def __init__(self, map_radius: int):
+        """
+        :param map_radius: map size as received from the server,
+            hexes with max_dimension < map_radius are valid.
+        """
+        self.map_radius: int = map_radius
+        radius = map_radius - 1
+        Coords.intern_radius(map_radius)
+
+        self.coords: list[Coords] = []
+        # Index of hex (x, y, z) is self.__row_base[x + radius] + y
+        self.__row_base: list[int] = []
+        for x in range(-radius, radius + 1):
+            y_min = max(-radius, -x - radius)
+            y_max = min(radius, -x + radius)
+            self.__row_base.append(len(self.coords) - y_min)
+            for y in range(y_min, y_max + 1):
+                self.coords.append(Coords((x, y, -x - y)))
+
+        self.neighbours: tuple[tuple[int, ...], ...] = tuple(
+            tuple(
+                self.index(coords + direction)
+                for direction in DIRECTIONS
+                if self.is_valid(coords + direction)
+            )
+            for coords in self.coords
+        )
+
+        self.__rings: dict[int, list[tuple[int, ...]]] = {}
+        self.__rays: list[Optional[tuple[RayTyping, ...]]] = [None] * len(self)
+        self.__direction_numbers: dict[tuple[int, int, int], int] = {
+            tuple(direction): number for number, direction in enumerate(DIRECTIONS)
+        }
+
+    def __len__(self) -> int:
+        return len(self.coords)
+
+    def __contains__(self, item: Coords) -> bool:
+        return self.is_valid(item)
+
+    def is_valid(self, coords: Coords) -> bool:
+        """
+        Tells if hex with given coordinates is in grid boundaries.
+
+        """
+        return coords.max_dimension < self.map_radius
+
+    def index(self, coords: Coords) -> int:
+        """
+        Returns index of the hex, coordinates are expected to be valid.
+
+        :param coords: coordinates of the hex
+        :return: integer index of the hex
+        """
+        # pylint: disable=invalid-name
+        # x, y are valid names
+        x, y = coords.x, coords.y
+        return self.__row_base[x + self.map_radius - 1] + y
+
+    def to_index(self, item: HexKeyTyping) -> int:
+        """
+        Returns index of the hex given by coordinates or by index.
+
+        """
+        if isinstance(item, int):
+            return item
+        return self.index(item)
+
+    def ring(self, index: int, dist: int) -> tuple[int, ...]:
+        """
+        Returns indexes of valid hexes at given distance from the hex.
+
+        Hexes are ordered anticlockwise starting from the hex
+        in DIRECTIONS[4] direction.
+
+        :param index: grid index of the hex
+        :param dist: distance in hexes
+        """
+        if dist not in self.__rings:
+            self.__rings[dist] = [
+                self.__calculate_ring(coords, dist) for coords in self.coords
+            ]
+        return self.__rings[dist][index]
+
+    def __calculate_ring(self, position: Coords, dist: int) -> tuple[int, ...]:
+        if dist == 0:
+            return (self.index(position),)
+
+        result: list[int] = []
+        hex_on_dist = position + DIRECTIONS[4] * dist
+        for direction in DIRECTIONS:
+            for _ in range(dist):
+                if self.is_valid(hex_on_dist):
+                    result.append(self.index(hex_on_dist))
+                hex_on_dist = hex_on_dist + direction
+        return tuple(result)
+
+    def rays(self, index: int) -> tuple[RayTyping, ...]:
+        """
+        Returns six straight rays from the hex to the grid's edge.
+
+        :param index: grid index of the hex
+        :return: tuple with a ray for every element of DIRECTIONS, ray is
+            a tuple of indexes of hexes at distance 1, 2, ... from the hex
+        """
+        rays = self.__rays[index]
+        if rays is None:
+            rays = tuple(
+                self.__calculate_ray(self.coords[index], direction)
+                for direction in DIRECTIONS
+            )
+            self.__rays[index] = rays
+        return rays
+
+    def __calculate_ray(self, position: Coords, direction: Coords) -> RayTyping:
+        result: list[int] = []
+        hex_on_ray = position + direction
+        while self.is_valid(hex_on_ray):
+            result.append(self.index(hex_on_ray))
+            hex_on_ray = hex_on_ray + direction
+        return tuple(result)
+
+    def direction(self, start: Coords, end: Coords) -> Optional[int]:
+        """
+        Returns number of DIRECTIONS element pointing from start to end.
+
+        :return: direction number or None if hexes are not on a straight
+            line or are the same hex
+        """
+        # pylint: disable=invalid-name
+        # dx, dy, dz are valid names
+        dx, dy, dz = end.x - start.x, end.y - start.y, end.z - start.z
+        dist = max(abs(dx), abs(dy), abs(dz))
+        if dist == 0 or (dx and dy and dz):
+            return None
+        return self.__direction_numbers[(dx // dist, dy // dist, dz // dist)]
+
+
+@lru_cache(maxsize=None)
+def get_hex_grid(map_radius: int) -> HexGrid:
+    """
+    Returns HexGrid shared by every map with the given radius.
+
+    """
+    return HexGrid(map_radius)
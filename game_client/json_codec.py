@@ -0,0 +1,124 @@
+"""
+Contains JSON codecs used to encode and decode server messages.
+
+Codecs of faster JSON libraries are used if the libraries are installed:
+msgspec (can also validate responses against their typings) and orjson.
+Standard json module is used otherwise.
+"""
+import json
+from typing import Any, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+PayloadTyping = Union[bytes, bytearray, memoryview]
+
+
+class JsonCodec:
+    """
+    Codec using standard json module.
+
+    """
+
+    name = "json"
+
+    def encode(self, data: Any) -> bytes:
+        """
+        Encodes data to UTF-8 JSON.
+
+        """
+        return json.dumps(data).encode("utf-8")
+
+    # pylint: disable=unused-argument
+    # Standard json module can't decode into types
+    def decode(self, payload: PayloadTyping, response_type: Optional[type] = None):
+        """
+        Decodes UTF-8 JSON.
+
+        :param payload: encoded data, memoryview isn't kept after the call
+        :param response_type: typing of the decoded data, e.g.
+            GameStateDictTyping, codecs that support it decode the data
+            straight into this type
+        :raises ValueError: if payload is not valid JSON
+        """
+        return json.loads(str(payload, "utf-8"))
+
+
+# pylint: disable=no-member
+# orjson is an extension module pylint can't inspect
+class OrjsonCodec(JsonCodec):
+    """
+    Codec using orjson library.
+
+    """
+
+    name = "orjson"
+
+    def encode(self, data: Any) -> bytes:
+        return orjson.dumps(
+            data, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+
+    def decode(self, payload: PayloadTyping, response_type: Optional[type] = None):
+        return orjson.loads(payload)
+
+
+class MsgspecCodec(JsonCodec):
+    """
+    Codec using msgspec library.
+
+    With typed=True responses are decoded into the given response types
+    and validated against them, so a response that doesn't match its
+    typing raises msgspec.ValidationError.
+    """
+
+    name = "msgspec"
+
+    def __init__(self, typed: bool = False):
+        self.typed = typed
+        self.__encoder = msgspec.json.Encoder()
+        self.__decoders: dict[Optional[type], Any] = {None: msgspec.json.Decoder()}
+
+    def encode(self, data: Any) -> bytes:
+        return self.__encoder.encode(data)
+
+    def decode(self, payload: PayloadTyping, response_type: Optional[type] = None):
+        if not self.typed:
+            response_type = None
+        if response_type not in self.__decoders:
+            self.__decoders[response_type] = msgspec.json.Decoder(response_type)
+        try:
+            return self.__decoders[response_type].decode(payload)
+        except msgspec.DecodeError as error:
+            raise ValueError(str(error)) from error
+
+
+CODECS: dict[str, type[JsonCodec]] = {
+    codec.name: codec
+    for codec, library in (
+        (MsgspecCodec, msgspec),
+        (OrjsonCodec, orjson),
+        (JsonCodec, json),
+    )
+    if library is not None
+}
+
+
+def get_codec(name: Optional[str] = None) -> JsonCodec:
+    """
+    Returns codec with the given name or the fastest available one.
+
+    :param name: one of "msgspec", "orjson" and "json"
+    """
+    if name is None:
+        name = next(iter(CODECS))
+    if name not in CODECS:
+        raise ValueError(f"JSON codec {name} is not available")
+    return CODECS[name]()
@@ -0,0 +1,522 @@
+"""
+Contains local stand-in for the game server.
+
+"""
+import socket
+import socketserver
+import threading
+import time
+from itertools import count
+from typing import Optional, Union
+
+from bot.mcst.mcst_bot_game_state import MCSTBotGameState, initial_game_state
+from game_client.map_generator import generate_map
+from game_client.server_interaction import (DEFAULT_CODEC, HEADER, ActionCode,
+                                            ResponseCode, ResponseError,
+                                            encode_message)
+from utility.coordinates import Coords
+from utility.custom_typings import (GameStateDictTyping, MapDictTyping,
+                                    PlayerDictTyping)
+
+DEFAULT_NUM_TURNS = 45
+DEFAULT_NUM_PLAYERS = 1
+
+ResponseTyping = tuple[ResponseCode, dict]
+
+
+class RequestError(Exception):
+    """
+    Raised while handling request that must be answered with error code.
+
+    """
+
+    def __init__(self, code: ResponseCode, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+# pylint: disable=too-many-instance-attributes
+# Twelve is reasonable in this case.
+class LocalGame:
+    """
+    One game hosted by LocalServer.
+
+    Game starts when num_players players are logged in. Turn of
+    the current player ends when every logged in player has sent
+    TURN request or when turn_timeout seconds have passed since
+    the turn start, observers aren't waited for. If turn_timeout is
+    None the turn never ends by time, so the game runs as fast as
+    clients can play it.
+
+    Every method must be called with self.condition acquired.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        game_map: MapDictTyping,
+        num_players: int,
+        num_turns: int,
+        turn_timeout: Optional[float],
+    ):
+        self.name = name
+        self.game_map = game_map
+        self.num_players = num_players
+        self.num_turns = num_turns
+        self.turn_timeout = turn_timeout
+        self.condition = threading.Condition()
+
+        self.players: list[PlayerDictTyping] = []
+        self.observers: list[PlayerDictTyping] = []
+        self.passwords: dict[str, str] = {}
+        self.connected: set[int] = set()
+        # Connected non-observers, turn ends when all of them have sent TURN
+        self.connected_players: set[int] = set()
+        self.game_state: Optional[MCSTBotGameState] = None
+
+        self.turn_number = 0
+        self.turn_started = time.monotonic()
+        self.turn_requests: set[int] = set()
+        self.actions: list[dict] = []
+        self.last_actions: list[dict] = []
+
+    @property
+    def started(self) -> bool:
+        """
+        Tells if all the players have joined the game.
+
+        """
+        return self.game_state is not None
+
+    @property
+    def finished(self) -> bool:
+        """
+        Tells if the game is over.
+
+        """
+        return self.started and self.game_state.finished
+
+    def join(
+        self, player_id: int, name: str, password: str, is_observer: bool
+    ) -> PlayerDictTyping:
+        """
+        Adds player to the game or reconnects already joined one.
+
+        """
+        for player in self.players + self.observers:
+            if player["name"] == name:
+                if self.passwords[name] != password:
+                    raise RequestError(
+                        ResponseCode.ACCESS_DENIED, "Password is not correct"
+                    )
+                self.connected.add(player["idx"])
+                if not player["is_observer"]:
+                    self.connected_players.add(player["idx"])
+                return player
+
+        if not is_observer and len(self.players) == self.num_players:
+            raise RequestError(ResponseCode.ACCESS_DENIED, "Game is full")
+
+        player: PlayerDictTyping = {
+            "idx": player_id,
+            "name": name,
+            "is_observer": is_observer,
+        }
+        self.passwords[name] = password
+        self.connected.add(player_id)
+        if is_observer:
+            self.observers.append(player)
+            return player
+
+        self.players.append(player)
+        self.connected_players.add(player_id)
+        if len(self.players) == self.num_players:
+            self.game_state = MCSTBotGameState(self.game_map)
+            self.game_state.update(
+                initial_game_state(self.game_map, self.players, self.num_turns)
+            )
+            self.__start_turn()
+        return player
+
+    def leave(self, player_id: int) -> None:
+        """
+        Disconnects player, the game doesn't wait for his TURN requests anymore.
+
+        """
+        self.connected.discard(player_id)
+        self.connected_players.discard(player_id)
+        # Turn ends if the rest have already sent TURN and wait for it
+        if (
+            self.started
+            and self.connected & self.turn_requests
+            and self.connected_players <= self.turn_requests
+        ):
+            self.__end_turn()
+
+    def state(self) -> GameStateDictTyping:
+        """
+        Returns GAME_STATE response.
+
+        """
+        if self.started:
+            state = self.game_state.to_dict()
+        else:
+            state = {
+                "num_players": self.num_players,
+                "num_turns": self.num_turns,
+                "current_turn": 0,
+                "players": list(self.players),
+                "observers": [],
+                "current_player_idx": None,
+                "finished": False,
+                "vehicles": {},
+                "attack_matrix": {str(player["idx"]): [] for player in self.players},
+                "winner": None,
+                "win_points": {
+                    str(player["idx"]): {"capture": 0, "kill": 0}
+                    for player in self.players
+                },
+                "catapult_usage": [],
+            }
+        state["observers"] = list(self.observers)
+        return state
+
+    def action(self, player_id: int, action_code: ActionCode, data: dict) -> None:
+        """
+        Applies MOVE or SHOOT action of the player.
+
+        """
+        if not self.started or self.finished:
+            raise RequestError(
+                ResponseCode.INAPPROPRIATE_GAME_STATE, "Game is not running"
+            )
+        if self.game_state.current_player.idx != player_id:
+            raise RequestError(
+                ResponseCode.INAPPROPRIATE_GAME_STATE, "It is not your turn"
+            )
+
+        try:
+            action = self.game_state.get_action(
+                action_code, int(data["vehicle_id"]), Coords(data["target"])
+            )
+        except (KeyError, TypeError, ValueError) as error:
+            raise RequestError(
+                ResponseCode.BAD_COMMAND, f"Wrong action format: {error}"
+            ) from error
+        if action is None:
+            raise RequestError(ResponseCode.BAD_COMMAND, "Action is not possible")
+
+        self.game_state.update_from_action(action)
+        self.actions.append(
+            {
+                "player_id": player_id,
+                "action_type": int(action_code),
+                "data": {
+                    "vehicle_id": action.actor.vehicle_id,
+                    "target": action.target.server_format,
+                },
+            }
+        )
+
+    def turn(self, player_id: int) -> None:
+        """
+        Waits until the current turn ends.
+
+        """
+        if self.finished:
+            return
+
+        if not self.started:
+            if not self.condition.wait_for(
+                lambda: self.started or player_id not in self.connected,
+                self.turn_timeout,
+            ):
+                raise RequestError(ResponseCode.TIMEOUT, "Game has not started")
+            return
+
+        turn_number = self.turn_number
+        self.turn_requests.add(player_id)
+        if self.connected_players <= self.turn_requests:
+            self.__end_turn()
+            return
+
+        while self.turn_number == turn_number:
+            if self.turn_timeout is None:
+                self.condition.wait()
+                continue
+            remaining = self.turn_started + self.turn_timeout - time.monotonic()
+            if remaining <= 0:
+                self.__end_turn()
+                return
+            self.condition.wait(remaining)
+
+    def __start_turn(self) -> None:
+        self.turn_number += 1
+        self.turn_started = time.monotonic()
+        self.turn_requests.clear()
+        self.condition.notify_all()
+
+    def __end_turn(self) -> None:
+        self.game_state.end_turn()
+        self.last_actions = self.actions
+        self.actions = []
+        self.__start_turn()
+
+
+class LocalServer:
+    """
+    Local stand-in for the game server.
+
+    Plays games with MCSTBotGameState simulator, so bots can be
+    evaluated without the real server. Requests can be sent either
+    through TCP connection in the server's format (see start method)
+    or directly with sessions created by connect method. Games are
+    removed when they finish or all their players log out.
+    """
+
+    def __init__(
+        self,
+        game_map: Optional[MapDictTyping] = None,
+        turn_timeout: Optional[float] = None,
+    ):
+        """
+        :param game_map: MAP of every game, map from generate_map()
+            is used if not provided
+        :param turn_timeout: max duration of one turn in seconds,
+            turn ends only when every player has sent TURN if None
+        """
+        self.game_map: MapDictTyping = (
+            generate_map() if game_map is None else game_map
+        )
+        self.turn_timeout = turn_timeout
+        self.games: dict[str, LocalGame] = {}
+        self.__lock = threading.Lock()
+        self.__player_ids = count(1)
+        self.__tcp_server: Optional[socketserver.ThreadingTCPServer] = None
+
+    def connect(self) -> "LocalSession":
+        """
+        Creates new in-process connection to the server.
+
+        """
+        return LocalSession(self)
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> tuple[str, int]:
+        """
+        Starts serving TCP connections in a background thread.
+
+        :param host: host to listen on
+        :param port: port to listen on, any free port if 0
+        :return: actual address of the server
+        """
+        self.__tcp_server = socketserver.ThreadingTCPServer(
+            (host, port), _RequestHandler
+        )
+        self.__tcp_server.daemon_threads = True
+        self.__tcp_server.local_server = self
+        threading.Thread(target=self.__tcp_server.serve_forever, daemon=True).start()
+        return self.__tcp_server.server_address
+
+    def stop(self) -> None:
+        """
+        Stops serving TCP connections.
+
+        """
+        if self.__tcp_server is not None:
+            self.__tcp_server.shutdown()
+            self.__tcp_server.server_close()
+            self.__tcp_server = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def login(self, data: dict) -> tuple[LocalGame, PlayerDictTyping]:
+        """
+        Handles LOGIN request.
+
+        :param data: login info as for GameSession
+        :return: game the player has joined and the player
+        """
+        if not isinstance(data, dict) or "name" not in data:
+            raise RequestError(ResponseCode.BAD_COMMAND, "Field 'name' is required")
+
+        with self.__lock:
+            player_id = next(self.__player_ids)
+            game_name = data.get("game", f"game_{player_id}")
+            if game_name not in self.games:
+                num_players = data.get("num_players", DEFAULT_NUM_PLAYERS)
+                if num_players > len(self.game_map["spawn_points"]):
+                    raise RequestError(
+                        ResponseCode.BAD_COMMAND,
+                        f"Map has no spawn points for {num_players} players",
+                    )
+                self.games[game_name] = LocalGame(
+                    game_name,
+                    self.game_map,
+                    num_players,
+                    data.get("num_turns", DEFAULT_NUM_TURNS),
+                    self.turn_timeout,
+                )
+            game = self.games[game_name]
+
+        with game.condition:
+            return game, game.join(
+                player_id,
+                data["name"],
+                data.get("password", ""),
+                data.get("is_observer", False),
+            )
+
+    def remove_game(self, game: LocalGame) -> None:
+        """
+        Removes finished or abandoned game, so its name can be reused.
+
+        Sessions of the game's players keep working with it.
+        """
+        with self.__lock:
+            if self.games.get(game.name) is game:
+                del self.games[game.name]
+
+
+class LocalSession:
+    """
+    In-process connection to LocalServer.
+
+    Has the same get method as server_interaction.Session, so it can
+    be passed to GameSession instead of the real connection.
+    """
+
+    def __init__(self, server: LocalServer):
+        self.server = server
+        self.game: Optional[LocalGame] = None
+        self.player: Optional[PlayerDictTyping] = None
+
+    def handle(
+        self, action: Union[ActionCode, int], data: Optional[dict] = None
+    ) -> ResponseTyping:
+        """
+        Handles request and returns response code with response data.
+
+        """
+        try:
+            return ResponseCode.OK, self.__handle(ActionCode(action), data)
+        except RequestError as error:
+            return error.code, {"error_message": str(error)}
+        except ValueError:
+            return ResponseCode.BAD_COMMAND, {
+                "error_message": f"Unknown action {action}"
+            }
+
+    def get(self, action: Union[ActionCode, int], data: Optional[dict] = None) -> dict:
+        """
+        Returns response data, raises ResponseError if response code is not OK.
+
+        """
+        response_code, response = self.handle(action, data)
+        if response_code != ResponseCode.OK:
+            raise ResponseError(
+                f"Response code: {response_code}\n"
+                f'Error message: {response["error_message"]}\n'
+                f"Data that caused error: {action} {data}"
+            )
+        return response
+
+    def close(self) -> None:
+        """
+        Logs the player out if the session is closed without LOGOUT.
+
+        """
+        if self.game is not None:
+            self.handle(ActionCode.LOGOUT)
+
+    # pylint: disable=too-many-return-statements, too-many-branches
+    # One for every request type
+    def __handle(self, action: ActionCode, data: Optional[dict]) -> dict:
+        if action == ActionCode.LOGIN:
+            if self.game is not None:
+                raise RequestError(ResponseCode.BAD_COMMAND, "Already logged in")
+            self.game, self.player = self.server.login(data)
+            return self.player
+
+        if self.game is None:
+            raise RequestError(ResponseCode.ACCESS_DENIED, "Login is required")
+
+        game = self.game
+        with game.condition:
+            if action == ActionCode.MAP:
+                return game.game_map
+            if action == ActionCode.GAME_STATE:
+                return game.state()
+            if action == ActionCode.GAME_ACTIONS:
+                return {"actions": list(game.last_actions)}
+            if action == ActionCode.TURN:
+                game.turn(self.player["idx"])
+                if game.finished:
+                    self.server.remove_game(game)
+                return {}
+            if action in (ActionCode.MOVE, ActionCode.SHOOT):
+                if not isinstance(data, dict):
+                    raise RequestError(ResponseCode.BAD_COMMAND, "Payload is required")
+                game.action(self.player["idx"], action, data)
+                return {}
+            if action == ActionCode.CHAT:
+                return {}
+            if action == ActionCode.LOGOUT:
+                game.leave(self.player["idx"])
+                if not game.connected:
+                    self.server.remove_game(game)
+                self.game = self.player = None
+                return {}
+
+        raise RequestError(ResponseCode.BAD_COMMAND, f"Unknown action {action}")
+
+
+class _RequestHandler(socketserver.BaseRequestHandler):
+    """
+    Serves one TCP connection to LocalServer.
+
+    Message format is the same as in server_interaction.Session,
+    response is {response code (4 bytes)} + {data length (4 bytes)} +
+    {bytes of UTF-8 string with data in JSON format}.
+    """
+
+    def handle(self):
+        # Responses to pipelined requests mustn't wait for acknowledgement
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        session = self.server.local_server.connect()
+        try:
+            while True:
+                header = self.__recvall(HEADER.size)
+                if header is None:
+                    break
+                action, length = HEADER.unpack(header)
+                payload = self.__recvall(length) if length else b""
+                if payload is None:
+                    break
+
+                try:
+                    data = DEFAULT_CODEC.decode(payload) if payload else None
+                except ValueError:
+                    response_code, response = ResponseCode.BAD_COMMAND, {
+                        "error_message": "Payload is not valid JSON"
+                    }
+                else:
+                    response_code, response = session.handle(action, data)
+
+                self.request.sendall(encode_message(response_code, response))
+        finally:
+            session.close()
+
+    def __recvall(self, length: int) -> Optional[bytearray]:
+        result = bytearray(length)
+        view = memoryview(result)
+        received = 0
+        while received != length:
+            chunk_size = self.request.recv_into(view[received:])
+            if not chunk_size:
+                return None
+            received += chunk_size
+        return result
@@ -1,11 +1,26 @@
 """
 Contains data class describing game map.
 """
+from array import array
 
-from game_client.map_hexes import CONTENT_CLASSES, EmptyHex, Hex
+from game_client.hex_grid import HexGrid, HexKeyTyping, get_hex_grid
+from game_client.map_hexes import (CONTENT_CLASSES, Base, Catapult, EmptyHex,
+                                   HardRepair, Hex, LightRepair,
+                                   LimitedBonusHex)
 from utility.coordinates import Coords
 from utility.custom_typings import ContentDictTyping, MapDictTyping
 
+# Distance to hexes which can't be reached from any of the sources
+UNREACHABLE = -1
+
+# Hex types distances to which are precalculated on map creation
+DISTANCE_FIELD_SOURCES = (Base, LightRepair, HardRepair, Catapult)
+
+# Bit flags of GameMap.terrain array
+CAN_GO_THROUGH = 1
+CAN_SHOOT_THROUGH = 2
+CAN_STAY = 4
+
 
 class InvalidContentTypeError(Exception):
     """
@@ -20,21 +35,58 @@ class GameMap:
 
     Keep all the map's content in self.content dictionary
     with coordinates as keys.
-    Supports accessing content with self[key] syntax.
+    Supports accessing content with self[key] syntax, where key is
+    either coordinates or grid index of the hex.
+
+    The same data is kept in flat per-hex sequences indexed by
+    self.grid indexes: self.hexes with hex objects, self.terrain with
+    CAN_GO_THROUGH, CAN_SHOOT_THROUGH and CAN_STAY bit flags and
+    self.bonus_uses with uses left for LimitedBonusHex hexes.
+
+    Distances (with obstacles taken into account) from every hex
+    to the closest hex of each type from DISTANCE_FIELD_SOURCES
+    are calculated once on map creation.
     """
 
+    # pylint: disable=too-many-instance-attributes
+    # Nine is reasonable in this case.
     def __init__(self, game_map: MapDictTyping):
         self.map_radius: int = game_map["size"]
         self.map_name: str = game_map["name"]
+        self.grid: HexGrid = get_hex_grid(self.map_radius)
 
         self.content: dict[Coords, Hex] = {}
 
         self.__parse_content(game_map["content"])
 
+        self.hexes: list[Hex] = [
+            self.content.get(coords, EmptyHex()) for coords in self.grid.coords
+        ]
+        self.terrain: array = array(
+            "B", (self.__get_terrain_flags(map_hex) for map_hex in self.hexes)
+        )
+        self.bonus_uses: array = array(
+            "b",
+            (
+                map_hex.uses_left if isinstance(map_hex, LimitedBonusHex) else 0
+                for map_hex in self.hexes
+            ),
+        )
+        self.__initial_bonus_uses: array = array("b", self.bonus_uses)
+
+        self.__distance_fields: dict[type, array] = {
+            hex_type: self.__calculate_distance_field(hex_type)
+            for hex_type in DISTANCE_FIELD_SOURCES
+        }
+
     def __contains__(self, item: Coords):
         return item in self.content
 
-    def __getitem__(self, item):
+    def __getitem__(self, item: HexKeyTyping) -> Hex:
+        if isinstance(item, int):
+            return self.hexes[item]
+        if self.are_valid_coords(item):
+            return self.hexes[self.grid.index(item)]
         if item in self.content:
             return self.content[item]
         return EmptyHex()
@@ -53,6 +105,90 @@ class GameMap:
             for item in instances:
                 self.content[Coords(item)] = content_klass()
 
+    @staticmethod
+    def __get_terrain_flags(map_hex: Hex) -> int:
+        return (
+            CAN_GO_THROUGH * map_hex.can_go_through
+            | CAN_SHOOT_THROUGH * map_hex.can_shoot_through
+            | CAN_STAY * map_hex.can_stay
+        )
+
+    def use_bonus(self, coords: Coords) -> int:
+        """
+        Uses bonus of the hex at the given position.
+
+        :param coords: coordinates of LimitedBonusHex hex
+        :return: bonus if there were any uses left else 0
+        """
+        index = self.grid.index(coords)
+        if self.bonus_uses[index] > 0:
+            self.bonus_uses[index] -= 1
+        return self.hexes[index].use()
+
+    def set_bonus_usages(self, usages: list[Coords]) -> None:
+        """
+        Sets uses left for every LimitedBonusHex hex from the list of all usages.
+
+        :param usages: coordinates of hexes, one entry per usage
+        """
+        for index, uses in enumerate(self.__initial_bonus_uses):
+            if uses:
+                self.bonus_uses[index] = uses
+                self.hexes[index].uses_left = uses
+        for coords in usages:
+            self.use_bonus(coords)
+
+    def __calculate_distance_field(self, hex_type: type) -> array:
+        """
+        Runs multi-source BFS from every hex of the given type.
+
+        Only hexes that can be gone through are visited.
+
+        :param hex_type: one of the map_hexes classes
+        :return: array with distance to the closest hex of the given type
+            for every grid index or UNREACHABLE
+        """
+        distances = array("i", [UNREACHABLE]) * len(self.grid)
+        fringe: list[int] = []
+        for coords, map_hex in self.content.items():
+            if isinstance(map_hex, hex_type) and self.are_valid_coords(coords):
+                index = self.grid.index(coords)
+                distances[index] = 0
+                fringe.append(index)
+
+        distance = 0
+        while fringe:
+            distance += 1
+            next_fringe: list[int] = []
+            for index in fringe:
+                for neighbour in self.grid.neighbours[index]:
+                    if distances[neighbour] != UNREACHABLE:
+                        continue
+                    if not self.terrain[neighbour] & CAN_GO_THROUGH:
+                        continue
+                    distances[neighbour] = distance
+                    next_fringe.append(neighbour)
+            fringe = next_fringe
+
+        return distances
+
+    def distance_to(self, coords: Coords, hex_type: type = Base) -> int:
+        """
+        Returns length of the shortest path to the closest hex of given type.
+
+        :param coords: valid coordinates
+        :param hex_type: one of DISTANCE_FIELD_SOURCES
+        :return: distance in hexes or UNREACHABLE
+        """
+        return self.__distance_fields[hex_type][self.grid.index(coords)]
+
+    def distance_to_base(self, coords: Coords) -> int:
+        """
+        Returns length of the shortest path to the closest base hex.
+
+        """
+        return self.distance_to(coords, Base)
+
     def are_valid_coords(self, coords: Coords) -> bool:
         """
         Tells if hex with given coordinates is in map boundaries.
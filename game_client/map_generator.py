@@ -0,0 +1,185 @@
+"""
+Contains functions to generate game maps for local games.
+
+"""
+import random
+from typing import Iterable, Optional
+
+from game_client.map import UNREACHABLE, GameMap
+from utility.coordinates import Coords
+from utility.custom_typings import CoordsTupleTyping, MapDictTyping
+
+# Vehicles of every player in the order they are placed on the spawn line
+SPAWN_ORDER = ("medium_tank", "light_tank", "heavy_tank", "at_spg", "spg")
+
+MIN_MAP_SIZE = 5
+MAX_PLAYERS = 6
+
+
+def rotate(coordinates: CoordsTupleTyping, steps: int) -> CoordsTupleTyping:
+    """
+    Rotates coordinates around the map center.
+
+    :param coordinates: (x, y, z) coordinates
+    :param steps: amount of 60 degrees clockwise rotations
+    :return: rotated coordinates
+    """
+    # pylint: disable=invalid-name
+    # x, y, z are valid names
+    x, y, z = coordinates
+    for _ in range(steps % 6):
+        x, y, z = -z, -x, -y
+    return x, y, z
+
+
+def orbit(coordinates: CoordsTupleTyping) -> set[CoordsTupleTyping]:
+    """
+    Returns coordinates with all their rotations around the map center.
+
+    """
+    return {rotate(coordinates, steps) for steps in range(6)}
+
+
+# pylint: disable=too-many-arguments
+# Every map option is configurable
+def generate_map(
+    size: int = 11,
+    num_players: int = 3,
+    *,
+    obstacles: Optional[Iterable[CoordsTupleTyping]] = None,
+    obstacles_count: Optional[int] = None,
+    seed: Optional[int] = None,
+    name: str = "local_map",
+) -> MapDictTyping:
+    """
+    Generates map in the MAP response format.
+
+    Base is placed in the center, every player's spawn line lies on
+    its own edge of the map, repair hexes and catapults are placed
+    the same way as on the server's maps. Random obstacles are placed
+    symmetrically, so no player has an advantage, and never cut spawn
+    points off the base.
+
+    :param size: map radius as in the MAP response
+    :param num_players: amount of players to generate spawn points for
+    :param obstacles: exact obstacles layout, random one is used if None
+    :param obstacles_count: approximate amount of random obstacles,
+        defaults to the map size
+    :param seed: seed for random obstacles
+    :param name: name of the map
+    :return: map in the server format
+    """
+    if size < MIN_MAP_SIZE:
+        raise ValueError(f"Map size must be at least {MIN_MAP_SIZE}, got {size}")
+    if not 1 <= num_players <= MAX_PLAYERS:
+        raise ValueError(f"Amount of players must be from 1 to {MAX_PLAYERS}")
+
+    spawn_line = [
+        (x, -(size - 1) - x, size - 1)
+        for x in range(-(size - 1) // 2 - 2, -(size - 1) // 2 + 3)
+    ]
+    spawn_points = [
+        {
+            vehicle_type: [rotate(position, player * 6 // num_players)]
+            for vehicle_type, position in zip(SPAWN_ORDER, spawn_line)
+        }
+        for player in range(num_players)
+    ]
+
+    # Special hexes are on the same distance from the base as on 11-sized maps
+    dist = 2 * max(1, (size - 1) // 5)
+    half = dist // 2
+    content = {
+        "base": [(0, 0, 0)] + [rotate((1, -1, 0), steps) for steps in range(6)],
+        "light_repair": [(-dist, half, half), (dist, -half, -half)],
+        "hard_repair": [(half, -dist, half), (-half, dist, -half)],
+        "catapult": [(half, half, -dist), (-half, -half, dist)],
+    }
+
+    if obstacles is None:
+        obstacles = _generate_obstacles(
+            size,
+            spawn_points,
+            content,
+            size if obstacles_count is None else obstacles_count,
+            random.Random(seed),
+        )
+    content["obstacle"] = list(obstacles)
+
+    return {
+        "size": size,
+        "name": name,
+        "spawn_points": [
+            {
+                vehicle_type: [Coords(position).server_format for position in positions]
+                for vehicle_type, positions in player_spawn_points.items()
+            }
+            for player_spawn_points in spawn_points
+        ],
+        "content": {
+            content_type: [Coords(position).server_format for position in hexes]
+            for content_type, hexes in content.items()
+        },
+    }
+
+
+def _generate_obstacles(
+    size: int,
+    spawn_points: list[dict[str, list[CoordsTupleTyping]]],
+    content: dict[str, list[CoordsTupleTyping]],
+    obstacles_count: int,
+    rnd: random.Random,
+) -> list[CoordsTupleTyping]:
+    """
+    Adds random symmetric groups of obstacles while spawns can reach the base.
+
+    """
+    reserved = {
+        position
+        for player_spawn_points in spawn_points
+        for positions in player_spawn_points.values()
+        for position in positions
+    }
+    reserved.update(position for hexes in content.values() for position in hexes)
+    candidates = [
+        (x, y, -x - y)
+        for x in range(-size + 2, size - 1)
+        for y in range(max(-size + 2, -x - size + 2), min(size - 1, -x + size - 1))
+        if (x, y, -x - y) not in reserved
+    ]
+    rnd.shuffle(candidates)
+
+    obstacles: set[CoordsTupleTyping] = set()
+    for candidate in candidates:
+        if len(obstacles) >= obstacles_count:
+            break
+        group = orbit(candidate)
+        if candidate in obstacles or group & reserved:
+            continue
+
+        game_map = GameMap(
+            {
+                "size": size,
+                "name": "",
+                "spawn_points": [],
+                "content": {
+                    content_type: [Coords(position).server_format for position in hexes]
+                    for content_type, hexes in content.items()
+                }
+                | {
+                    "obstacle": [
+                        Coords(position).server_format
+                        for position in obstacles | group
+                    ]
+                },
+            }
+        )
+        if all(
+            game_map.distance_to_base(Coords(position)) != UNREACHABLE
+            for player_spawn_points in spawn_points
+            for positions in player_spawn_points.values()
+            for position in positions
+        ):
+            obstacles |= group
+
+    return sorted(obstacles)
@@ -1,7 +1,7 @@
 """
 Contains Player class.
 """
-from typing import Iterator
+from typing import Iterator, Optional
 
 from game_client.vehicles import TYPE_ORDER, Vehicle
 from utility.custom_typings import (AttackMatrixDictTyping, PlayerDictTyping,
@@ -37,16 +37,21 @@ class Player:
         self.vehicles.append(vehicle)
 
     def update(
-        self, win_points: WinPointsDictTyping, attack_matrix: AttackMatrixDictTyping
+        self,
+        win_points: WinPointsDictTyping,
+        attack_matrix: Optional[AttackMatrixDictTyping],
     ) -> None:
         """
         Updates info about player.
 
         :param win_points: win points of the player
-        :param attack_matrix: piece of GAME_STATE response from the server
+        :param attack_matrix: piece of GAME_STATE response from the server,
+            None if it hasn't changed since the previous update
         """
-        self.win_points = win_points
-        self.__update_can_attack_ids(attack_matrix)
+        # Copied as simulated actions change win points of the player
+        self.win_points = dict(win_points)
+        if attack_matrix is not None:
+            self.__update_can_attack_ids(attack_matrix)
 
     @property
     def ordered_vehicle_iter(self) -> Iterator[Vehicle]:
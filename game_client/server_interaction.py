@@ -3,18 +3,25 @@ Contains classes and enums needed to interact with the server.
 
 """
 
-import json
 import socket
 import struct
+import threading
+from contextlib import contextmanager
 from enum import IntEnum
-from typing import Optional, Union
+from typing import Iterator, Optional, Union
 
+from game_client.json_codec import JsonCodec, get_codec
 from utility.custom_typings import (CoordsDictTyping, GameStateDictTyping,
                                     MapDictTyping, PlayerDictTyping)
+from utility.profiler import profiler
 
 HOST = "wgforge-srv.wargaming.net"
 PORT = 443
 
+# Code and data length of every message
+HEADER = struct.Struct("<ii")
+INITIAL_BUFFER_SIZE = 64 * 1024
+
 
 class ActionCode(IntEnum):
     """
@@ -60,6 +67,71 @@ class WrongPayloadFormatError(Exception):
     """
 
 
+# Typings of successful responses, codecs that support it decode
+# responses straight into them
+RESPONSE_TYPES: dict[ActionCode, type] = {
+    ActionCode.LOGIN: PlayerDictTyping,
+    ActionCode.MAP: MapDictTyping,
+    ActionCode.GAME_STATE: GameStateDictTyping,
+}
+
+# The fastest of the available codecs
+DEFAULT_CODEC: JsonCodec = get_codec()
+
+
+def encode_message(
+    code: int, data: Optional[dict] = None, codec: JsonCodec = DEFAULT_CODEC
+) -> bytes:
+    """
+    Creates message in client-server format.
+
+    :param code: action code of request or response code of response
+    :param data: payload
+    :param codec: JSON codec for the payload
+    :return: header and payload encoded to JSON once
+    """
+    if data is None:
+        return HEADER.pack(code, 0)
+
+    payload = codec.encode(data)
+    return HEADER.pack(code, len(payload)) + payload
+
+
+def action_name(action: Union[ActionCode, int]) -> str:
+    """
+    Returns name of the action code, or the code itself if it is unknown.
+
+    """
+    try:
+        return ActionCode(action).name
+    except ValueError:
+        return str(action)
+
+
+def validate_login_info(login_info: dict):
+    """
+    Makes sure that login info has valid format.
+
+    """
+    valid_fields = (
+        "name",
+        "password",
+        "game",
+        "num_turns",
+        "num_players",
+        "is_observer",
+    )
+
+    if "name" not in login_info:
+        raise WrongPayloadFormatError("Field 'name' is required.")
+
+    for var in login_info.keys():
+        if var not in valid_fields:
+            raise WrongPayloadFormatError(
+                f"Field {var}: {login_info[var]} is not valid login field."
+            )
+
+
 class Session:
     """
     Provides server interface.
@@ -73,43 +145,45 @@ class Session:
     {bytes of UTF-8 string with data in JSON format}
     """
 
-    def __init__(self, host: str, port: int):
+    def __init__(self, host: str, port: int, codec: JsonCodec = DEFAULT_CODEC):
+        """
+        :param codec: JSON codec for requests and responses
+        """
+        self.codec = codec
         self.server_details = (host, port)
         self.client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         # As one game round is 10s + 1s for latencies
         self.client_socket.settimeout(11)
         self.client_socket.connect(self.server_details)
+        # Responses are received into this buffer, it grows for larger ones
+        self.__buffer = bytearray(INITIAL_BUFFER_SIZE)
 
     def __del__(self):
-        self.client_socket.close()
+        self.close()
 
-    def __recvall(self, length):
+    def close(self) -> None:
         """
-        Calls socket.recv method until exactly length bytes are received.
+        Closes the connection.
 
         """
-        result = b""
-        while len(result) != length:
-            result += self.client_socket.recv(length - len(result))
-
-        return result
+        self.client_socket.close()
 
-    @staticmethod
-    def __generate_message(code: int, data: Optional[dict] = None) -> bytes:
+    def __receive(self, length: int) -> memoryview:
         """
-        Creates bytes string based on action code and data.
+        Receives exactly length bytes into the reusable buffer.
 
-        :param code: action code
-        :param data: payload
-        :return: bytes string in server format
+        Returned view is valid until the next call.
         """
-        if data is None:
-            return struct.pack("<ii", code, 0)
-
-        data_length = len(str(data))
-        return struct.pack(
-            f"<ii{data_length}s", code, data_length, json.dumps(data).encode("utf-8")
-        )
+        if length > len(self.__buffer):
+            self.__buffer = bytearray(max(length, 2 * len(self.__buffer)))
+        view = memoryview(self.__buffer)[:length]
+        received = 0
+        while received < length:
+            chunk_length = self.client_socket.recv_into(view[received:])
+            if not chunk_length:
+                raise ConnectionError("Connection is closed by the server")
+            received += chunk_length
+        return view
 
     def get(self, action: Union[ActionCode, int], data: Optional[dict] = None) -> dict:
         """
@@ -125,15 +199,22 @@ class Session:
         :return: 'data' part of response from server
         """
 
-        message = self.__generate_message(action, data)
-        self.client_socket.sendall(message)
+        with profiler.measure("session", action_name(action)):
+            self.client_socket.sendall(encode_message(action, data, self.codec))
 
-        response_code, received_data_len = struct.unpack("<ii", self.__recvall(8))
-        received_data = (
-            {}
-            if received_data_len == 0
-            else json.loads(self.__recvall(received_data_len))
-        )
+            response_code, received_data_len = HEADER.unpack(
+                self.__receive(HEADER.size)
+            )
+            received_data = (
+                {}
+                if received_data_len == 0
+                else self.codec.decode(
+                    self.__receive(received_data_len),
+                    RESPONSE_TYPES.get(action)
+                    if response_code == ResponseCode.OK
+                    else None,
+                )
+            )
 
         if response_code != ResponseCode.OK:
             raise ResponseError(
@@ -151,8 +232,21 @@ class GameSession:
 
     """
 
-    def __init__(self, **login_info):
+    def __init__(
+        self,
+        host: str = HOST,
+        port: int = PORT,
+        session: Optional[Session] = None,
+        game_map: Optional[MapDictTyping] = None,
+        **login_info,
+    ):
         """
+        :param host: server's host
+        :param port: server's port
+        :param session: already established connection to use instead
+            of connecting to host and port, e.g. LocalSession
+        :param game_map: map of the game if it's already known,
+            MAP request is skipped then
 
         Login info is expected to have:
         :param name: player's name
@@ -169,39 +263,17 @@ class GameSession:
         :param is_observer: defines if player connect to server just for
             watching. Default: false.
         """
-        self.__validate_login_info(login_info)
+        validate_login_info(login_info)
 
-        self.server: Session = Session(HOST, PORT)
+        self.server: Session = Session(host, port) if session is None else session
         login_response: PlayerDictTyping = self.server.get(ActionCode.LOGIN, login_info)
 
         self.player_id: int = login_response["idx"]
         self.player_name: str = login_response["name"]
-        self.map: MapDictTyping = self.server.get(ActionCode.MAP)
-
-    @staticmethod
-    def __validate_login_info(login_info: dict):
-        """
-        Makes sure that login info has valid format.
-
-        """
-        valid_fields = (
-            "name",
-            "password",
-            "game",
-            "num_turns",
-            "num_players",
-            "is_observer",
+        self.map: MapDictTyping = (
+            self.server.get(ActionCode.MAP) if game_map is None else game_map
         )
 
-        if "name" not in login_info:
-            raise WrongPayloadFormatError("Field 'name' is required.")
-
-        for var in login_info.keys():
-            if var not in valid_fields:
-                raise WrongPayloadFormatError(
-                    f"Field {var}: {login_info[var]} is not valid login field."
-                )
-
     def game_state(self) -> GameStateDictTyping:
         """
         GAME_STATE server request.
@@ -252,3 +324,128 @@ class GameSession:
 
         """
         return self.server.get(ActionCode.LOGOUT)
+
+
+class SessionPool:
+    """
+    Keeps connections to the server and reuses them for new games.
+
+    Game sessions are logged in over idle connections when there are
+    any. A released session logs out, and its connection becomes idle
+    again. The map of a named game is requested once while the game has
+    sessions in the pool, and it is shared by them. Connections are
+    closed by the close method or on exit from a with statement. The
+    pool can be used from multiple threads.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+    # Eight is reasonable in this case.
+    def __init__(
+        self,
+        host: str = HOST,
+        port: int = PORT,
+        codec: JsonCodec = DEFAULT_CODEC,
+        max_idle: int = 8,
+    ):
+        """
+        :param host: server's host
+        :param port: server's port
+        :param codec: JSON codec of the connections
+        :param max_idle: amount of idle connections kept open
+        """
+        self.server_details = (host, port)
+        self.codec = codec
+        self.max_idle = max_idle
+        self.opened_connections = 0
+        self.__idle: list[Session] = []
+        # Game name -> (map, amount of acquired sessions of the game)
+        self.__games: dict[str, tuple[MapDictTyping, int]] = {}
+        self.__game_names: dict[GameSession, Optional[str]] = {}
+        self.__lock = threading.Lock()
+
+    def acquire(self, **login_info) -> GameSession:
+        """
+        Logs in and returns game session, login info is the same as in GameSession.
+
+        """
+        validate_login_info(login_info)
+        game_name = login_info.get("game")
+        with self.__lock:
+            game_map = self.__games.get(game_name, (None, 0))[0]
+            session = self.__idle.pop() if self.__idle else None
+            if session is None:
+                self.opened_connections += 1
+        if session is None:
+            session = Session(*self.server_details, self.codec)
+
+        try:
+            game = GameSession(session=session, game_map=game_map, **login_info)
+        except ResponseError:
+            # Connection is still usable if login was rejected
+            self.__put_idle(session)
+            raise
+        except OSError:
+            session.close()
+            raise
+
+        with self.__lock:
+            self.__game_names[game] = game_name
+            if game_name is not None:
+                _, sessions = self.__games.get(game_name, (None, 0))
+                self.__games[game_name] = (game.map, sessions + 1)
+        return game
+
+    def release(self, game: GameSession) -> None:
+        """
+        Logs the game session out and keeps its connection for the next games.
+
+        """
+        with self.__lock:
+            game_name = self.__game_names.pop(game)
+            if game_name in self.__games:
+                game_map, sessions = self.__games.pop(game_name)
+                # Game name can be taken by a new game with another map
+                if sessions > 1:
+                    self.__games[game_name] = (game_map, sessions - 1)
+
+        try:
+            game.logout()
+        except (ResponseError, OSError):
+            game.server.close()
+            return
+        self.__put_idle(game.server)
+
+    @contextmanager
+    def game_session(self, **login_info) -> Iterator[GameSession]:
+        """
+        Acquires game session and releases it on exit from with statement.
+
+        """
+        game = self.acquire(**login_info)
+        try:
+            yield game
+        finally:
+            self.release(game)
+
+    def close(self) -> None:
+        """
+        Closes idle connections.
+
+        """
+        with self.__lock:
+            idle, self.__idle = self.__idle, []
+        for session in idle:
+            session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __put_idle(self, session: Session) -> None:
+        with self.__lock:
+            if len(self.__idle) < self.max_idle:
+                self.__idle.append(session)
+                return
+        session.close()
@@ -0,0 +1,51 @@
+"""
+Tests for game_client.action_codec module.
+"""
+# pylint: disable=missing-class-docstring, missing-function-docstring
+from test.test_simulator import new_game, place
+
+import pytest
+
+from game_client.action_codec import (TURN_CODE, codes_from_bytes,
+                                      codes_to_bytes, decode_action,
+                                      encode_action)
+from game_client.actions import Action
+from game_client.server_interaction import ActionCode
+from utility.coordinates import Coords
+
+
+class TestActionCodec:
+    def test_roundtrip(self):
+        game_state = new_game()
+        place(game_state, {1: (-2, 0, 2), 2: (0, 0, 0), 3: (0, 2, -2)})
+        vehicles = game_state.vehicles_by_id
+        grid = game_state.game_map.grid
+        actions = [
+            Action(ActionCode.MOVE, vehicles[1], Coords((-3, 0, 3))),
+            Action(ActionCode.SHOOT, vehicles[1], Coords((0, 0, 0)), [vehicles[2]]),
+            Action(
+                ActionCode.SHOOT,
+                vehicles[1],
+                Coords((0, 0, 0)),
+                [vehicles[2], vehicles[3]],
+            ),
+        ]
+        for action in actions:
+            decoded = decode_action(encode_action(action, grid), game_state)
+            assert decoded == action
+            assert decoded.affected_vehicles == action.affected_vehicles
+
+    def test_bytes(self):
+        codes = [TURN_CODE, 1 << 40, 5]
+        data = codes_to_bytes(codes)
+        assert len(data) == 8 * len(codes), "Every action takes 8 bytes"
+        assert list(codes_from_bytes(data)) == codes
+
+    def test_too_big_vehicle_id(self):
+        game_state = new_game()
+        actor = game_state.vehicles_by_id[1]
+        actor.vehicle_id = 40
+        with pytest.raises(ValueError):
+            encode_action(
+                Action(ActionCode.MOVE, actor, actor.position), game_state.game_map.grid
+            )
@@ -0,0 +1,112 @@
+"""
+Tests for bot.action_estimator.ActionEstimator class.
+"""
+# pylint: disable=missing-class-docstring, missing-function-docstring
+from test.test_hex_grid import MAP_DATA
+
+import numpy as np
+import pytest
+
+from benchmarks.corpus import load_corpus
+from bot.action_estimator import (FEATURES_COUNT, FEATURES_NAMES,
+                                  ActionEstimator)
+from bot.actions_generator import ActionsGenerator
+from bot.bot_game_state import BotGameState
+from bot.step_score_bot import OPTIMAL_WEIGHTS
+from game_client.map import UNREACHABLE
+from game_client.server_interaction import ActionCode
+from utility.coordinates import Coords
+
+CORPUS = load_corpus()
+
+
+def corpus_actions(state: dict) -> tuple[BotGameState, list]:
+    game_state = BotGameState(CORPUS["maps"][state["map"]])
+    game_state.update(state["game_state"])
+    actions_generator = ActionsGenerator(game_state)
+    actions = [
+        action
+        for vehicle in game_state.current_player.vehicles
+        if vehicle.hp > 0
+        for action in actions_generator(vehicle)
+    ]
+    return game_state, actions
+
+
+def expected_features(estimator: ActionEstimator, action) -> dict[str, float]:
+    actor = action.actor
+    if action.action_code == ActionCode.MOVE:
+        position = action.target
+        targets = 0
+    else:
+        position = actor.position
+        targets = estimator.estimate_targets(actor.damage, action.affected_vehicles)
+    return {
+        "enemy_atk_to_hp_ratio": estimator.enemy_atk_to_hp_ratio(actor, position),
+        "distance_to_base": estimator.distance_to_base(position),
+        "gained_capture_points": estimator.gained_capture_points(actor, position),
+        "estimate_targets": targets,
+        "score_for_special_hexes": estimator.score_for_special_hexes(actor, position),
+    }
+
+
+class TestActionEstimator:
+    def test_score_batch(self):
+        for state in CORPUS["states"]:
+            game_state, actions = corpus_actions(state)
+            estimator = ActionEstimator(game_state, OPTIMAL_WEIGHTS)
+            assert estimator.score_batch(actions).tolist() == pytest.approx(
+                [estimator(action) for action in actions]
+            )
+
+    def test_features_order(self):
+        codes = set()
+        for state in CORPUS["states"]:
+            game_state, actions = corpus_actions(state)
+            codes.update(action.action_code for action in actions)
+            estimator = ActionEstimator(game_state, OPTIMAL_WEIGHTS)
+            features = estimator.features_batch(actions)
+            assert features.shape == (len(actions), FEATURES_COUNT)
+            expected = [expected_features(estimator, action) for action in actions]
+            for row, action_features in zip(features, expected):
+                assert row.tolist() == pytest.approx(
+                    [action_features[name] for name in FEATURES_NAMES]
+                )
+
+            for column, name in enumerate(FEATURES_NAMES):
+                weights = [0.0] * FEATURES_COUNT
+                weights[column] = 1.0
+                assert ActionEstimator(game_state, weights).score_batch(
+                    actions
+                ).tolist() == pytest.approx(
+                    [action_features[name] for action_features in expected]
+                ), f"Weight {column} must modify {name}"
+        assert codes == {ActionCode.MOVE, ActionCode.SHOOT}
+
+    def test_score_features(self):
+        weights = [0.5, -2.0, 3.0, 0.25, -1.0]
+        for state in CORPUS["states"]:
+            game_state, actions = corpus_actions(state)
+            features = ActionEstimator(game_state, OPTIMAL_WEIGHTS).features_batch(
+                actions
+            )
+            other = ActionEstimator(game_state, weights)
+            assert ActionEstimator.score_features(
+                features, weights
+            ).tolist() == pytest.approx([other(action) for action in actions])
+            assert np.array_equal(
+                ActionEstimator.score_features(features, np.zeros(FEATURES_COUNT)),
+                np.zeros(len(actions)),
+            )
+
+    def test_unreachable_base(self):
+        estimator = ActionEstimator(BotGameState(MAP_DATA), OPTIMAL_WEIGHTS)
+        game_map = estimator.game_state.game_map
+        distances = [
+            estimator.distance_to_base(coords)
+            for coords in game_map.grid.coords
+            if game_map.distance_to_base(coords) != UNREACHABLE
+        ]
+        assert estimator.distance_to_base(Coords((2, -2, 0))) > max(
+            distances
+        ), "Hex without path to the base must be the farthest one"
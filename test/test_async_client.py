@@ -0,0 +1,115 @@
+"""
+Tests for game_client.async_client module.
+"""
+# pylint: disable=missing-class-docstring, missing-function-docstring
+import asyncio
+
+import pytest
+
+from bot.step_score_bot import StepScoreBot
+from game_client.async_client import (AsyncGameSession, AsyncSession,
+                                      async_game_loop)
+from game_client.local_server import LocalServer
+from game_client.map_generator import generate_map
+from game_client.server_interaction import (HEADER, ActionCode, ResponseCode,
+                                            ResponseError,
+                                            WrongPayloadFormatError)
+
+
+async def play(host: str, port: int, num_players: int) -> list[dict]:
+    games = await asyncio.gather(
+        *(
+            AsyncGameSession.connect(
+                host, port, name=f"p{i}", game="g", num_players=num_players
+            )
+            for i in range(num_players)
+        )
+    )
+    try:
+        return await asyncio.gather(
+            *(async_game_loop(StepScoreBot(game.map), game) for game in games)
+        )
+    finally:
+        for game in games:
+            await game.close()
+
+
+async def pipelined_requests(host: str, port: int) -> tuple:
+    session = await AsyncSession.connect(host, port)
+    login = session.request(ActionCode.LOGIN, {"name": "p", "game": "pipelined"})
+    wrong_action = session.request(
+        ActionCode.MOVE, {"vehicle_id": 100, "target": {"x": 0, "y": 0, "z": 0}}
+    )
+    unknown_action = session.request(999)
+    game_map = session.request(ActionCode.MAP)
+    await session.writer.drain()
+    try:
+        return await asyncio.gather(
+            login, wrong_action, unknown_action, game_map, return_exceptions=True
+        )
+    finally:
+        await session.close()
+
+
+def response(payload: bytes) -> bytes:
+    return HEADER.pack(ResponseCode.OK, len(payload)) + payload
+
+
+async def broken_server_requests(responses: bytes) -> tuple:
+    async def handle(reader, writer):
+        await reader.readexactly(HEADER.size)
+        writer.write(responses)
+        await writer.drain()
+        await reader.read()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    session = await AsyncSession.connect(*server.sockets[0].getsockname()[:2])
+    try:
+        requests = [session.request(ActionCode.MAP), session.request(ActionCode.TURN)]
+        await session.writer.drain()
+        results = await asyncio.gather(*requests, return_exceptions=True)
+        while not session.writer.is_closing():
+            await asyncio.sleep(0.01)
+        with pytest.raises(ConnectionError):
+            session.request(ActionCode.GAME_STATE)
+        return tuple(results)
+    finally:
+        await session.close()
+        server.close()
+        await server.wait_closed()
+
+
+class TestAsyncClient:
+    def test_games_on_one_loop(self):
+        with LocalServer(generate_map(size=7, seed=0)) as server:
+            host, port = server.start()
+            game_states = asyncio.run(play(host, port, 3))
+        assert all(game_state["finished"] for game_state in game_states)
+        assert len({game_state["winner"] for game_state in game_states}) == 1
+
+    def test_responses_order(self):
+        with LocalServer(generate_map(size=7, seed=0)) as server:
+            host, port = server.start()
+            login, wrong_action, unknown_action, game_map = asyncio.run(
+                pipelined_requests(host, port)
+            )
+        assert login["name"] == "p"
+        assert isinstance(wrong_action, ResponseError)
+        assert isinstance(unknown_action, ResponseError)
+        assert "Unknown action 999" in str(unknown_action)
+        assert game_map["size"] == 7, "Errors must not shift responses"
+
+    def test_invalid_response(self):
+        results = asyncio.run(broken_server_requests(response(b'{"size": ')))
+        for result in results:
+            assert isinstance(result, ConnectionError), "Connection must be closed"
+            assert isinstance(result.__cause__, ValueError)
+
+    def test_unsolicited_response(self):
+        results = asyncio.run(broken_server_requests(response(b"{}") * 3))
+        assert results == ({}, {}), "Requests answered before must succeed"
+
+    def test_login_validation(self):
+        with pytest.raises(WrongPayloadFormatError):
+            asyncio.run(AsyncGameSession.connect("127.0.0.1", 1, password="no name"))
@@ -0,0 +1,26 @@
+"""
+Tests for benchmarks.bot_benchmark module.
+"""
+# pylint: disable=missing-class-docstring, missing-function-docstring
+from benchmarks.bot_benchmark import check_thresholds, run_benchmarks
+from benchmarks.corpus import load_corpus
+
+
+class TestBotBenchmark:
+    def test_run_benchmarks(self):
+        corpus = load_corpus()
+        corpus["states"] = corpus["states"][:1]
+        results = run_benchmarks(corpus, repeats=1)
+        assert "game_state.update" in results
+        assert "step_score_bot.get_actions" in results
+        assert all(
+            list(durations) == [corpus["states"][0]["name"]]
+            for durations in results.values()
+        ), "Every case must be measured on the corpus state"
+
+    def test_check_thresholds(self):
+        results = {"case": {"fast": 1.0, "slow": 3.0, "new": 5.0}}
+        thresholds = {"case": {"fast": 2.0, "slow": 2.0}}
+        regressions = check_thresholds(results, thresholds)
+        assert len(regressions) == 1
+        assert regressions[0].startswith("case on slow")
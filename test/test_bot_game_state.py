@@ -0,0 +1,96 @@
+"""
+Tests for reverting actions of bot.bot_game_state.BotGameState.
+"""
+# pylint: disable=missing-class-docstring, missing-function-docstring
+from test.test_game_state import assert_same_state
+from test.test_simulator import MAP_DATA, PLAYERS
+
+from bot.bot_game_state import BotGameState
+from bot.mcst.mcst_bot_game_state import initial_game_state
+from game_client.actions import Action
+from game_client.server_interaction import ActionCode
+from utility.coordinates import Coords
+
+
+def new_state(data: dict) -> BotGameState:
+    game_state = BotGameState(MAP_DATA)
+    game_state.update(data)
+    return game_state
+
+
+def battle_data() -> dict:
+    data = initial_game_state(MAP_DATA, PLAYERS, 45)
+    data["vehicles"]["1"]["position"] = Coords((0, 0, 0)).server_format
+    data["vehicles"]["1"]["shoot_range_bonus"] = 1
+    data["vehicles"]["2"]["position"] = Coords((2, 0, -2)).server_format
+    data["vehicles"]["2"]["health"] = 1
+    data["vehicles"]["3"]["position"] = Coords((0, 2, -2)).server_format
+    data["attack_matrix"] = {"1": [2], "2": [], "3": []}
+    return data
+
+
+def make_actions(game_state: BotGameState) -> list[Action]:
+    tank, target, other = (game_state.vehicles_by_id[i] for i in (1, 2, 3))
+    return [
+        Action(ActionCode.MOVE, tank, Coords((1, 0, -1))),
+        Action(ActionCode.SHOOT, tank, target.position, [target]),
+        Action(ActionCode.MOVE, other, Coords((-1, 2, -1))),
+    ]
+
+
+def state_after(data: dict, count: int) -> BotGameState:
+    game_state = new_state(data)
+    for action in make_actions(game_state)[:count]:
+        game_state.update_from_action(action)
+    return game_state
+
+
+def assert_same_bonuses(game_state: BotGameState, expected: BotGameState) -> None:
+    for vehicle_id, vehicle in expected.vehicles_by_id.items():
+        assert (
+            game_state.vehicles_by_id[vehicle_id].shoot_range_bonus
+            == vehicle.shoot_range_bonus
+        )
+    for player_id, player in expected.players.items():
+        assert game_state.players[player_id].win_points == player.win_points
+
+
+class TestUndo:
+    def test_push_and_pop(self):
+        data = battle_data()
+        game_state = new_state(data)
+        # Caches are built before actions, so they must be kept up to date
+        for vehicle in game_state.vehicles_by_id.values():
+            game_state.reachable_hexes(vehicle)
+        assert game_state.threat_map.threat(
+            1, game_state.game_map.grid.index(Coords((1, 0, -1)))
+        ), "Vehicle 2 threatens the hex vehicle 1 moves to"
+
+        actions = make_actions(game_state)
+        tank, target = actions[1].actor, actions[1].affected_vehicles[0]
+        for count, action in enumerate(actions, 1):
+            game_state.push_action(action)
+            assert game_state.undo_depth == count
+            assert_same_state(game_state, state_after(data, count))
+            assert_same_bonuses(game_state, state_after(data, count))
+        assert tank.shoot_range_bonus == 0
+        assert target.hp == 0
+        assert game_state.players[1].win_points["kill"] == target.max_hp
+
+        for count in reversed(range(len(actions))):
+            assert game_state.pop_action() is actions[count]
+            assert game_state.undo_depth == count
+            assert_same_state(game_state, state_after(data, count))
+            assert_same_bonuses(game_state, state_after(data, count))
+        assert tank.shoot_range_bonus == 1
+        assert target.hp == 1
+        assert game_state.players[1].win_points["kill"] == 0
+
+    def test_update_resets_undo_log(self):
+        data = battle_data()
+        game_state = new_state(data)
+        game_state.push_action(make_actions(game_state)[0])
+        assert game_state.undo_depth == 1
+        game_state.update(data)
+        assert game_state.undo_depth == 0
+        assert_same_state(game_state, new_state(data))
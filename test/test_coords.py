@@ -3,6 +3,8 @@ Test for utility.coords.Coords class.
 """
 # pylint: disable=missing-class-docstring, missing-function-docstring, no-self-use
 # Don't think that it is really needed here
+import pickle
+
 from utility.coordinates import Coords
 from bot.mcst.mcst import MonteCarloSearchTree
 
@@ -118,3 +120,20 @@ class TestCoords:
             "y": 0,
             "z": 0,
         }, "server_format must be {'x': x, 'y': y, 'z': z}"
+
+    def test_interned_instances_are_shared(self):
+        Coords.intern_radius(3)
+        assert Coords((1, -1, 0)) is Coords(
+            {"x": 1, "y": -1, "z": 0}
+        ), "Coords within interned radius must be the same instance"
+        assert Coords((1, -1, 0)) + Coords((0, 1, -1)) is Coords((1, 0, -1))
+
+    def test_has_no_dict(self):
+        assert not hasattr(
+            Coords((1, -1, 0)), "__dict__"
+        ), "Coords must use __slots__ instead of __dict__"
+
+    def test_pickle(self):
+        coords = Coords((100, -50, -50))
+        assert pickle.loads(pickle.dumps(coords)) == coords
+        assert hash(pickle.loads(pickle.dumps(coords))) == hash(coords)
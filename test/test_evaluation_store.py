@@ -0,0 +1,51 @@
+"""
+Tests for utility.evaluation_store.EvaluationStore class.
+"""
+# pylint: disable=missing-class-docstring, missing-function-docstring
+from utility.evaluation_store import EvaluationStore
+
+
+class TestEvaluationStore:
+    def test_accumulation(self, tmp_path):
+        path = str(tmp_path / "store.sqlite3")
+        with EvaluationStore(path) as store:
+            store.add((1.0, 2.0), "opponents", wins=1)
+            store.add((1.0001, 2.0), "opponents", loses=1)
+            store.add((1.0, 2.0), "other opponents", draws=1)
+
+        with EvaluationStore(path) as store:
+            evaluation = store.get((1.0, 2.0), "opponents")
+        assert (
+            evaluation.wins,
+            evaluation.draws,
+            evaluation.loses,
+        ) == (1, 0, 1), "Results of quantized weights must be kept between runs"
+        assert evaluation.value == 0.5
+
+    def test_missing_directory(self, tmp_path):
+        path = tmp_path / "weights" / "store.sqlite3"
+        with EvaluationStore(str(path)) as store:
+            store.add((1.0, 2.0), "opponents", wins=1)
+        assert path.exists()
+
+    def test_unknown_weights(self, tmp_path):
+        with EvaluationStore(str(tmp_path / "store.sqlite3")) as store:
+            evaluation = store.get((1.0, 2.0), "opponents")
+        assert evaluation.games == 0
+        assert evaluation.value == 0.5, "Unknown weights must be valued as a draw"
+
+    def test_top(self, tmp_path):
+        with EvaluationStore(str(tmp_path / "store.sqlite3")) as store:
+            store.add((1.0,), "opponents", wins=3, loses=1)
+            store.add((2.0,), "opponents", wins=1)
+            store.add((3.0,), "opponents", loses=4)
+            store.add((4.0,), "opponents", draws=1)
+            assert [evaluation.weights for evaluation in store.top(3, "opponents")] == [
+                (2.0,),
+                (1.0,),
+                (4.0,),
+            ]
+            assert [
+                evaluation.weights
+                for evaluation in store.top(3, "opponents", min_games=2)
+            ] == [(1.0,), (3.0,)], "Weights with few games must be ignored"
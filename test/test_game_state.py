@@ -0,0 +1,95 @@
+"""
+Tests for game_client.game_state.GameState delta updates.
+"""
+# pylint: disable=missing-class-docstring, missing-function-docstring
+import random
+from test.test_simulator import MAP_DATA, PLAYERS, new_game
+
+from bot.actions_generator import ActionsGenerator
+from bot.bot_game_state import BotGameState
+from bot.mcst.mcst_bot_game_state import initial_game_state
+from game_client.game_state import StateChanges
+from utility.coordinates import Coords
+
+
+def assert_same_state(game_state: BotGameState, expected: BotGameState) -> None:
+    for vehicle_id, vehicle in expected.vehicles_by_id.items():
+        actual = game_state.vehicles_by_id[vehicle_id]
+        assert (actual.position, actual.hp, actual.capture_points) == (
+            vehicle.position,
+            vehicle.hp,
+            vehicle.capture_points,
+        )
+        assert game_state.reachable_hexes(actual) == expected.reachable_hexes(vehicle)
+    assert game_state.vehicles.keys() == expected.vehicles.keys()
+    assert game_state.occupancy == expected.occupancy
+    for player_id, player in expected.players.items():
+        assert sorted(game_state.players[player_id].can_attack_ids) == sorted(
+            player.can_attack_ids
+        )
+        for index in range(len(expected.game_map.grid)):
+            assert game_state.threat_map.threat(
+                player_id, index
+            ) == expected.threat_map.threat(player_id, index), "Stale threat map"
+
+
+class TestStateChanges:
+    def test_changes(self):
+        game_state = BotGameState(MAP_DATA)
+        data = initial_game_state(MAP_DATA, PLAYERS, 45)
+        assert game_state.update(data).created == {1, 2, 3}
+        assert game_state.update(data) == StateChanges(), "Nothing has changed"
+
+        # Vehicle 1 takes the hex vehicle 2 has left
+        data["vehicles"]["1"]["position"] = data["vehicles"]["2"]["position"]
+        data["vehicles"]["2"]["position"] = Coords((0, 0, 0)).server_format
+        data["vehicles"]["3"]["health"] = 1
+        changes = game_state.update(data)
+        assert changes.moved == {1, 2}
+        assert changes.damaged == {3}
+        assert changes.changed == {1, 2, 3}
+        assert game_state.vehicle_at(Coords((4, 0, -4))) is game_state.vehicles_by_id[1]
+        assert game_state.vehicle_at(Coords((0, 0, 0))) is game_state.vehicles_by_id[2]
+        assert game_state.vehicle_at(Coords((-4, 0, 4))) is None
+        assert len(game_state.vehicles) == 3
+
+        data["vehicles"]["3"]["health"] = 2
+        data["vehicles"]["2"]["health"] = 0
+        changes = game_state.update(data)
+        assert changes.repaired == {3} and changes.damaged == {2}
+        data["vehicles"]["2"]["health"] = 2
+        data["vehicles"]["2"]["position"] = data["vehicles"]["2"]["spawn_position"]
+        changes = game_state.update(data)
+        assert changes.respawned == {2} and changes.moved == {2}
+        assert not changes.repaired
+
+        data["attack_matrix"]["1"] = [2]
+        assert game_state.update(data).attack_matrix_changed
+        assert game_state.players[3].can_attack_ids == [
+            1
+        ], "Player attacked by another player is not a target"
+
+    def test_same_as_full_update(self):
+        rnd = random.Random(1)
+        simulation = new_game(num_turns=20)
+        actions_generator = ActionsGenerator(simulation)
+        game_state = BotGameState(MAP_DATA)
+        bot_actions_generator = ActionsGenerator(game_state)
+        while not simulation.finished:
+            data = simulation.to_dict()
+            game_state.update(data)
+            expected = BotGameState(MAP_DATA)
+            expected.update(data)
+            assert_same_state(game_state, expected)
+
+            # Bot plans some actions, the next update must revert them
+            for vehicle in game_state.current_player.ordered_vehicle_iter:
+                actions = bot_actions_generator(vehicle) if vehicle.hp > 0 else []
+                if actions:
+                    game_state.push_action(rnd.choice(actions))
+
+            for vehicle in simulation.current_player.ordered_vehicle_iter:
+                actions = actions_generator(vehicle) if vehicle.hp > 0 else []
+                if actions:
+                    simulation.update_from_action(rnd.choice(actions))
+            simulation.end_turn()
@@ -0,0 +1,104 @@
+"""
+Tests for game_client.hex_grid.HexGrid class and GameMap per-hex data.
+"""
+# pylint: disable=missing-class-docstring, missing-function-docstring
+from game_client.hex_grid import HexGrid, get_hex_grid
+from game_client.map import CAN_GO_THROUGH, UNREACHABLE, GameMap
+from utility.coordinates import Coords
+
+MAP_DATA = {
+    "size": 4,
+    "name": "test_map",
+    "spawn_points": [],
+    "content": {
+        "base": [{"x": 0, "y": 0, "z": 0}],
+        "obstacle": [
+            {"x": 2, "y": -2, "z": 0},
+            {"x": 2, "y": -1, "z": -1},
+            {"x": 1, "y": -2, "z": 1},
+        ],
+        "catapult": [{"x": -3, "y": 0, "z": 3}],
+    },
+}
+
+
+class TestHexGrid:
+    def test_len(self):
+        assert len(HexGrid(4)) == 37, "Grid with map radius 4 must have 37 hexes"
+
+    def test_indexes_are_dense(self):
+        grid = HexGrid(5)
+        assert [grid.index(coords) for coords in grid.coords] == list(
+            range(len(grid))
+        ), "index method must return position of the coords in grid.coords"
+
+    def test_neighbours(self):
+        grid = HexGrid(3)
+        assert (
+            len(grid.neighbours[grid.index(Coords((0, 0, 0)))]) == 6
+        ), "Central hex must have six neighbours"
+        assert (
+            len(grid.neighbours[grid.index(Coords((2, -2, 0)))]) == 3
+        ), "Corner hex must have three neighbours"
+
+    def test_contains(self):
+        grid = HexGrid(3)
+        assert Coords((2, 0, -2)) in grid, "Hex on the edge must be in the grid"
+        assert Coords((3, 0, -3)) not in grid, "Hex out of bounds must not be in grid"
+
+    def test_ring(self):
+        grid = HexGrid(4)
+        center = grid.index(Coords((0, 0, 0)))
+        assert grid.ring(center, 0) == (center,)
+        assert len(grid.ring(center, 3)) == 18, "Ring with radius 3 has 18 hexes"
+        assert all(
+            grid.coords[index].straight_dist_to(Coords((0, 0, 0))) == 2
+            for index in grid.ring(center, 2)
+        ), "All the hexes of the ring must be on the same distance"
+
+    def test_rays(self):
+        grid = HexGrid(4)
+        rays = grid.rays(grid.index(Coords((0, 0, 0))))
+        assert [grid.coords[index] for index in rays[0]] == [
+            Coords((1, -1, 0)),
+            Coords((2, -2, 0)),
+            Coords((3, -3, 0)),
+        ], "Ray must contain every hex to the grid's edge in the direction"
+        assert rays[0] == grid.rays(grid.index(Coords((0, 0, 0))))[0]
+
+    def test_direction(self):
+        grid = HexGrid(4)
+        assert grid.direction(Coords((0, 0, 0)), Coords((0, 3, -3))) == 2
+        assert grid.direction(Coords((0, 0, 0)), Coords((1, 1, -2))) is None
+        assert grid.direction(Coords((0, 0, 0)), Coords((0, 0, 0))) is None
+
+    def test_grid_is_shared(self):
+        assert get_hex_grid(5) is get_hex_grid(5), "Grids must be cached per radius"
+
+
+class TestGameMap:
+    def test_terrain(self):
+        game_map = GameMap(MAP_DATA)
+        index = game_map.grid.index(Coords((2, -2, 0)))
+        assert (
+            not game_map.terrain[index] & CAN_GO_THROUGH
+        ), "Obstacle must not have CAN_GO_THROUGH flag"
+
+    def test_distance_to_base(self):
+        game_map = GameMap(MAP_DATA)
+        assert game_map.distance_to_base(Coords((0, 0, 0))) == 0
+        assert game_map.distance_to_base(Coords((-3, 0, 3))) == 3
+        assert (
+            game_map.distance_to_base(Coords((3, -3, 0))) == 5
+        ), "Distance to base must take obstacles into account"
+        assert game_map.distance_to_base(Coords((2, -2, 0))) == UNREACHABLE
+
+    def test_set_bonus_usages(self):
+        game_map = GameMap(MAP_DATA)
+        catapult = Coords((-3, 0, 3))
+        game_map.set_bonus_usages([catapult])
+        game_map.set_bonus_usages([catapult, catapult])
+        assert (
+            game_map[catapult].uses_left == 1
+        ), "Usages list must be applied from scratch on every update"
+        assert game_map.bonus_uses[game_map.grid.index(catapult)] == 1
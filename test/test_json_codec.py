@@ -0,0 +1,58 @@
+"""
+Tests for game_client.json_codec module.
+"""
+# pylint: disable=missing-class-docstring, missing-function-docstring
+import pytest
+
+from benchmarks.session_benchmark import synthetic_game_state
+from game_client.json_codec import CODECS, JsonCodec, MsgspecCodec, get_codec
+from game_client.local_server import LocalServer
+from game_client.map_generator import generate_map
+from game_client.server_interaction import GameSession, Session
+from utility.custom_typings import GameStateDictTyping
+
+
+class TestJsonCodec:
+    @pytest.mark.parametrize("name", CODECS)
+    def test_roundtrip(self, name):
+        codec = get_codec(name)
+        data = synthetic_game_state(10)
+        data["players"][0]["name"] = "Игрок ✓"
+        payload = codec.encode(data)
+        assert JsonCodec().decode(payload) == data, "Codecs must be compatible"
+        for buffer in (payload, bytearray(payload), memoryview(payload)):
+            assert codec.decode(buffer, GameStateDictTyping) == data
+        with pytest.raises(ValueError):
+            codec.decode(b'{"vehicles": ')
+
+    def test_get_codec(self):
+        assert isinstance(get_codec(), CODECS[next(iter(CODECS))])
+        assert get_codec("json").name == "json"
+        with pytest.raises(ValueError):
+            get_codec("pickle")
+
+    @pytest.mark.parametrize("name", CODECS)
+    def test_session(self, name):
+        with LocalServer(generate_map(size=7, seed=0)) as server:
+            host, port = server.start()
+            game = GameSession(session=Session(host, port, get_codec(name)), name="p")
+            assert game.map == server.game_map
+            assert game.game_state()["players"][0]["name"] == "p"
+
+    def test_typed_msgspec(self):
+        pytest.importorskip("msgspec")
+        codec = MsgspecCodec(typed=True)
+        payload = codec.encode(synthetic_game_state(10))
+        assert codec.decode(payload, GameStateDictTyping)["vehicles"]["1"]["health"]
+        with pytest.raises(ValueError):
+            codec.decode(b'{"finished": false}', GameStateDictTyping)
+
+    def test_typed_msgspec_before_start(self):
+        pytest.importorskip("msgspec")
+        with LocalServer(generate_map(size=7, seed=0)) as server:
+            host, port = server.start()
+            session = Session(host, port, MsgspecCodec(typed=True))
+            game = GameSession(session=session, name="p", num_players=2)
+            game_state = game.game_state()
+        assert not game_state["vehicles"], "Game must wait for the second player"
+        assert game_state["current_player_idx"] is None
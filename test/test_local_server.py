@@ -0,0 +1,136 @@
+"""
+Tests for game_client.local_server.LocalServer class.
+"""
+# pylint: disable=missing-class-docstring, missing-function-docstring
+import threading
+
+import pytest
+
+from bot.step_score_bot import StepScoreBot
+from game_client.local_server import LocalServer
+from game_client.map_generator import generate_map
+from game_client.server_interaction import (ActionCode, GameSession,
+                                            ResponseError, Session)
+
+
+def play(sessions: list[GameSession]) -> None:
+    def loop(game: GameSession) -> None:
+        bot = StepScoreBot(game.map)
+        while not (game_state := game.game_state())["finished"]:
+            if game_state["current_player_idx"] == game.player_id:
+                for action in bot.get_actions(game_state):
+                    game.action(*action.server_format)
+            game.turn()
+
+    threads = [threading.Thread(target=loop, args=(game,)) for game in sessions]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+class TestMapGenerator:
+    def test_symmetric_spawn_points(self):
+        game_map = generate_map(size=7, num_players=3, seed=0)
+        assert len(game_map["spawn_points"]) == 3
+        assert all(
+            len(spawn_points) == 5 for spawn_points in game_map["spawn_points"]
+        ), "Every player must have five vehicles"
+
+    def test_obstacles_layout(self):
+        obstacles = [(2, -2, 0), (-2, 2, 0)]
+        game_map = generate_map(size=7, obstacles=obstacles)
+        assert game_map["content"]["obstacle"] == [
+            {"x": 2, "y": -2, "z": 0},
+            {"x": -2, "y": 2, "z": 0},
+        ]
+        assert generate_map(seed=3) == generate_map(seed=3)
+
+
+class TestLocalServer:
+    def test_game(self):
+        server = LocalServer(generate_map(seed=0))
+        sessions = [
+            GameSession(session=server.connect(), name=f"p{i}", game="g", num_players=3)
+            for i in range(3)
+        ]
+        play(sessions)
+        game_state = sessions[0].game_state()
+        assert game_state["finished"]
+        assert game_state["current_turn"] <= 45
+
+    def test_wrong_requests(self):
+        server = LocalServer(generate_map(seed=0))
+        with pytest.raises(ResponseError):
+            server.connect().get(ActionCode.MAP)
+
+        first = GameSession(session=server.connect(), name="a", game="g", num_players=2)
+        second = GameSession(session=server.connect(), name="b", game="g")
+        with pytest.raises(ResponseError):
+            GameSession(session=server.connect(), name="c", game="g")
+        with pytest.raises(ResponseError):
+            # Not second player's turn
+            second.action(ActionCode.MOVE, 6, {"x": 0, "y": 0, "z": 0})
+        with pytest.raises(ResponseError):
+            # Too far to move
+            first.action(ActionCode.MOVE, 1, {"x": 0, "y": 0, "z": 0})
+
+    def test_turn_timeout(self):
+        server = LocalServer(generate_map(seed=0), turn_timeout=0.01)
+        game = GameSession(session=server.connect(), name="a", game="g", num_players=2)
+        GameSession(session=server.connect(), name="b", game="g")
+        game.turn()
+        assert (
+            game.game_state()["current_turn"] == 1
+        ), "Turn must end by timeout if somebody has not sent TURN"
+
+    def test_idle_observer(self):
+        server = LocalServer(generate_map(seed=0))
+        observer = GameSession(
+            session=server.connect(),
+            name="o",
+            game="g",
+            num_players=2,
+            is_observer=True,
+        )
+        players = [
+            GameSession(session=server.connect(), name=f"p{i}", game="g")
+            for i in range(2)
+        ]
+        thread = threading.Thread(target=play, args=(players,), daemon=True)
+        thread.start()
+        thread.join(30)
+        assert not thread.is_alive(), "Turns mustn't wait for observers"
+        assert observer.game_state()["finished"]
+
+    def test_finished_game_is_removed(self):
+        server = LocalServer(generate_map(seed=0))
+        play(
+            [
+                GameSession(
+                    session=server.connect(), name=f"p{i}", game="g", num_players=2
+                )
+                for i in range(2)
+            ]
+        )
+        assert "g" not in server.games
+        game = GameSession(session=server.connect(), name="p0", game="g")
+        assert not game.game_state()["finished"], "New game must be created"
+
+    def test_abandoned_game_is_removed(self):
+        server = LocalServer(generate_map(seed=0))
+        first = GameSession(session=server.connect(), name="a", game="g", num_players=2)
+        second = GameSession(session=server.connect(), name="b", game="g")
+        first.logout()
+        assert "g" in server.games
+        second.logout()
+        assert not server.games
+
+    def test_tcp(self):
+        with LocalServer(generate_map(seed=0)) as server:
+            host, port = server.start()
+            play([GameSession(host, port, name="a", num_turns=6)])
+            session = Session(host, port)
+            player = session.get(ActionCode.LOGIN, {"name": "b", "game": "g"})
+            assert player["name"] == "b"
+            assert session.get(ActionCode.MAP)["size"] == 11
@@ -0,0 +1,121 @@
+"""
+Tests for bot.mcst.mcst.MonteCarloSearchTree and bot.mcst.mcts_bot.MCTSBot.
+"""
+# pylint: disable=missing-class-docstring, missing-function-docstring
+import copy
+from test.test_simulator import MAP_DATA, new_game, place
+
+import numpy as np
+
+from benchmarks.corpus import load_corpus
+from bot.mcst.mcst import (ROOT, MonteCarloSearchTree, SearchStatistics,
+                           choose_path, merge_statistics)
+from bot.mcst.mcts_bot import MCTSBot
+from game_client.action_codec import decode_action
+from game_client.server_interaction import ActionCode
+
+
+class TestMonteCarloSearchTree:
+    def test_search(self):
+        tree = MonteCarloSearchTree(MAP_DATA, seed=0)
+        tree.reset(new_game().to_dict())
+        assert tree.search(iterations=50) == 50
+        assert tree.nodes["visits"][ROOT] == 50, "Root must be updated"
+        assert tree.statistics(1).visits.sum() == 50
+
+    def test_root_data_is_not_changed(self):
+        corpus = load_corpus()
+        for state in corpus["states"]:
+            data = state["game_state"]
+            before = copy.deepcopy(data)
+            tree = MonteCarloSearchTree(corpus["maps"][state["map"]], seed=0)
+            tree.reset(data)
+            tree.search(iterations=50)
+            assert data == before, "Simulation must not change the root game state"
+
+    def test_advance_tree(self):
+        game_state = new_game()
+        tree = MonteCarloSearchTree(MAP_DATA, seed=0)
+        tree.reset(game_state.to_dict())
+        tree.search(iterations=300)
+        # One vehicle for every player, the most visited line of the round
+        statistics = tree.statistics(3)
+        path = choose_path(statistics)
+        assert len(path) == 3
+        for code in path:
+            action = decode_action(code, game_state)
+            if action.target != action.actor.position:
+                game_state.update_from_action(action)
+            game_state.end_turn()
+
+        assert tree.advance_tree(game_state.to_dict()), "Subtree must be reused"
+        path_index = np.flatnonzero((statistics.paths == path).all(axis=1))[0]
+        assert tree.nodes["visits"][ROOT] == statistics.visits[path_index]
+        assert tree.nodes["parent"][ROOT] == -1
+
+        other_game = new_game()
+        other_game.end_turn()
+        other_game.end_turn()
+        other_game.end_turn()
+        place(other_game, {1: (-2, 0, 2)})
+        assert not tree.advance_tree(other_game.to_dict())
+        assert tree.size == 1, "Tree must be reset for unknown game state"
+
+    def test_choose_path(self):
+        statistics = merge_statistics(
+            [
+                SearchStatistics(
+                    np.array([[1, 0], [2, 0], [2, 5]]),
+                    np.array([3, 2, 1]),
+                    np.array([1.0, 1.0, 0.0]),
+                ),
+                SearchStatistics(
+                    np.array([[1, 0], [2, 0], [2, 6]]),
+                    np.array([1, 4, 3]),
+                    np.array([1.0, 1.0, 2.0]),
+                ),
+            ]
+        )
+        assert statistics.paths.tolist() == [[1, 0], [2, 0], [2, 5], [2, 6]]
+        assert statistics.visits.tolist() == [4, 6, 1, 3]
+        assert statistics.values.tolist() == [2.0, 2.0, 0.0, 2.0]
+        assert choose_path(statistics) == [2, 6]
+
+
+class TestMCTSBot:
+    def test_search(self):
+        game_state = new_game()
+        bot = MCTSBot(MAP_DATA, time_limit=None, iterations=50, seed=0)
+        actions = bot.get_actions(game_state.to_dict())
+        assert bot.tree.nodes["visits"][ROOT] == 50
+        assert all(
+            game_state.get_action(
+                action.action_code, action.actor.vehicle_id, action.target
+            )
+            for action in actions
+        ), "Actions must be valid"
+
+    def test_fallback_prefers_shoot(self):
+        game_state = new_game()
+        place(game_state, {1: (0, 0, 0), 2: (2, 0, -2)})
+        # Without search every action is chosen by the estimator
+        bot = MCTSBot(MAP_DATA, time_limit=None, iterations=0, seed=0)
+        bot.action_estimator.score_batch = lambda actions: np.zeros(len(actions))
+        actions = bot.get_actions(game_state.to_dict())
+        assert [action.action_code for action in actions] == [
+            ActionCode.SHOOT
+        ], "SHOOT must win score ties"
+
+    def test_root_parallel_search(self):
+        game_state = new_game()
+        with MCTSBot(MAP_DATA, time_limit=None, iterations=20, workers=2) as bot:
+            for _ in range(2):
+                actions = bot.get_actions(game_state.to_dict())
+                assert len(actions) <= 1
+                for action in actions:
+                    game_state.update_from_action(
+                        game_state.get_action(
+                            action.action_code, action.actor.vehicle_id, action.target
+                        )
+                    )
+                game_state.end_turn()
@@ -0,0 +1,18 @@
+"""
+Tests for estimator_coefficients_optimisation module.
+"""
+# pylint: disable=missing-class-docstring, missing-function-docstring
+from estimator_coefficients_optimisation import (MIN_GAMES_TO_STOP,
+                                                 is_worse_than)
+
+
+class TestEarlyStopping:
+    def test_not_enough_games(self):
+        assert not is_worse_than(
+            [1] * (MIN_GAMES_TO_STOP - 1), 0
+        ), "Point must not be dropped before MIN_GAMES_TO_STOP games"
+
+    def test_clearly_worse(self):
+        assert is_worse_than([1] * 10, 0.5), "Ten loses are worse than 0.5"
+        assert not is_worse_than([1, 0] * 5, 0.5)
+        assert not is_worse_than([1, 1, 1, 0.5, 1], 0.5)
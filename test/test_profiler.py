@@ -0,0 +1,48 @@
+"""
+Tests for utility.profiler.Profiler class.
+"""
+# pylint: disable=missing-class-docstring, missing-function-docstring
+import io
+import json
+
+from utility.profiler import Histogram, Profiler
+
+
+class TestProfiler:
+    def test_disabled(self):
+        profiler = Profiler()
+        with profiler.measure("phase"):
+            pass
+        profiler.start_turn(turn=1)
+        assert profiler.finish_turn() is None
+        assert not profiler.histograms, "Disabled profiler must not record"
+
+    def test_turn_record(self):
+        sink = io.StringIO()
+        profiler = Profiler()
+        profiler.enable(sink)
+        profiler.start_turn(turn=3)
+        for _ in range(2):
+            with profiler.measure("phase"):
+                pass
+        profiler.finish_turn()
+        with profiler.measure("phase"):
+            pass
+        with profiler.measure("session", "MAP"):
+            pass
+
+        turn_record = json.loads(sink.getvalue())
+        assert turn_record["turn"] == 3
+        assert turn_record["phases"]["phase"]["count"] == 2
+        assert not turn_record["slow"]
+        assert (
+            profiler.summary()["phase"]["count"] == 3
+        ), "Histograms must be collected outside of turns too"
+        assert profiler.summary()["session.MAP"]["count"] == 1
+
+    def test_histogram(self):
+        histogram = Histogram()
+        for duration in (1000, 1000, 1000, 2_000_000):
+            histogram.add(duration)
+        assert histogram.quantile(0.5) == 1024 / 1_000_000
+        assert histogram.quantile(1) == 2
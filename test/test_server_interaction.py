@@ -0,0 +1,122 @@
+"""
+Tests for game_client.server_interaction module.
+"""
+# pylint: disable=missing-class-docstring, missing-function-docstring
+import json
+import socket
+import threading
+from test.test_local_server import play
+
+import pytest
+
+from game_client.json_codec import JsonCodec
+from game_client.local_server import LocalServer
+from game_client.map_generator import generate_map
+from game_client.server_interaction import (HEADER, INITIAL_BUFFER_SIZE,
+                                            ActionCode, GameSession,
+                                            ResponseError, Session,
+                                            SessionPool, encode_message)
+from utility.custom_typings import MapDictTyping
+from utility.profiler import profiler
+
+
+class MapCountingCodec(JsonCodec):
+    def __init__(self):
+        self.maps = 0
+
+    def decode(self, payload, response_type=None):
+        self.maps += response_type is MapDictTyping
+        return super().decode(payload, response_type)
+
+
+class TestSession:
+    def test_encode_message(self):
+        data = {"name": "Игрок"}
+        message = encode_message(ActionCode.LOGIN, data)
+        code, length = HEADER.unpack_from(message)
+        header_size = HEADER.size
+        assert code == ActionCode.LOGIN
+        assert length == len(message) - header_size, "Length must be in bytes"
+        assert json.loads(message[header_size:]) == data
+        assert encode_message(ActionCode.MAP) == HEADER.pack(ActionCode.MAP, 0)
+
+    def test_large_non_ascii_payload(self):
+        name = "Игрок ✓" * 20000
+        with LocalServer(generate_map(size=7, seed=0)) as server:
+            host, port = server.start()
+            game = GameSession(host, port, name=name)
+            assert (
+                len(json.dumps(name)) > INITIAL_BUFFER_SIZE
+            ), "Response must not fit into the initial buffer"
+            assert game.player_name == name
+            # Buffer is reused by the next responses
+            assert game.map == server.game_map
+            assert game.game_state()["players"][0]["name"] == name
+
+    def test_closed_connection(self):
+        with socket.create_server(("127.0.0.1", 0)) as server_socket:
+
+            def close_connection():
+                connection, _ = server_socket.accept()
+                connection.recv(HEADER.size)
+                connection.close()
+
+            thread = threading.Thread(target=close_connection)
+            thread.start()
+            session = Session(*server_socket.getsockname())
+            with pytest.raises(ConnectionError):
+                session.get(ActionCode.MAP)
+            thread.join()
+
+    def test_unknown_action(self, monkeypatch):
+        # Global profiler is restored after the test
+        monkeypatch.setattr(profiler, "histograms", {})
+        monkeypatch.setattr(profiler, "enabled", True)
+        with LocalServer(generate_map(size=7, seed=0)) as server:
+            host, port = server.start()
+            session = Session(host, port)
+            with pytest.raises(ResponseError):
+                session.get(999)
+            session.close()
+        assert list(profiler.histograms) == ["session.999"]
+
+
+class TestSessionPool:
+    def test_games_reuse_connections(self):
+        codec = MapCountingCodec()
+        with LocalServer(generate_map(size=7, seed=0)) as server:
+            host, port = server.start()
+            with SessionPool(host, port, codec) as pool:
+                for game_name in ("first", "second"):
+                    games = [
+                        pool.acquire(
+                            name=f"p{i}", game=game_name, num_players=3, num_turns=6
+                        )
+                        for i in range(3)
+                    ]
+                    play(games)
+                    assert all(game.map is games[0].map for game in games)
+                    for game in games:
+                        pool.release(game)
+
+                assert pool.opened_connections == 3
+                assert codec.maps == 2, "Map must be requested once per game"
+
+    def test_rejected_login(self):
+        with LocalServer(generate_map(size=7, seed=0)) as server:
+            host, port = server.start()
+            with SessionPool(host, port) as pool:
+                with pytest.raises(ResponseError):
+                    pool.acquire(name="p", num_players=10)
+                with pool.game_session(name="p") as game:
+                    assert game.game_state()["num_players"] == 1
+                assert pool.opened_connections == 1
+
+    def test_close(self):
+        with LocalServer(generate_map(size=7, seed=0)) as server:
+            host, port = server.start()
+            pool = SessionPool(host, port)
+            with pool.game_session(name="p") as game:
+                connection = game.server.client_socket
+            pool.close()
+            assert connection.fileno() == -1, "Idle connections must be closed"
@@ -0,0 +1,136 @@
+"""
+Tests for bot.mcst.mcst_bot_game_state.MCSTBotGameState simulator.
+"""
+# pylint: disable=missing-class-docstring, missing-function-docstring
+import random
+
+from bot.actions_generator import ActionsGenerator
+from bot.mcst.mcst_bot_game_state import MCSTBotGameState, initial_game_state
+from game_client.actions import Action
+from game_client.server_interaction import ActionCode
+from utility.coordinates import Coords
+
+MAP_DATA = {
+    "size": 5,
+    "name": "test_map",
+    "spawn_points": [
+        {"medium_tank": [{"x": -4, "y": 0, "z": 4}]},
+        {"medium_tank": [{"x": 4, "y": 0, "z": -4}]},
+        {"medium_tank": [{"x": 0, "y": 4, "z": -4}]},
+    ],
+    "content": {
+        "base": [
+            {"x": 0, "y": 0, "z": 0},
+            {"x": 1, "y": 0, "z": -1},
+            {"x": 0, "y": 1, "z": -1},
+        ],
+        "obstacle": [{"x": 2, "y": -2, "z": 0}],
+        "light_repair": [{"x": -2, "y": 1, "z": 1}],
+    },
+}
+PLAYERS = [{"idx": idx, "name": f"p{idx}", "is_observer": False} for idx in (1, 2, 3)]
+
+
+def new_game(num_turns: int = 45) -> MCSTBotGameState:
+    game_state = MCSTBotGameState(MAP_DATA)
+    game_state.update(initial_game_state(MAP_DATA, PLAYERS, num_turns))
+    return game_state
+
+
+def place(game_state: MCSTBotGameState, positions: dict[int, tuple]) -> None:
+    data = game_state.to_dict()
+    for vehicle_id, position in positions.items():
+        data["vehicles"][str(vehicle_id)]["position"] = Coords(position).server_format
+    game_state.update(data)
+
+
+class TestSimulator:
+    def test_initial_game_state(self):
+        game_state = new_game()
+        assert len(game_state.vehicles_by_id) == 3
+        assert game_state.vehicles_by_id[1].hp == game_state.vehicles_by_id[1].max_hp
+        assert game_state.current_player.idx == 1
+
+    def test_to_dict_roundtrip(self):
+        game_state = new_game()
+        place(game_state, {1: (0, 0, 0)})
+        data = game_state.to_dict()
+        copy = MCSTBotGameState(MAP_DATA)
+        copy.update(data)
+        assert copy.to_dict() == data, "State must survive conversion to dict"
+
+    def test_turn_order(self):
+        game_state = new_game()
+        for expected in (2, 3, 1):
+            game_state.update_from_action(Action(ActionCode.TURN, None, None))
+            assert game_state.current_player.idx == expected
+        assert game_state.current_turn == 3
+
+    def test_capture_points(self):
+        game_state = new_game()
+        place(game_state, {1: (0, 0, 0)})
+        game_state.end_turn()
+        assert game_state.vehicles_by_id[1].capture_points == 1
+        assert game_state.players[1].win_points["capture"] == 1
+
+    def test_base_capture_is_blocked(self):
+        game_state = new_game()
+        place(game_state, {1: (0, 0, 0), 2: (1, 0, -1), 3: (0, 1, -1)})
+        game_state.end_turn()
+        assert (
+            game_state.vehicles_by_id[1].capture_points == 0
+        ), "Base can't be captured when vehicles of three players are on it"
+
+    def test_capture_win(self):
+        game_state = new_game()
+        place(game_state, {1: (0, 0, 0)})
+        for _ in range(13):
+            game_state.end_turn()
+        assert game_state.finished
+        assert game_state.winner is game_state.players[1]
+
+    def test_shot_resets_capture_points_and_respawns(self):
+        game_state = new_game()
+        place(game_state, {1: (-2, 0, 2), 2: (0, 0, 0)})
+        game_state.vehicles_by_id[2].capture_points = 3
+        game_state.vehicles_by_id[2].hp = 1
+        action = game_state.get_action(ActionCode.SHOOT, 1, Coords((0, 0, 0)))
+        assert action is not None, "Neutral vehicle must be a valid target"
+        game_state.update_from_action(action)
+        assert game_state.vehicles_by_id[2].capture_points == 0
+        assert game_state.players[1].win_points["kill"] == 2
+        assert (
+            game_state.get_action(ActionCode.MOVE, 1, Coords((-3, 0, 3))) is None
+        ), "Vehicle can act only once per turn"
+
+        game_state.end_turn()
+        assert game_state.vehicles_by_id[2].position == Coords((4, 0, -4))
+        assert game_state.vehicles_by_id[2].hp == 2
+        assert 1 in game_state.players[2].can_attack_ids
+        assert (
+            2 not in game_state.players[3].can_attack_ids
+        ), "Player attacked by another player during the last turn is not a target"
+
+    def test_push_pop(self):
+        game_state = new_game()
+        place(game_state, {1: (-2, 0, 2), 2: (0, 0, 0)})
+        game_state.vehicles_by_id[2].capture_points = 3
+        before = game_state.to_dict()
+        game_state.push_action(
+            game_state.get_action(ActionCode.SHOOT, 1, Coords((0, 0, 0)))
+        )
+        game_state.pop_action()
+        assert game_state.to_dict() == before, "pop_action must revert the shot"
+        assert game_state.get_action(ActionCode.MOVE, 1, Coords((-3, 0, 3)))
+
+    def test_random_game(self):
+        rnd = random.Random(0)
+        game_state = new_game(num_turns=30)
+        actions_generator = ActionsGenerator(game_state)
+        while not game_state.finished:
+            for vehicle in game_state.current_player.ordered_vehicle_iter:
+                actions = actions_generator(vehicle) if vehicle.hp > 0 else []
+                if actions:
+                    game_state.update_from_action(rnd.choice(actions))
+            game_state.end_turn()
+        assert game_state.current_turn <= 30
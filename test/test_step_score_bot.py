@@ -0,0 +1,82 @@
+"""
+Tests for bot.step_score_bot.StepScoreBot class.
+"""
+# pylint: disable=missing-class-docstring, missing-function-docstring
+from time import perf_counter
+
+from benchmarks.corpus import load_corpus
+from bot import step_score_bot
+from bot.step_score_bot import StepScoreBot
+
+CORPUS = load_corpus()
+TIME_BUDGET = 0.2
+# Deadline is checked between steps, so a step started before it can
+# overrun it, more on a loaded machine
+TIME_MARGIN = 0.5
+
+
+def get_actions(state: dict, **kwargs) -> list[tuple]:
+    bot = StepScoreBot(CORPUS["maps"][state["map"]], **kwargs)
+    return [
+        (action.action_code, action.actor.vehicle_id, action.target)
+        for action in bot.get_actions(state["game_state"])
+    ]
+
+
+class TestStepScoreBot:
+    def test_no_time_for_refinement(self):
+        for state in CORPUS["states"]:
+            assert get_actions(state, time_budget=0) == get_actions(
+                state
+            ), "Greedy actions must be returned if there is no time"
+
+    def test_anytime_mode(self):
+        for state in CORPUS["states"]:
+            bot = StepScoreBot(CORPUS["maps"][state["map"]], time_budget=TIME_BUDGET)
+            start = perf_counter()
+            actions = bot.get_actions(state["game_state"])
+            assert perf_counter() - start < TIME_BUDGET + TIME_MARGIN
+            actors = [action.actor for action in actions]
+            assert len(set(actors)) == len(actors), "One action per vehicle"
+            assert all(
+                actor.player_id == bot.game_state.current_player.idx
+                for actor in actors
+            )
+            assert bot.game_state.undo_depth == len(
+                actions
+            ), "Game state must be left updated with the returned actions"
+
+    def test_beam_search(self):
+        for state in CORPUS["states"]:
+            bot = StepScoreBot(CORPUS["maps"][state["map"]], beam_width=4)
+            actions = bot.get_actions(state["game_state"])
+            actors = [action.actor for action in actions]
+            assert len(set(actors)) == len(actors), "One action per vehicle"
+            assert bot.game_state.undo_depth == len(actions)
+
+    def test_no_time_for_beam_search(self):
+        for state in CORPUS["states"]:
+            assert get_actions(state, time_budget=0, beam_width=4) == get_actions(
+                state
+            ), "Greedy actions must be returned if there is no time"
+
+    def test_deadline_during_completion(self, monkeypatch):
+        # Time is counted in actions generator calls
+        clock = [0]
+        monkeypatch.setattr(step_score_bot, "perf_counter", lambda: clock[0])
+        state = CORPUS["states"][-1]
+        for time_budget in range(5, 60):
+            clock[0] = 0
+            bot = StepScoreBot(CORPUS["maps"][state["map"]], time_budget=time_budget)
+            actions_generator = bot.actions_generator
+
+            def generate(actor, actions_generator=actions_generator):
+                clock[0] += 1
+                return actions_generator(actor)
+
+            bot.actions_generator = generate
+            actions = bot.get_actions(state["game_state"])
+            assert clock[0] <= time_budget, "No actions must be generated after deadline"
+            actors = [action.actor for action in actions]
+            assert len(set(actors)) == len(actors), "One action per vehicle"
+            assert bot.game_state.undo_depth == len(actions)
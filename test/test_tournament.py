@@ -0,0 +1,53 @@
+"""
+Tests for tournament module.
+"""
+# pylint: disable=missing-class-docstring, missing-function-docstring
+from bot.mcst.mcst_bot_game_state import MCSTBotGameState, initial_game_state
+from bot.step_score_bot import StepScoreBot
+from game_client.action_codec import TURN_CODE, codes_from_bytes, decode_action
+from game_client.map_generator import generate_map
+from tournament import BotSpec, GameSpec, Tournament, game_seeds, play_game
+
+BOTS = (BotSpec(StepScoreBot),) * 3
+
+
+class TestTournament:
+    def test_play_game(self):
+        record = play_game(GameSpec(BOTS, num_turns=15, map_size=7))
+        assert record.turns <= 15
+        assert len(record.win_points) == 3
+        assert record.rejected_actions == 0, "Bot's actions must be valid"
+
+    def test_actions_log(self):
+        record = play_game(GameSpec(BOTS, num_turns=15, map_size=7))
+        game_map = generate_map(7, 3, seed=0)
+        players = [
+            {"idx": idx, "name": f"bot_{idx}", "is_observer": False}
+            for idx in (1, 2, 3)
+        ]
+        game_state = MCSTBotGameState(game_map)
+        game_state.update(initial_game_state(game_map, players, 15))
+        for code in codes_from_bytes(record.actions):
+            if code == TURN_CODE:
+                game_state.end_turn()
+            else:
+                game_state.update_from_action(decode_action(code, game_state))
+
+        assert game_state.finished
+        assert tuple(
+            game_state.players[idx].win_points for idx in (1, 2, 3)
+        ) == record.win_points, "Game must be replayed from the log"
+
+    def test_reproducibility(self):
+        spec = GameSpec(BOTS, seed=5, num_turns=15, map_size=7, map_seed=5)
+        assert play_game(spec).win_points == play_game(spec).win_points
+        assert game_seeds(1, 3) == game_seeds(1, 3)
+
+    def test_records_are_streamed(self):
+        specs = [
+            GameSpec(BOTS, seed=seed, num_turns=6, map_size=7, tag=number)
+            for number, seed in enumerate(game_seeds(0, 4))
+        ]
+        with Tournament(workers=2) as tournament:
+            records = list(tournament.play(specs))
+        assert sorted(record.spec.tag for record in records) == [0, 1, 2, 3]
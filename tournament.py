@@ -0,0 +1,194 @@
+"""
+Plays games between bots with the offline simulator in multiple processes.
+
+"""
+import random
+import time
+from array import array
+from concurrent.futures import (Executor, Future, ProcessPoolExecutor,
+                                as_completed)
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Iterable, Iterator, Optional
+
+import numpy as np
+
+from bot.bot import Bot
+from bot.mcst.mcst_bot_game_state import MCSTBotGameState, initial_game_state
+from game_client.action_codec import TURN_CODE, encode_action
+from game_client.map_generator import generate_map
+from utility.custom_typings import (MapDictTyping, PlayerDictTyping,
+                                    WinPointsDictTyping)
+
+
+@dataclass(frozen=True)
+class BotSpec:
+    """
+    Picklable description of a bot, so bots can be created in worker processes.
+
+    """
+
+    bot_class: type[Bot]
+    kwargs: dict = field(default_factory=dict)
+
+    def build(self, game_map: MapDictTyping) -> Bot:
+        """
+        Creates bot for the given map.
+
+        """
+        return self.bot_class(game_map, **self.kwargs)
+
+
+@dataclass(frozen=True)
+class GameSpec:
+    """
+    Description of one game.
+
+    Bots make turns in the order they are listed. Map is generated
+    with generate_map from map_size and map_seed if game_map is None.
+    Global random generators of the worker are seeded with seed
+    before the game, so games with the same spec have the same result.
+    Tag isn't used by the game, it helps to match streamed records with
+    their specs.
+    """
+
+    bots: tuple[BotSpec, ...]
+    seed: int = 0
+    num_turns: int = 45
+    map_size: int = 11
+    map_seed: Optional[int] = 0
+    game_map: Optional[MapDictTyping] = None
+    tag: object = None
+
+
+@dataclass(frozen=True)
+class GameRecord:
+    """
+    Result of one game.
+
+    :param winner: index of the winning bot in spec.bots or None if draw
+    :param win_points: win points of every bot in spec.bots order
+    :param rejected_actions: amount of actions the simulator refused
+    :param actions: accepted actions encoded with game_client.action_codec,
+        TURN_CODE after every turn, unpack with codes_from_bytes
+    """
+
+    spec: GameSpec
+    winner: Optional[int]
+    win_points: tuple[WinPointsDictTyping, ...]
+    turns: int
+    rejected_actions: int
+    duration: float
+    actions: bytes = b""
+
+
+@lru_cache(maxsize=16)
+def _get_generated_map(size: int, num_players: int, seed: Optional[int]):
+    return generate_map(size, num_players, seed=seed)
+
+
+def play_game(spec: GameSpec) -> GameRecord:
+    """
+    Plays the game in the current process.
+
+    """
+    start = time.perf_counter()
+    random.seed(spec.seed)
+    np.random.seed(spec.seed % 2**32)
+
+    game_map = spec.game_map
+    if game_map is None:
+        game_map = _get_generated_map(spec.map_size, len(spec.bots), spec.map_seed)
+
+    players: list[PlayerDictTyping] = [
+        {"idx": idx, "name": f"bot_{idx}", "is_observer": False}
+        for idx in range(1, len(spec.bots) + 1)
+    ]
+    game_state = MCSTBotGameState(game_map)
+    game_state.update(initial_game_state(game_map, players, spec.num_turns))
+    bots = [bot_spec.build(game_map) for bot_spec in spec.bots]
+
+    rejected_actions = 0
+    log = array("q")
+    while not game_state.finished:
+        bot = bots[game_state.current_player.idx - 1]
+        for action in bot.get_actions(game_state.to_dict()):
+            valid_action = game_state.get_action(
+                action.action_code, action.actor.vehicle_id, action.target
+            )
+            if valid_action is None:
+                rejected_actions += 1
+                continue
+            log.append(encode_action(valid_action, game_state.game_map.grid))
+            game_state.update_from_action(valid_action)
+        log.append(TURN_CODE)
+        game_state.end_turn()
+
+    return GameRecord(
+        spec,
+        None if game_state.winner is None else game_state.winner.idx - 1,
+        tuple(
+            dict(game_state.players[player["idx"]].win_points) for player in players
+        ),
+        game_state.current_turn,
+        rejected_actions,
+        time.perf_counter() - start,
+        log.tobytes(),
+    )
+
+
+class Tournament:
+    """
+    Plays games in a pool of worker processes.
+
+    Pool is created once and reused by every play call, use
+    close method or with statement to shut it down.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        """
+        :param workers: amount of worker processes, cpu count if None
+        """
+        self.executor: Executor = ProcessPoolExecutor(workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self) -> None:
+        """
+        Shuts the worker processes down.
+
+        """
+        self.executor.shutdown(cancel_futures=True)
+
+    def submit(self, spec: GameSpec) -> Future:
+        """
+        Schedules the game, result of the future is GameRecord.
+
+        """
+        return self.executor.submit(play_game, spec)
+
+    def play(self, games: Iterable[GameSpec]) -> Iterator[GameRecord]:
+        """
+        Plays the games and yields records in order of games completion.
+
+        """
+        futures = [self.submit(spec) for spec in games]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def game_seeds(seed: int, count: int) -> list[int]:
+    """
+    Generates reproducible seeds for the games of the tournament.
+
+    """
+    rnd = random.Random(seed)
+    return [rnd.getrandbits(63) for _ in range(count)]
@@ -15,24 +15,62 @@ class Coords:
     """
     Class for describing hex position in cubic coordinates system.
 
+    Instances must not be modified: instances within the radius passed
+    to intern_radius are created once and returned on every
+    Coords(...) call with the same coordinates.
     """
 
-    def __init__(self, coordinates: Union[CoordsDictTyping, CoordsTupleTyping]):
+    __slots__ = ("x", "y", "z", "max_dimension", "_hash")
+    x: int
+    y: int
+    z: int
+    max_dimension: int
+    _hash: int
+
+    __interned: dict[CoordsTupleTyping, Coords] = {}
+
+    def __new__(cls, coordinates: Union[CoordsDictTyping, CoordsTupleTyping]):
         if isinstance(coordinates, dict):
             coordinates = (coordinates["x"], coordinates["y"], coordinates["z"])
+        else:
+            coordinates = tuple(coordinates)
+
+        instance = cls.__interned.get(coordinates)
+        if instance is not None:
+            return instance
+
+        instance = object.__new__(cls)
+        instance.x, instance.y, instance.z = x, y, z = coordinates
+        instance.max_dimension = max(abs(x), abs(y), abs(z))
+        instance._hash = hash(coordinates)
+        return instance
+
+    @classmethod
+    def intern_radius(cls, radius: int) -> None:
+        """
+        Makes every Coords with max_dimension < radius a shared instance.
+
+        :param radius: map size as received from the server
+        """
+        for x in range(-radius + 1, radius):
+            for y in range(max(-radius + 1, -x - radius + 1), min(radius, -x + radius)):
+                coordinates = (x, y, -x - y)
+                if coordinates not in cls.__interned:
+                    cls.__interned[coordinates] = cls(coordinates)
 
-        self.x, self.y, self.z = coordinates
-        self.max_dimension: int = max([abs(self.x), abs(self.y), abs(self.z)])
+    def __reduce__(self):
+        return self.__class__, ((self.x, self.y, self.z),)
 
     def __eq__(self, other):
-        return self.x == other.x and self.y == other.y and self.z == other.z
+        return self is other or (
+            self.x == other.x and self.y == other.y and self.z == other.z
+        )
 
     def __hash__(self):
-        return hash((self.x, self.y, self.z))
+        return self._hash
 
     def __iter__(self):
-        for i in (self.x, self.y, self.z):
-            yield i
+        return iter((self.x, self.y, self.z))
 
     def __abs__(self):
         return Coords((abs(self.x), abs(self.y), abs(self.z)))
@@ -78,7 +116,9 @@ class Coords:
         :param other: any other Coords object
         :return: Coords object representing delta vector
         """
-        return abs(self - other)
+        return Coords(
+            (abs(self.x - other.x), abs(self.y - other.y), abs(self.z - other.z))
+        )
 
     def straight_dist_to(self, other: Coords) -> int:
         """
@@ -87,7 +127,9 @@ class Coords:
         :param other: any other Coords object
         :return: distance (in hexes) between two Coords' objects
         """
-        return int(sum(self.delta(other)) / 2)
+        return (
+            abs(self.x - other.x) + abs(self.y - other.y) + abs(self.z - other.z)
+        ) // 2
 
     def unit_vector(self, other: Coords) -> Coords:
         """
@@ -98,14 +140,8 @@ class Coords:
         :return: Coords object representing unit vector directed
         to given coordinates
         """
-        # noinspection PyTypeChecker
-        tuple_generator = map(
-            lambda x: 0 if x[0] - x[1] == 0 else int((x[0] - x[1]) / abs(x[0] - x[1])),
-            zip(other, self),
-        )
-        return Coords(
-            (next(tuple_generator), next(tuple_generator), next(tuple_generator))
-        )
+        dx, dy, dz = other.x - self.x, other.y - self.y, other.z - self.z
+        return Coords(((dx > 0) - (dx < 0), (dy > 0) - (dy < 0), (dz > 0) - (dz < 0)))
 
     @property
     def server_format(self) -> CoordsDictTyping:
@@ -85,7 +85,7 @@ class GameStateDictTyping(TypedDict):
     current_turn: int
     players: list[PlayerDictTyping]
     observers: list
-    current_player_idx: int
+    current_player_idx: Optional[int]
     finished: bool
     vehicles: dict[str, VehicleDictTyping]
     attack_matrix: AttackMatrixDictTyping
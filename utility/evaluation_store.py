@@ -0,0 +1,155 @@
+"""
+Contains class to keep results of weights evaluations between runs.
+
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable
+
+# Weights are rounded to this amount of digits to be used as keys
+QUANTIZATION_DIGITS = 3
+
+
+@dataclass(frozen=True)
+class Evaluation:
+    """
+    Accumulated results of the games played with the weights.
+
+    """
+
+    weights: tuple[float, ...]
+    wins: int = 0
+    draws: int = 0
+    loses: int = 0
+
+    @property
+    def games(self) -> int:
+        """
+        Amount of games played.
+
+        """
+        return self.wins + self.draws + self.loses
+
+    @property
+    def value(self) -> float:
+        """
+        Share of lost games, draw counts as half a lose. Lower is better.
+
+        Weights without games are valued as a draw.
+        """
+        if not self.games:
+            return 0.5
+        return (self.loses + self.draws / 2) / self.games
+
+
+class EvaluationStore:
+    """
+    Append-only SQLite storage of games results keyed by weights.
+
+    Every add call appends a row and commits it, so results survive
+    crashes and accumulate across runs. Weights are quantized to
+    QUANTIZATION_DIGITS digits, results of different opponents
+    configurations are kept separately.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: path to the database file, created with missing
+            directories if doesn't exist
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS evaluations ("
+            "weights TEXT NOT NULL, "
+            "opponents TEXT NOT NULL, "
+            "wins INTEGER NOT NULL, "
+            "draws INTEGER NOT NULL, "
+            "loses INTEGER NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS evaluations_key "
+            "ON evaluations (opponents, weights)"
+        )
+        self.connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self) -> None:
+        """
+        Closes the database connection.
+
+        """
+        self.connection.close()
+
+    @staticmethod
+    def quantize(weights: Iterable[float]) -> tuple[float, ...]:
+        """
+        Rounds weights the same way as they are stored.
+
+        """
+        return tuple(round(weight, QUANTIZATION_DIGITS) for weight in weights)
+
+    def add(
+        self,
+        weights: Iterable[float],
+        opponents: str,
+        wins: int = 0,
+        draws: int = 0,
+        loses: int = 0,
+    ) -> None:
+        """
+        Appends games results of the weights.
+
+        :param weights: evaluated weights
+        :param opponents: description of the opponents configuration
+        """
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO evaluations VALUES (?, ?, ?, ?, ?)",
+                (self.__key(weights), opponents, wins, draws, loses),
+            )
+
+    def get(self, weights: Iterable[float], opponents: str) -> Evaluation:
+        """
+        Returns accumulated results of the weights, zeros if there are none.
+
+        """
+        row = self.connection.execute(
+            "SELECT SUM(wins), SUM(draws), SUM(loses) FROM evaluations "
+            "WHERE opponents = ? AND weights = ?",
+            (opponents, self.__key(weights)),
+        ).fetchone()
+        return Evaluation(self.quantize(weights), *(count or 0 for count in row))
+
+    def top(self, count: int, opponents: str, min_games: int = 1) -> list[Evaluation]:
+        """
+        Returns evaluations with the lowest values.
+
+        :param count: max amount of evaluations to return
+        :param opponents: description of the opponents configuration
+        :param min_games: weights with less games played are ignored
+        """
+        rows = self.connection.execute(
+            "SELECT weights, SUM(wins) AS w, SUM(draws) AS d, SUM(loses) AS l "
+            "FROM evaluations WHERE opponents = ? GROUP BY weights "
+            "HAVING w + d + l >= ? "
+            "ORDER BY (l + d / 2.0) / (w + d + l), -(w + d + l) LIMIT ?",
+            (opponents, max(min_games, 1), count),
+        )
+        return [
+            Evaluation(tuple(json.loads(weights)), wins, draws, loses)
+            for weights, wins, draws, loses in rows
+        ]
+
+    def __key(self, weights: Iterable[float]) -> str:
+        return json.dumps(self.quantize(weights))
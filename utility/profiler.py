@@ -0,0 +1,247 @@
+"""
+Contains low-overhead profiler of the bot's turns.
+
+"""
+import json
+import logging
+import threading
+from time import perf_counter_ns
+from typing import Optional, TextIO
+
+logger = logging.getLogger(__name__)
+
+# Server ends the turn after 10 seconds
+SLOW_TURN_THRESHOLD = 8.0
+NS_IN_MS = 1_000_000
+BUCKETS_COUNT = 64
+
+
+class Histogram:
+    """
+    Durations histogram with power of two nanoseconds buckets.
+
+    Bucket i contains durations from 2 ** (i - 1) to 2 ** i - 1 ns.
+    """
+
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count: int = 0
+        self.total: int = 0
+        self.max: int = 0
+        self.buckets: list[int] = [0] * BUCKETS_COUNT
+
+    def add(self, duration: int) -> None:
+        """
+        Adds duration in nanoseconds.
+
+        """
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        self.buckets[min(duration.bit_length(), BUCKETS_COUNT - 1)] += 1
+
+    def quantile(self, share: float) -> float:
+        """
+        Returns upper bound (in ms) of the bucket with the given quantile.
+
+        """
+        if not self.count:
+            return 0.0
+        threshold = share * self.count
+        seen = 0
+        for bucket, amount in enumerate(self.buckets):
+            seen += amount
+            if seen >= threshold:
+                return min(2**bucket, self.max) / NS_IN_MS
+        return self.max / NS_IN_MS
+
+    def summary(self) -> dict:
+        """
+        Returns main statistics of the histogram in milliseconds.
+
+        """
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count / NS_IN_MS if self.count else 0.0,
+            "p50_ms": self.quantile(0.5),
+            "p90_ms": self.quantile(0.9),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": self.max / NS_IN_MS,
+        }
+
+
+class _DisabledTimer:
+    """
+    Timer that does nothing, returned when profiler is disabled.
+
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+
+class _Timer:
+    """
+    Measures duration of the with block.
+
+    """
+
+    __slots__ = ("owner", "name", "start")
+
+    def __init__(self, owner: "Profiler", name: str):
+        self.owner = owner
+        self.name = name
+        self.start = 0
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, *args):
+        self.owner.record(self.name, perf_counter_ns() - self.start)
+        return False
+
+
+_DISABLED_TIMER = _DisabledTimer()
+
+
+class Profiler:
+    """
+    Collects durations of named phases of the bot's work.
+
+    Durations are accumulated in per-phase histograms for the whole
+    run. Between start_turn and finish_turn calls they are also
+    collected for the turn of the current thread, and the turn
+    record is written to the sink as a JSON line. Turns longer than
+    slow_turn_threshold seconds are logged as warnings.
+
+    Profiler is disabled by default, measure returns a shared no-op
+    context manager in this case.
+    """
+
+    def __init__(self):
+        self.enabled: bool = False
+        self.sink: Optional[TextIO] = None
+        self.slow_turn_threshold: float = SLOW_TURN_THRESHOLD
+        self.histograms: dict[str, Histogram] = {}
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+
+    def enable(
+        self,
+        sink: Optional[TextIO] = None,
+        slow_turn_threshold: float = SLOW_TURN_THRESHOLD,
+    ) -> None:
+        """
+        Starts collecting durations.
+
+        :param sink: text stream for turn records, records aren't written if None
+        :param slow_turn_threshold: turn duration in seconds to log warning
+        """
+        self.sink = sink
+        self.slow_turn_threshold = slow_turn_threshold
+        self.enabled = True
+
+    def disable(self) -> None:
+        """
+        Stops collecting durations, collected histograms are kept.
+
+        """
+        self.enabled = False
+
+    def measure(self, *name_parts: str):
+        """
+        Returns context manager measuring duration of the with block.
+
+        :param name_parts: name of the phase, or its parts joined with
+            dots only if the profiler is enabled
+        """
+        if self.enabled:
+            return _Timer(self, ".".join(name_parts))
+        return _DISABLED_TIMER
+
+    def record(self, name: str, duration: int) -> None:
+        """
+        Adds duration of the phase.
+
+        :param name: name of the phase
+        :param duration: duration in nanoseconds
+        """
+        with self.__lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(duration)
+
+        phases = getattr(self.__local, "phases", None)
+        if phases is not None:
+            phase = phases.get(name)
+            if phase is None:
+                phases[name] = [1, duration, duration]
+            else:
+                phase[0] += 1
+                phase[1] += duration
+                phase[2] = max(phase[2], duration)
+
+    def start_turn(self, **info) -> None:
+        """
+        Starts collecting durations of the turn in the current thread.
+
+        :param info: values to add to the turn record, e.g. turn number
+        """
+        if not self.enabled:
+            return
+        self.__local.info = info
+        self.__local.phases = {}
+        self.__local.start = perf_counter_ns()
+
+    def finish_turn(self) -> Optional[dict]:
+        """
+        Finishes the turn started in the current thread and writes its record.
+
+        :return: turn record or None if the turn wasn't started
+        """
+        phases = getattr(self.__local, "phases", None)
+        if phases is None:
+            return None
+        duration = (perf_counter_ns() - self.__local.start) / NS_IN_MS
+        self.__local.phases = None
+
+        turn_record = {
+            **self.__local.info,
+            "duration_ms": duration,
+            "slow": duration >= self.slow_turn_threshold * 1000,
+            "phases": {
+                name: {
+                    "count": count,
+                    "total_ms": total / NS_IN_MS,
+                    "max_ms": maximum / NS_IN_MS,
+                }
+                for name, (count, total, maximum) in phases.items()
+            },
+        }
+        self.record("turn", int(duration * NS_IN_MS))
+        if turn_record["slow"]:
+            logger.warning("Slow turn: %s", json.dumps(turn_record))
+        if self.sink is not None:
+            self.sink.write(json.dumps(turn_record) + "\n")
+            self.sink.flush()
+        return turn_record
+
+    def summary(self) -> dict[str, dict]:
+        """
+        Returns statistics of every phase for the whole run.
+
+        """
+        with self.__lock:
+            return {
+                name: histogram.summary()
+                for name, histogram in sorted(self.histograms.items())
+            }
+
+
+profiler = Profiler()